@@ -1,27 +1,106 @@
 from http import HTTPStatus
+import base64
+import json
+import os
 import logging
 from datetime import datetime, timezone
 from uuid import uuid4
 from fastapi import HTTPException
+from sqlalchemy import func, insert, or_, select, tuple_, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from app.db.postgres import Post, SessionLocal
+from app.db.postgres import Post, SEARCH_CONFIG
+from app.schemas.content import PLATFORMS
+from app.core.token_usage import merge_usage
+from app.core.topic_index import topic_index
+from app.core.post_cache import post_cache
 
 
 logger = logging.getLogger("post_crud")
 logging.basicConfig(level=logging.INFO)
 
+# Matches ranked per search. Common terms can match most of the table; ranking
+# stops after this many so a search costs the same at 10k or 1M posts.
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", 1000))
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=10, MaxFragments=2"
+# Short fields are returned whole
+SHORT_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+
+POST_LIST_FIELDS = (
+    "postId", "topic", "status", "createdAt", "updatedAt",
+    "blog", "linkedin", "whatsapp", "images", "platformStatus",
+)
+
+
+def platform_status(drafts: dict, errors: dict) -> dict:
+    """Per-platform outcome of a generation run."""
+    return {
+        platform: "Generated" if platform in drafts else "Failed" if platform in errors else "NotRequested"
+        for platform in PLATFORMS
+    }
+
+
+def overall_status(statuses: dict | None) -> str:
+    """Post status for per-platform results: Partial while any requested piece failed."""
+    return "Partial" if any(s == "Failed" for s in (statuses or {}).values()) else "Generated"
+
+
+# Review workflow enforced by `transition_status`. Generation statuses (Queued,
+# Generating, and Generated/Partial/Failed as results) are written by the job
+# runner through `update_status`, and by regeneration through
+# `store_regenerated`, which only accepts posts in REGENERABLE_STATUSES.
+STATUS_TRANSITIONS = {
+    "Queued": {"Generating", "Failed"},
+    "Generating": {"Generated", "Partial", "Failed"},
+    "Generated": {"Approved", "Rejected"},
+    "Partial": {"Approved", "Rejected"},
+    "Failed": set(),
+    "Approved": {"Published", "Rejected"},
+    "Rejected": {"Approved"},
+    "Published": set(),
+}
+_CANONICAL_STATUSES = {name.lower(): name for name in STATUS_TRANSITIONS}
+# Approved/Published drafts are frozen; reject them first to edit again
+REGENERABLE_STATUSES = {"Generated", "Partial", "Failed", "Rejected"}
+
+
+def canonical_status(name: str | None) -> str | None:
+    """Known status for a client-supplied name (case-insensitive), else None."""
+    return _CANONICAL_STATUSES.get((name or "").strip().lower())
+
+
+def status_sources(target: str) -> list:
+    """Statuses a post may move to `target` from."""
+    return [source for source, targets in STATUS_TRANSITIONS.items() if target in targets]
+
+
+class StatusConflict(HTTPException):
+    """The post's current status or version does not allow the requested change."""
+
+    def __init__(self, post_id: str, target: str, status: str, version: int, message: str | None = None):
+        super().__init__(
+            status_code=HTTPStatus.CONFLICT,
+            detail={
+                "message": message or f"Cannot move post from '{status}' to '{target}'.",
+                "postId": post_id,
+                "status": status,
+                "version": version,
+                "allowed": sorted(STATUS_TRANSITIONS.get(status, ())),
+            },
+        )
+
 class PostCRUD:
-    def __init__(self):
-        try:
-            self.db: Session = SessionLocal()
-            logger.info("PostgreSQL session initialized successfully.")
-        except Exception as e:
-            logger.error(f"Failed to initialize PostgreSQL session: {e}")
-            raise RuntimeError(f"PostgreSQL session initialization failed: {e}")
+    """
+    Post queries bound to a caller-owned session. The session's owner
+    (`get_db` / `session_scope`) commits or rolls back the unit of work;
+    methods here only flush so errors surface where they happen.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
 
 
-    def create_post(self, post_data: dict):
+    def create_post(self, post_data: dict, status: str | None = None):
         try:
             now_utc = datetime.now(timezone.utc)
             post = Post(
@@ -30,21 +109,27 @@ class PostCRUD:
                 blog=post_data.get("blog"),
                 linkedin=post_data.get("linkedin"),
                 whatsapp=post_data.get("whatsapp"),
-                images=[],
-                status="Generated",
+                images=post_data.get("images", []),
+                platformStatus=post_data.get("platformStatus"),
+                usage=post_data.get("usage"),
+                status=status or post_data.get("status") or "Generated",
                 createdAt=now_utc,
                 updatedAt=now_utc,
             )
 
             self.db.add(post)
-            self.db.commit()
+            self.db.flush()
             self.db.refresh(post)
+            topic_index.add(post.postId, post.topic, now_utc.timestamp())
             return {
                 "postId": post.postId,
                 "topic": post.topic,
                 "blog": post.blog,
                 "linkedin": post.linkedin,
                 "whatsapp": post.whatsapp,
+                "images": post.images,
+                "platformStatus": post.platformStatus,
+                "usage": post.usage,
                 "status": post.status
             }
 
@@ -52,119 +137,499 @@ class PostCRUD:
             self.db.rollback()
             logger.error(f"SQLAlchemy error creating post: {e}")
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to create post.")
-        finally:
-            self.db.close()
+
+
+    def create_posts_bulk(self, posts_data: list, status: str = "Generated"):
+        """Insert many posts in one executemany round trip; returns their ids in order."""
+        try:
+            now_utc = datetime.now(timezone.utc)
+            rows = [
+                {
+                    "postId": str(uuid4()),
+                    "topic": data.get("topic"),
+                    "blog": data.get("blog"),
+                    "linkedin": data.get("linkedin"),
+                    "whatsapp": data.get("whatsapp"),
+                    "images": data.get("images", []),
+                    "platformStatus": data.get("platformStatus"),
+                    "usage": data.get("usage"),
+                    "status": data.get("status", status),
+                    "createdAt": now_utc,
+                    "updatedAt": now_utc,
+                }
+                for data in posts_data
+            ]
+            if rows:
+                self.db.execute(insert(Post), rows)
+                self.db.flush()
+                topic_index.add_many((row["postId"], row["topic"], now_utc.timestamp()) for row in rows)
+            logger.info(f"Bulk inserted {len(rows)} posts")
+            return [row["postId"] for row in rows]
+
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"SQLAlchemy error bulk creating posts: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to create posts.")
+
+
+    def update_post_content(self, post_id: str, drafts: dict, statuses: dict | None = None, usage: dict | None = None):
+        """
+        Store the platforms present in `drafts`, leaving the others as they
+        are; `statuses` is merged into the post's platformStatus and `usage`
+        added to its token usage. Returns the merged platformStatus.
+        """
+        try:
+            post = self.db.query(Post).filter(Post.postId == post_id).first()
+            if not post:
+                raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Post not found")
+
+            for platform in PLATFORMS:
+                if platform in drafts:
+                    setattr(post, platform, drafts[platform])
+            if statuses:
+                post.platformStatus = {**(post.platformStatus or {}), **statuses}
+            if usage:
+                post.usage = merge_usage(post.usage, usage)
+            post.version = Post.version + 1
+            post.updatedAt = datetime.now(timezone.utc)
+            self.db.flush()
+            post_cache.invalidate(self.db, post_id)
+            logger.info(f"Drafts stored for postId={post_id} ({', '.join(p for p in PLATFORMS if p in drafts)})")
+            return post.platformStatus
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"SQLAlchemy error updating drafts: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to update drafts.")
+
+
+    def store_regenerated(self, post_id: str, drafts: dict, statuses: dict, usage: dict, expected_version: int) -> dict:
+        """
+        Store regenerated drafts and the post status they imply, only if the
+        post is still at `expected_version` (read before the model ran) and
+        in REGENERABLE_STATUSES. Returns {platformStatus, status, version},
+        None if the post does not exist, and raises StatusConflict otherwise.
+        """
+        try:
+            post = (
+                self.db.query(Post)
+                .filter(Post.postId == post_id, Post.version == expected_version,
+                        Post.status.in_(REGENERABLE_STATUSES))
+                .with_for_update()
+                .first()
+            )
+            if not post:
+                current = self.db.execute(select(Post.status, Post.version).where(Post.postId == post_id)).first()
+                if not current:
+                    return None
+                logger.info(f"Regeneration rejected (postId={post_id}, {current.status} v{current.version}, "
+                            f"expected v{expected_version})")
+                raise StatusConflict(
+                    post_id, "Generated", current.status, current.version,
+                    message="Post changed while its drafts were regenerated.",
+                )
+
+            for platform in PLATFORMS:
+                if platform in drafts:
+                    setattr(post, platform, drafts[platform])
+            post.platformStatus = {**(post.platformStatus or {}), **statuses}
+            post.usage = merge_usage(post.usage, usage)
+            post.status = overall_status(post.platformStatus)
+            post.version = expected_version + 1
+            post.updatedAt = datetime.now(timezone.utc)
+            self.db.flush()
+            post_cache.invalidate(self.db, post_id)
+            logger.info(f"Regenerated drafts stored for postId={post_id} ({', '.join(drafts)})")
+            return {"platformStatus": post.platformStatus, "status": post.status, "version": post.version}
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"SQLAlchemy error storing regenerated drafts: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to update drafts.")
 
 
     def update_post_images(self, post_id: str, image_meta: list):
         try:
-            self.db = SessionLocal()
             post = self.db.query(Post).filter(Post.postId == post_id).first()
             if not post:
                 raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Post not found")
 
             post.images = image_meta
+            post.version = Post.version + 1
             post.updatedAt = datetime.now(timezone.utc)
-            self.db.commit()
+            self.db.flush()
+            post_cache.invalidate(self.db, post_id)
             logger.info(f"Images added to postId={post_id}")
         except SQLAlchemyError as e:
             self.db.rollback()
             logger.error(f"SQLAlchemy error updating images: {e}")
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to update images.")
-        finally:
-            self.db.close()
 
  
-    def get_post_by_id(self, post_id: str, platform: str | None = None):
+    def get_post_with_etag(self, post_id: str):
+        """Full post and its ETag, read through the post cache; (None, None) if missing."""
+        cached = post_cache.get(post_id)
+        if cached:
+            return cached
         try:
+            token = post_cache.token()
             post = self.db.query(Post).filter(Post.postId == post_id).first()
             if not post:
                 logger.warning(f"Post not found (postId={post_id})")
-                return None
+                return None, None
 
-            images = post.images or []
-
-            if platform:
-                platform = platform.lower().strip()
-                valid_fields = {"blog", "linkedin", "whatsapp"}
-
-                if platform not in valid_fields:
-                    logger.warning(f"Invalid platform '{platform}' requested for postId={post_id}")
-                    return None
-
-                platform_data = getattr(post, platform, None)
-                logger.info(f"Retrieved {platform} data with images for postId={post_id}")
-                return {
-                    "platform": platform,
-                    "data": platform_data or {},
-                    "images": images,
-                    "status": post.status,
-                }
-            logger.info(f"Post retrieved successfully (postId={post_id})")
-            return {
+            data = {
+                "topic": post.topic,
                 "blog": post.blog,
                 "linkedin": post.linkedin,
                 "whatsapp": post.whatsapp,
-                "images": images,
+                "images": post.images or [],
+                "platformStatus": post.platformStatus,
+                "usage": post.usage,
                 "status": post.status,
+                "version": post.version,
             }
+            return data, post_cache.set(self.db, post_id, data, token)
 
         except SQLAlchemyError as e:
             logger.error(f"SQLAlchemy error fetching post by ID: {e}")
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to fetch posts.")
-        finally:
-            self.db.close()
+
+
+    def get_post_by_id(self, post_id: str, platform: str | None = None):
+        post, _ = self.get_post_with_etag(post_id)
+        if not post:
+            return None
+
+        if platform:
+            platform = platform.lower().strip()
+            valid_fields = {"blog", "linkedin", "whatsapp"}
+
+            if platform not in valid_fields:
+                logger.warning(f"Invalid platform '{platform}' requested for postId={post_id}")
+                return None
+
+            logger.info(f"Retrieved {platform} data with images for postId={post_id}")
+            return {
+                "platform": platform,
+                "data": post[platform] or {},
+                "images": post["images"],
+                "platformStatus": (post["platformStatus"] or {}).get(platform),
+                "status": post["status"],
+            }
+        logger.info(f"Post retrieved successfully (postId={post_id})")
+        return post
+
+
+    def get_posts_summary(self, post_ids: list) -> dict:
+        """postId -> {topic, status, platformStatus, createdAt} for the posts that exist."""
+        try:
+            if not post_ids:
+                return {}
+            rows = (
+                self.db.query(Post.postId, Post.topic, Post.status, Post.platformStatus, Post.createdAt)
+                .filter(Post.postId.in_(post_ids))
+                .all()
+            )
+            return {
+                r.postId: {
+                    "topic": r.topic,
+                    "status": r.status,
+                    "platformStatus": r.platformStatus,
+                    "createdAt": r.createdAt.isoformat() if r.createdAt else None,
+                }
+                for r in rows
+            }
+        except SQLAlchemyError as e:
+            logger.error(f"SQLAlchemy error fetching post summaries: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to fetch posts.")
 
 
     def update_status(self, post_id: str, new_status: str):
+        """Unconditional status write for the generation pipeline; None if the post is missing."""
         try:
-            post = self.db.query(Post).filter(Post.postId == post_id).first()
-            if not post:
+            row = self.db.execute(
+                update(Post)
+                .where(Post.postId == post_id)
+                .values(status=new_status, version=Post.version + 1, updatedAt=datetime.now(timezone.utc))
+                .returning(Post.postId, Post.status, Post.version)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if not row:
                 logger.warning(f"Cannot update — post not found (postId={post_id})")
                 return None
 
-            post.status = new_status
-            post.updatedAt = datetime.utcnow()
-            self.db.commit()
+            post_cache.invalidate(self.db, post_id)
             logger.info(f"Post status updated (postId={post_id}, status={new_status})")
-            return post
+            return {"postId": row.postId, "status": row.status, "version": row.version}
 
         except SQLAlchemyError as e:
+            self.db.rollback()
             logger.error(f"SQLAlchemy error updating status: {e}")
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to update status.")
-        finally:
-            self.db.close()
 
- 
-    def get_all_posts(self, status: str):
+
+    def _transition(self, target: str | None, expected_status: str | None):
+        """UPDATE for moving posts to `target` from an allowed (optionally expected) status."""
+        if target is None:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"Unknown status. Use one of: {', '.join(STATUS_TRANSITIONS)}.",
+            )
+        sources = status_sources(target)
+        if expected_status:
+            sources = [s for s in sources if s == canonical_status(expected_status)]
+        # lower(): rows written before statuses were canonicalised
+        return (
+            update(Post)
+            .where(func.lower(Post.status).in_([s.lower() for s in sources]))
+            .values(status=target, version=Post.version + 1, updatedAt=datetime.now(timezone.utc))
+            .returning(Post.postId, Post.status, Post.version)
+            .execution_options(synchronize_session=False)
+        )
+
+
+    def transition_status(self, post_id: str, new_status: str, expected_status: str | None = None,
+                          expected_version: int | None = None):
+        """
+        Move a post along STATUS_TRANSITIONS in one conditional UPDATE. With
+        `expected_status` / `expected_version` the change only applies if the
+        post still has them, so concurrent reviewers cannot overwrite each
+        other. Returns {postId, status, version}, None if the post does not
+        exist, and raises StatusConflict otherwise.
+        """
         try:
-            query = self.db.query(Post)
-            if status:
-                query = query.filter(Post.status == status)
+            target = canonical_status(new_status)
+            stmt = self._transition(target, expected_status).where(Post.postId == post_id)
+            if expected_version is not None:
+                stmt = stmt.where(Post.version == expected_version)
+            row = self.db.execute(stmt).first()
+            if row:
+                post_cache.invalidate(self.db, post_id)
+                logger.info(f"Post status changed (postId={post_id}, status={target}, version={row.version})")
+                return {"postId": row.postId, "status": row.status, "version": row.version}
+
+            # Second round trip only to explain the failure
+            current = self.db.execute(select(Post.status, Post.version).where(Post.postId == post_id)).first()
+            if not current:
+                logger.warning(f"Cannot change status — post not found (postId={post_id})")
+                return None
+            logger.info(f"Status change rejected (postId={post_id}, {current.status} v{current.version} -> {target})")
+            raise StatusConflict(post_id, target, current.status, current.version)
+
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"SQLAlchemy error changing status: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to update status.")
 
-            posts = query.order_by(Post.createdAt.desc()).all()
 
-            logger.info(f"Fetched {len(posts)} posts (status={status or 'all'})")
+    def transition_status_bulk(self, post_ids: list, new_status: str, expected_status: str | None = None,
+                               versions: dict | None = None) -> dict:
+        """
+        `transition_status` for many posts in one UPDATE. Posts listed in
+        `versions` only change at that version. Returns
+        {updated: [...], conflicts: [...], notFound: [...]}.
+        """
+        try:
+            target = canonical_status(new_status)
+            post_ids = list(dict.fromkeys(post_ids))
+            versions = {post_id: v for post_id, v in (versions or {}).items() if post_id in post_ids}
+            unversioned = [post_id for post_id in post_ids if post_id not in versions]
+            stmt = self._transition(target, expected_status).where(or_(
+                Post.postId.in_(unversioned),
+                tuple_(Post.postId, Post.version).in_(list(versions.items())),
+            ))
+            updated = [{"postId": r.postId, "status": r.status, "version": r.version} for r in self.db.execute(stmt)]
+            for item in updated:
+                post_cache.invalidate(self.db, item["postId"])
 
-            result = [
+            done = {item["postId"] for item in updated}
+            rest = [post_id for post_id in post_ids if post_id not in done]
+            current = {}
+            if rest:
+                current = {
+                    r.postId: r
+                    for r in self.db.execute(
+                        select(Post.postId, Post.status, Post.version).where(Post.postId.in_(rest))
+                    )
+                }
+            conflicts = [
                 {
-                    "postId": p.postId,
-                    "topic": p.topic,
-                    "blog": p.blog,
-                    "linkedin": p.linkedin,
-                    "whatsapp": p.whatsapp,
-                    "status": p.status,
-                    "images": p.images,
-                    "createdAt": p.createdAt.isoformat() if p.createdAt else None,
-                    "updatedAt": p.updatedAt.isoformat() if p.updatedAt else None,
+                    "postId": post_id,
+                    "status": current[post_id].status,
+                    "version": current[post_id].version,
+                    "allowed": sorted(STATUS_TRANSITIONS.get(current[post_id].status, ())),
                 }
-                for p in posts
+                for post_id in rest if post_id in current
             ]
+            not_found = [post_id for post_id in rest if post_id not in current]
+            logger.info(
+                f"Bulk status change to {target}: {len(updated)} updated, "
+                f"{len(conflicts)} conflicts, {len(not_found)} not found"
+            )
+            return {"updated": updated, "conflicts": conflicts, "notFound": not_found}
+
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error(f"SQLAlchemy error changing statuses: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to update statuses.")
+
+ 
+    def get_all_posts(self, status: str | None, limit: int = 50, cursor: str | None = None, fields: list | None = None):
+        """
+        Keyset-paginated listing ordered by (createdAt, postId) DESC.
+        Returns (posts, next_cursor); next_cursor is None on the last page.
+        """
+        try:
+            fields = list(dict.fromkeys(["postId", *(fields or POST_LIST_FIELDS)]))
+            # createdAt is always loaded: together with postId it forms the cursor
+            columns = [getattr(Post, f) for f in dict.fromkeys([*fields, "createdAt"])]
+
+            query = self.db.query(*columns)
+            if status:
+                query = query.filter(Post.status == status)
+
+            if cursor:
+                created_at, post_id = decode_cursor(cursor)
+                query = query.filter(tuple_(Post.createdAt, Post.postId) < tuple_(created_at, post_id))
+
+            rows = (
+                query.order_by(Post.createdAt.desc(), Post.postId.desc())
+                .limit(limit + 1)
+                .all()
+            )
 
-            return result
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].createdAt, rows[-1].postId) if has_more else None
+
+            logger.info(f"Fetched {len(rows)} posts (status={status or 'all'}, hasMore={has_more})")
+
+            result = []
+            for r in rows:
+                item = {}
+                for f in fields:
+                    value = getattr(r, f)
+                    if f in ("createdAt", "updatedAt"):
+                        value = value.isoformat() if value else None
+                    item[f] = value
+                result.append(item)
+
+            return result, next_cursor
 
         except SQLAlchemyError as e:
             logger.error(f"Error fetching posts: {e}")
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to fetch posts.")
-        finally:
-            self.db.close()
\ No newline at end of file
+
+
+    def search_posts(self, query: str, status: str | None = None, date_from: datetime | None = None,
+                     date_to: datetime | None = None, limit: int = 20, offset: int = 0):
+        """
+        Full-text search over topic, blog title/content and LinkedIn content,
+        ranked by ts_rank_cd (then newest first) with highlighted snippets.
+        Only the newest SEARCH_MAX_CANDIDATES matches are ranked.
+        Returns (results, has_more, truncated), `truncated` meaning more posts
+        matched than were ranked.
+        """
+        try:
+            rows = self._search_rows(query, status, date_from, date_to, limit, offset)
+
+            has_more = len(rows) > limit
+            truncated = bool(rows) and rows[0].matched > SEARCH_MAX_CANDIDATES
+            results = [
+                {
+                    "postId": r.postId,
+                    "topic": r.topic,
+                    "status": r.status,
+                    "createdAt": r.createdAt.isoformat() if r.createdAt else None,
+                    "rank": round(float(r.rank), 4),
+                    "highlights": {
+                        "topic": r.topicHeadline,
+                        "blogTitle": r.blogTitle,
+                        "blogContent": r.blogContent,
+                        "linkedinContent": r.linkedinContent,
+                    },
+                }
+                for r in rows[:limit]
+            ]
+            logger.info(f"Search '{query}' returned {len(results)} posts (hasMore={has_more}, truncated={truncated})")
+            return results, has_more, truncated
+
+        except SQLAlchemyError as e:
+            logger.error(f"SQLAlchemy error searching posts: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to search posts.")
+
+
+    def _search_rows(self, query, status, date_from, date_to, limit, offset):
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        candidates = (
+            select(Post.postId, Post.createdAt, func.ts_rank_cd(Post.searchVector, tsquery).label("rank"))
+            .where(Post.searchVector.bool_op("@@")(tsquery))
+        )
+        if status:
+            candidates = candidates.where(Post.status == status)
+        if date_from:
+            candidates = candidates.where(Post.createdAt >= date_from)
+        if date_to:
+            candidates = candidates.where(Post.createdAt < date_to)
+        # Newest first, so a capped search is repeatable; the createdAt indexes
+        # serve this order. One extra candidate tells whether the cap cut matches off
+        candidates = (
+            candidates.order_by(Post.createdAt.desc(), Post.postId.desc())
+            .limit(SEARCH_MAX_CANDIDATES + 1)
+            .subquery()
+        )
+        numbered = select(
+            candidates,
+            func.row_number().over(order_by=(candidates.c.createdAt.desc(), candidates.c.postId.desc())).label("n"),
+            func.count().over().label("matched"),
+        ).subquery()
+
+        page = (
+            select(numbered)
+            .where(numbered.c.n <= SEARCH_MAX_CANDIDATES)
+            .order_by(numbered.c.rank.desc(), numbered.c.createdAt.desc(), numbered.c.postId.desc())
+            .limit(limit + 1)
+            .offset(offset)
+            .subquery()
+        )
+
+        def headline(document, options=HEADLINE_OPTIONS):
+            return func.ts_headline(SEARCH_CONFIG, func.coalesce(document, ""), tsquery, options)
+
+        # Headlines are costly, so they are built only for the page
+        return self.db.execute(
+            select(
+                Post.postId, Post.topic, Post.status, Post.createdAt, page.c.rank, page.c.matched,
+                headline(Post.topic, SHORT_HEADLINE_OPTIONS).label("topicHeadline"),
+                headline(Post.blog["title"].as_string(), SHORT_HEADLINE_OPTIONS).label("blogTitle"),
+                headline(Post.blog["content"].as_string()).label("blogContent"),
+                headline(Post.linkedin["content"].as_string()).label("linkedinContent"),
+            )
+            .join(page, Post.postId == page.c.postId)
+            .order_by(page.c.rank.desc(), Post.createdAt.desc(), Post.postId.desc())
+        ).all()
+
+
+def encode_cursor(created_at: datetime, post_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), post_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(post_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="Invalid cursor.")
+
+
+def parse_fields(fields: str | None):
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in POST_LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(POST_LIST_FIELDS)}",
+        )
+    return requested
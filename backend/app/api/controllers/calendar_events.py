@@ -0,0 +1,296 @@
+from http import HTTPStatus
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from fastapi import HTTPException
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.llm_cache import normalise_topic
+from app.db.postgres import CalendarEvent, Upload
+from app.utils.calendar_service import convert_to_google_datetime, EVENT_TIMEZONE
+
+
+logger = logging.getLogger("calendar_event_crud")
+logging.basicConfig(level=logging.INFO)
+
+# A reservation (eventId still NULL) older than this belongs to an upload that
+# died mid-flight and may be taken over
+RESERVATION_TTL = timedelta(minutes=10)
+
+
+def _start(row) -> str:
+    return row.startDateTime or convert_to_google_datetime(row.selectDate, row.time)
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":")).encode()).hexdigest()
+
+
+def row_key(row) -> str:
+    """Identity of a scheduled event: the same topic at the same time."""
+    return _digest(normalise_topic(row.topic), _start(row))
+
+
+def row_hash(row) -> str:
+    """Content of a scheduled event; differs from the stored one when the row changed."""
+    return _digest(normalise_topic(row.topic), _start(row), bool(row.imageGenerated))
+
+
+class CalendarEventCRUD:
+    """
+    Index of calendar events created by uploads, bound to a caller-owned
+    session (see PostCRUD). Rows are reserved before the Calendar API is
+    called, so concurrent uploads of the same schedule create each event once.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+
+    def plan(self, indexed_rows: list, upload_id: str):
+        """
+        Split `(row_index, row)` pairs into
+          creates: [(row_index, row, row_key)] reserved for this upload,
+          updates: [(row_index, row, event_id)] whose content changed,
+          skipped: [(row_index, row, event_id, reason)] already up to date.
+        """
+        try:
+            keyed = {}
+            skipped = []
+            for index, row in indexed_rows:
+                key = row_key(row)
+                if key in keyed:
+                    skipped.append((index, row, None, "duplicate row in file"))
+                else:
+                    keyed[key] = (index, row)
+            if not keyed:
+                return [], [], skipped
+
+            existing = {
+                event.rowKey: event
+                for event in self.db.scalars(select(CalendarEvent).where(CalendarEvent.rowKey.in_(keyed)))
+            }
+
+            reserved = set()
+            new_keys = [key for key in keyed if key not in existing]
+            if new_keys:
+                stmt = (
+                    insert(CalendarEvent)
+                    .values([
+                        {
+                            "rowKey": key,
+                            "rowHash": row_hash(keyed[key][1]),
+                            "topic": keyed[key][1].topic,
+                            "startDateTime": _start(keyed[key][1]),
+                            "imageGenerated": bool(keyed[key][1].imageGenerated),
+                            "uploadId": upload_id,
+                        }
+                        for key in new_keys
+                    ])
+                    .on_conflict_do_nothing(index_elements=["rowKey"])
+                    .returning(CalendarEvent.rowKey)
+                )
+                reserved.update(self.db.scalars(stmt))
+
+            stale_before = datetime.now(timezone.utc) - RESERVATION_TTL
+            stale = [key for key, event in existing.items() if event.eventId is None and event.updatedAt < stale_before]
+            if stale:
+                stmt = (
+                    update(CalendarEvent)
+                    .where(
+                        CalendarEvent.rowKey.in_(stale),
+                        CalendarEvent.eventId.is_(None),
+                        CalendarEvent.updatedAt < stale_before,
+                    )
+                    .values(uploadId=upload_id, updatedAt=datetime.now(timezone.utc))
+                    .returning(CalendarEvent.rowKey)
+                )
+                reserved.update(self.db.execute(stmt, execution_options={"synchronize_session": False}).scalars())
+
+            creates, updates = [], []
+            for key, (index, row) in keyed.items():
+                event = existing.get(key)
+                if key in reserved:
+                    creates.append((index, row, key))
+                elif event is None or event.eventId is None:
+                    # Another upload holds the reservation and is creating it now
+                    skipped.append((index, row, None, "in progress"))
+                elif event.rowHash != row_hash(row):
+                    updates.append((index, row, event.eventId))
+                else:
+                    skipped.append((index, row, event.eventId, "unchanged"))
+
+            self.db.flush()
+            return creates, updates, skipped
+        except SQLAlchemyError as e:
+            logger.error(f"Error planning calendar events: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to check existing events.")
+
+    def record(self, rows: dict, created: list, updated: list):
+        """
+        Store the outcome of create/update calls. `rows` maps row_index to
+        the EventRow; `created`/`updated` are calendar_service report entries.
+        Failed creates release their reservation; events deleted from the
+        calendar are dropped from the index so the next upload recreates them.
+        """
+        try:
+            release = []
+            for report, is_create in [(r, True) for r in created] + [(r, False) for r in updated]:
+                row = rows[report["row"]]
+                key = row_key(row)
+                if report["eventId"]:
+                    self.db.execute(
+                        update(CalendarEvent)
+                        .where(CalendarEvent.rowKey == key)
+                        .values(
+                            eventId=report["eventId"],
+                            rowHash=row_hash(row),
+                            imageGenerated=bool(row.imageGenerated),
+                            updatedAt=datetime.now(timezone.utc),
+                        ),
+                        execution_options={"synchronize_session": False},
+                    )
+                elif is_create or report.get("gone"):
+                    release.append(key)
+
+            if release:
+                self.db.execute(
+                    delete(CalendarEvent).where(CalendarEvent.rowKey.in_(release)),
+                    execution_options={"synchronize_session": False},
+                )
+            self.db.flush()
+        except SQLAlchemyError as e:
+            logger.error(f"Error recording calendar events: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to record events.")
+
+    def assign_run_times(self, lead: timedelta, min_lead: timedelta, limit: int = 500) -> int:
+        """
+        Give newly created events a generation time between `lead` and
+        `min_lead` before they start. The point in that window comes from the
+        row key, so a schedule full of same-day events is spread evenly over
+        the window instead of hitting the model providers all at once.
+        """
+        try:
+            events = self.db.execute(
+                select(CalendarEvent.rowKey, CalendarEvent.startDateTime)
+                .where(CalendarEvent.eventId.is_not(None), CalendarEvent.runAt.is_(None))
+                .limit(limit)
+            ).all()
+            if not events:
+                return 0
+
+            tz = ZoneInfo(EVENT_TIMEZONE)
+            now = datetime.now(timezone.utc)
+            values = []
+            for key, start_text in events:
+                start = datetime.fromisoformat(start_text).replace(tzinfo=tz)
+                window_start = max(now, start - lead)
+                window_end = max(window_start, start - min_lead)
+                fraction = int(key[:8], 16) / 0xFFFFFFFF
+                values.append({
+                    "rowKey": key,
+                    "startAt": start,
+                    "runAt": window_start + (window_end - window_start) * fraction,
+                })
+
+            self.db.execute(update(CalendarEvent), values)
+            self.db.flush()
+            return len(values)
+        except SQLAlchemyError as e:
+            logger.error(f"Error scheduling calendar events: {e}")
+            raise
+
+    def claim_due(self, limit: int, lease: timedelta, owner: str, max_attempts: int) -> list:
+        """
+        Lease up to `limit` events that are due for generation and have not
+        started yet. Rows locked by another replica are skipped, and a lease
+        that outlives its owner simply expires.
+        """
+        try:
+            now = func.now()
+            due = (
+                select(CalendarEvent.rowKey)
+                .where(
+                    CalendarEvent.eventId.is_not(None),
+                    CalendarEvent.postId.is_(None),
+                    CalendarEvent.runAt <= now,
+                    CalendarEvent.startAt > now,
+                    CalendarEvent.attempts < max_attempts,
+                    or_(CalendarEvent.leaseUntil.is_(None), CalendarEvent.leaseUntil < now),
+                )
+                .order_by(CalendarEvent.runAt)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            stmt = (
+                update(CalendarEvent)
+                .where(CalendarEvent.rowKey.in_(due.scalar_subquery()))
+                .values(leaseOwner=owner, leaseUntil=now + lease, attempts=CalendarEvent.attempts + 1)
+                .returning(
+                    CalendarEvent.rowKey,
+                    CalendarEvent.eventId,
+                    CalendarEvent.topic,
+                    CalendarEvent.imageGenerated,
+                    CalendarEvent.startAt,
+                )
+            )
+            claimed = self.db.execute(stmt, execution_options={"synchronize_session": False}).mappings().all()
+            self.db.flush()
+            return [dict(event) for event in claimed]
+        except SQLAlchemyError as e:
+            logger.error(f"Error claiming scheduled events: {e}")
+            raise
+
+    def link_post(self, row_key: str, owner: str, post_id: str) -> bool:
+        """Attach the generated post; False if this owner's lease was lost meanwhile."""
+        result = self.db.execute(
+            update(CalendarEvent)
+            .where(
+                CalendarEvent.rowKey == row_key,
+                CalendarEvent.leaseOwner == owner,
+                CalendarEvent.postId.is_(None),
+            )
+            .values(postId=post_id, leaseOwner=None, leaseUntil=None, generationError=None),
+            execution_options={"synchronize_session": False},
+        )
+        self.db.flush()
+        return result.rowcount == 1
+
+    def release_claim(self, row_key: str, owner: str, error: str, retry_after: timedelta):
+        """Record a failed generation; the event becomes claimable again after `retry_after`."""
+        self.db.execute(
+            update(CalendarEvent)
+            .where(CalendarEvent.rowKey == row_key, CalendarEvent.leaseOwner == owner)
+            .values(leaseOwner=None, leaseUntil=func.now() + retry_after, generationError=error[:500]),
+            execution_options={"synchronize_session": False},
+        )
+        self.db.flush()
+
+    def find_upload(self, file_hash: str):
+        """Most recent earlier upload with identical file contents, if any."""
+        return self.db.scalars(
+            select(Upload).where(Upload.fileHash == file_hash).order_by(Upload.createdAt.desc()).limit(1)
+        ).first()
+
+    def create_upload(self, upload_id: str, file_hash: str, filename: str, file_type: str,
+                      rows_received: int, summary: dict):
+        try:
+            upload = Upload(
+                uploadId=upload_id,
+                fileHash=file_hash,
+                filename=filename,
+                fileType=file_type,
+                rowsReceived=rows_received,
+                summary=summary,
+                createdAt=datetime.now(timezone.utc),
+            )
+            self.db.add(upload)
+            self.db.flush()
+            return upload
+        except SQLAlchemyError as e:
+            logger.error(f"Error recording upload: {e}")
+            raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Failed to record upload.")
@@ -1,12 +1,33 @@
+import os
+import json
+import socket
+import asyncio
 import logging
+from uuid import uuid4
+from datetime import datetime, timedelta
 from http import HTTPStatus
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from app.api.controllers.agent import PostCRUD
-from app.schemas.content import TopicInput, ApproveIn, PublishIn
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session
+from app.api.controllers.agent import (
+    PostCRUD, REGENERABLE_STATUSES, SEARCH_MAX_CANDIDATES, StatusConflict, parse_fields, platform_status,
+    overall_status, canonical_status,
+)
+from app.api.controllers.calendar_events import CalendarEventCRUD
+from app.db.postgres import get_db, session_scope
+from app.schemas.content import TopicInput, BatchTopicInput, ApproveIn, BulkStatusIn, PublishIn, RegenerateIn, PLATFORMS
 from app.utils.content_service import ContentService
 from app.utils.image_service import ImageService
 from app.core.model_registry import ModelRegistry
+from app.core.executor import run_blocking
+from app.core.job_queue import JobQueue, QueueFullError
+from app.core.scheduler import PeriodicTask
+from app.core.metrics import metrics
+from app.core.token_usage import track_usage
+from app.core.cache import estimate_size
+from app.core.post_cache import etag_matches, make_etag
+from app.core.topic_index import topic_index, TOPIC_INDEX_SYNC_SECONDS, TOPIC_SIMILARITY_THRESHOLD
 
 router = APIRouter()
 logger = logging.getLogger("post_agent")
@@ -18,40 +39,214 @@ registry = ModelRegistry()
 content_service = ContentService(registry)
 image_service = ImageService(registry)
 
-@router.post("/generate")
-async def generate_content(payload: TopicInput):
+
+def _in_session(method: str, *args):
+    # Background jobs run outside a request; each step is its own unit of work
+    with session_scope() as db:
+        return getattr(PostCRUD(db), method)(*args)
+
+
+async def _run_generation_job(post_id: str, job: dict):
     try:
-        if not payload.topics:
-            raise HTTPException(status_code=400, detail="At least one topic is required")
+        await run_blocking(_in_session, "update_status", post_id, "Generating")
 
+        with track_usage() as usage:
+            drafts, errors = await content_service.agenerate_platforms(
+                job["topic"], job.get("platforms"), job.get("cache", "use")
+            )
+        if not drafts:
+            raise next(iter(errors.values()))
+        statuses = platform_status(drafts, errors)
+        await run_blocking(_in_session, "update_post_content", post_id, drafts, statuses, usage.report())
+
+        if job.get("image_generated"):
+            logger.info(f"[Job] Generating images for postId={post_id}")
+            image_meta = await image_service.agenerate_images(topic=job["topic"], count=1)
+            await run_blocking(_in_session, "update_post_images", post_id, image_meta)
+
+        await run_blocking(_in_session, "update_status", post_id, overall_status(statuses))
+        logger.info(f"[Job] Generation finished (postId={post_id})")
+    except Exception:
+        await run_blocking(_in_session, "update_status", post_id, "Failed")
+        raise
 
-        drafts = content_service.generate_content(payload.topics)
 
-        post_data = {
-            "topic": payload.topics,
-            "blog": drafts.get("blog", {}),
-            "linkedin": drafts.get("linkedin", {}),
-            "whatsapp": drafts.get("whatsapp", {}),
-            "status": "generated",
-        }
+generation_queue = JobQueue(
+    "generation",
+    _run_generation_job,
+    concurrency=int(os.getenv("GENERATION_WORKERS", 4)),
+    maxsize=int(os.getenv("GENERATION_QUEUE_SIZE", 1000)),
+)
+metrics.gauge("generation_queue", generation_queue.stats)
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+
+
+async def _generate_post_data(topic: str, image_generated: bool, cache: str = "use", platforms=None) -> dict:
+    with track_usage() as usage:
+        drafts, errors = await content_service.agenerate_platforms(topic, platforms, cache)
+    if not drafts:
+        # Nothing to store; surface the (first) provider error as before
+        raise next(iter(errors.values()))
+    statuses = platform_status(drafts, errors)
+
+    # Generate images before touching the DB so no pooled connection
+    # is held while waiting on the image provider.
+    image_meta = []
+    if image_generated:
+        logger.info(f"[Generate] Generating images for topic={topic}")
+        image_meta = await image_service.agenerate_images(topic=topic, count=1)
+
+    return {
+        "topic": topic,
+        "blog": drafts.get("blog", {}),
+        "linkedin": drafts.get("linkedin", {}),
+        "whatsapp": drafts.get("whatsapp", {}),
+        "images": image_meta,
+        "platformStatus": statuses,
+        "usage": usage.report(),
+        "status": overall_status(statuses),
+    }
+
+
+# Scheduled pre-generation: uploaded calendar events get their post generated
+# between SCHEDULE_LEAD_SECONDS and SCHEDULE_MIN_LEAD_SECONDS before they start.
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCHEDULER_INTERVAL = float(os.getenv("SCHEDULER_INTERVAL", 30))
+SCHEDULE_LEAD = timedelta(seconds=int(os.getenv("SCHEDULE_LEAD_SECONDS", 24 * 3600)))
+SCHEDULE_MIN_LEAD = timedelta(seconds=int(os.getenv("SCHEDULE_MIN_LEAD_SECONDS", 3600)))
+SCHEDULE_BATCH = int(os.getenv("SCHEDULE_BATCH", 4))
+SCHEDULE_LEASE = timedelta(seconds=int(os.getenv("SCHEDULE_LEASE_SECONDS", 600)))
+SCHEDULE_MAX_ATTEMPTS = int(os.getenv("SCHEDULE_MAX_ATTEMPTS", 3))
+SCHEDULE_RETRY_DELAY = timedelta(seconds=int(os.getenv("SCHEDULE_RETRY_SECONDS", 300)))
+SCHEDULER_OWNER = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+
+
+class LeaseLost(RuntimeError):
+    pass
+
+
+def _events_in_session(method: str, *args):
+    with session_scope() as db:
+        return getattr(CalendarEventCRUD(db), method)(*args)
+
+
+def _store_scheduled_post(row_key: str, post_data: dict) -> dict:
+    # Post insert and event link commit together; if another replica took the
+    # lease over meanwhile, nothing is stored.
+    with session_scope() as db:
+        post = PostCRUD(db).create_post(post_data)
+        if not CalendarEventCRUD(db).link_post(row_key, SCHEDULER_OWNER, post["postId"]):
+            raise LeaseLost(f"Lease on event {row_key} was lost")
+        return post
+
+
+async def _generate_scheduled(event: dict):
+    try:
+        post_data = await _generate_post_data(event["topic"], event["imageGenerated"])
+        post = await run_blocking(_store_scheduled_post, event["rowKey"], post_data)
+        metrics.incr("scheduled_generations", status="generated")
+        logger.info(f"[Scheduler] Pre-generated postId={post['postId']} for event {event['eventId']} "
+                    f"starting {event['startAt'].isoformat()}")
+    except LeaseLost as e:
+        metrics.incr("scheduled_generations", status="lease_lost")
+        logger.warning(f"[Scheduler] {e}; discarding generated drafts")
+    except Exception as e:
+        metrics.incr("scheduled_generations", status="failed")
+        logger.exception(f"[Scheduler] Generation failed for event {event['eventId']}")
+        await run_blocking(
+            _events_in_session, "release_claim",
+            event["rowKey"], SCHEDULER_OWNER, getattr(e, "detail", None) or str(e), SCHEDULE_RETRY_DELAY,
+        )
 
-        controller = PostCRUD()
-        post = controller.create_post(post_data)
-        logger.info(f"[Generate] Post created successfully (postId={post['postId']})")
 
-        image_meta = []
-        if getattr(payload, "image_generated", False):
-            logger.info(f"[Generate] Generating images for postId={post['postId']}")
-            image_meta = image_service.generate_images(topic=payload.topics, count=1)
-            controller.update_post_images(post["postId"], image_meta)
+async def _run_scheduled_generations():
+    await run_blocking(_events_in_session, "assign_run_times", SCHEDULE_LEAD, SCHEDULE_MIN_LEAD)
+    claimed = await run_blocking(
+        _events_in_session, "claim_due", SCHEDULE_BATCH, SCHEDULE_LEASE, SCHEDULER_OWNER, SCHEDULE_MAX_ATTEMPTS,
+    )
+    if claimed:
+        logger.info(f"[Scheduler] Generating {len(claimed)} scheduled post(s)")
+        await asyncio.gather(*(_generate_scheduled(event) for event in claimed))
+
+
+generation_scheduler = PeriodicTask("scheduled_generation", _run_scheduled_generations, SCHEDULER_INTERVAL)
+metrics.gauge("generation_scheduler", generation_scheduler.stats)
+
 
-        response_data = {**post, "images": image_meta}
+# Near-duplicate topics: /generate offers (or reuses) recent posts whose topic
+# embeds within TOPIC_SIMILARITY_THRESHOLD of the requested one.
+TOPIC_INDEX_ENABLED = os.getenv("TOPIC_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+TOPIC_REUSE_MAX_AGE = int(os.getenv("TOPIC_REUSE_MAX_AGE_SECONDS", 30 * 24 * 3600))
+UNREUSABLE_STATUSES = ("Queued", "Generating", "Failed")
+
+
+async def _sync_topic_index():
+    await run_blocking(topic_index.sync)
+
+
+topic_index_sync = PeriodicTask("topic_index", _sync_topic_index, TOPIC_INDEX_SYNC_SECONDS)
+metrics.gauge("topic_index_sync", topic_index_sync.stats)
+
+
+def _similar_posts(topic: str, limit: int = 5, threshold: float = TOPIC_SIMILARITY_THRESHOLD, max_age=None) -> list:
+    matches = topic_index.search(topic, limit, threshold, max_age)
+    with session_scope() as db:
+        # The index may hold posts whose insert was rolled back
+        summaries = PostCRUD(db).get_posts_summary([m["postId"] for m in matches])
+    return [{**m, **summaries[m["postId"]]} for m in matches if m["postId"] in summaries]
+
+
+async def _reusable_post(similar: list, platforms=None):
+    """The closest similar post that already has every requested platform generated."""
+    for match in similar:
+        statuses = match.get("platformStatus") or {}
+        if match["status"] in UNREUSABLE_STATUSES:
+            continue
+        if any(statuses.get(p, "Generated") != "Generated" for p in platforms or PLATFORMS):
+            continue
+        post = await run_blocking(_in_session, "get_post_by_id", match["postId"])
+        if post and all(post.get(p) for p in platforms or PLATFORMS):
+            return {"postId": match["postId"], **post, "similarity": match["similarity"], "reused": True}
+    return None
+
+
+@router.post("/generate")
+async def generate_content(
+    payload: TopicInput,
+    mode: Literal["sync", "queue"] = "sync",
+    db: Session = Depends(get_db),
+):
+    try:
+        if not payload.topics:
+            raise HTTPException(status_code=400, detail="At least one topic is required")
+
+        similar = []
+        if TOPIC_INDEX_ENABLED and payload.similar != "ignore" and payload.cache == "use":
+            similar = await run_blocking(_similar_posts, payload.topics, 5, TOPIC_SIMILARITY_THRESHOLD, TOPIC_REUSE_MAX_AGE)
+            if payload.similar == "reuse":
+                reused = await _reusable_post(similar, payload.platforms)
+                if reused:
+                    metrics.incr("topic_reuse", outcome="reused")
+                    logger.info(f"[Generate] Reusing postId={reused['postId']} (similarity={reused['similarity']})")
+                    return JSONResponse(
+                        status_code=HTTPStatus.OK,
+                        content={"message": "Reused a similar recent post.", "data": reused},
+                    )
+            metrics.incr("topic_reuse", outcome="offered" if similar else "none")
+
+        if mode == "queue":
+            return await _enqueue_generation(payload, db, similar)
+
+        post_data = await _generate_post_data(payload.topics, payload.image_generated, payload.cache, payload.platforms)
+        post = await run_blocking(PostCRUD(db).create_post, post_data)
+        logger.info(f"[Generate] Post created successfully (postId={post['postId']})")
 
         return JSONResponse(
             status_code=HTTPStatus.CREATED,
             content={
                 "message": "Content generated successfully.",
-                "data": response_data,
+                "data": {**post, "similarPosts": similar},
             },
         )
 
@@ -62,51 +257,469 @@ async def generate_content(payload: TopicInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Batches keep running after a client disconnects; referenced here so the
+# event loop does not drop them
+_batch_tasks: set = set()
+
+
+def _bulk_create(posts_data: list):
+    # Runs beside the response stream, so it owns its own unit of work
+    with session_scope() as db:
+        return PostCRUD(db).create_posts_bulk(posts_data)
+
+
+class BatchWriter:
+    """
+    Stores batch results as they complete. Results that finish together are
+    inserted in one executemany; if that fails they are retried one by one,
+    so a bad row only fails its own item.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run(), name="batch-writer")
+
+    async def store(self, post_data: dict) -> str:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((post_data, future))
+        return await future
+
+    async def close(self):
+        await self.queue.put(None)
+        await self.task
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            closing = None in batch
+            batch = [item for item in batch if item is not None]
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        try:
+            post_ids = await run_blocking(_bulk_create, [data for data, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            logger.warning(f"[Batch] Bulk insert of {len(batch)} posts failed ({e}); inserting one by one")
+            for item in batch:
+                await self._flush([item])
+            return
+        for (_, future), post_id in zip(batch, post_ids):
+            future.set_result(post_id)
+
+
+@router.post("/generate/batch")
+async def generate_batch(payload: BatchTopicInput):
+    """
+    Generate drafts for many topics concurrently. Each post is stored as soon
+    as it is generated and streamed as one NDJSON `result` line with its
+    postId; a final `done` line maps item indexes to postIds. If the client
+    disconnects, items already generating are still stored and the rest are
+    skipped.
+    """
+    semaphore = asyncio.Semaphore(payload.concurrency or BATCH_CONCURRENCY)
+    abandoned = asyncio.Event()
+    writer = BatchWriter()
+
+    async def run_item(index: int, item: TopicInput):
+        async with semaphore:
+            if abandoned.is_set():
+                raise RuntimeError("Batch abandoned by the client")
+            if not item.topics.strip():
+                raise ValueError("Topic is required")
+            post_data = await _generate_post_data(item.topics, item.image_generated, item.cache, item.platforms)
+        return await writer.store(post_data), post_data
+
+    async def indexed(index: int, item: TopicInput):
+        try:
+            post_id, post_data = await run_item(index, item)
+            return index, post_id, post_data, None
+        except Exception as e:
+            logger.warning(f"[Batch] Item {index} failed: {e}")
+            return index, None, None, getattr(e, "detail", None) or str(e)
+
+    tasks = [asyncio.create_task(indexed(i, item)) for i, item in enumerate(payload.items)]
+
+    async def finish():
+        await asyncio.gather(*tasks)
+        await writer.close()
+
+    async def stream():
+        created = {}
+        completed = False
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, post_id, post_data, error = await next_done
+                line = {"event": "result", "index": index, "topic": payload.items[index].topics}
+                if error:
+                    line.update({"status": "failed", "error": error})
+                else:
+                    created[index] = post_id
+                    line.update({"status": "generated", "postId": post_id, "data": post_data})
+                yield json.dumps(line) + "\n"
+            completed = True
+        finally:
+            if not completed:
+                # Client went away: keep what is being paid for, skip the rest
+                abandoned.set()
+                task = asyncio.create_task(finish())
+                _batch_tasks.add(task)
+                task.add_done_callback(_batch_tasks.discard)
+
+        await writer.close()
+        logger.info(f"[Batch] {len(created)}/{len(payload.items)} posts created")
+        yield json.dumps({
+            "event": "done",
+            "created": [{"index": i, "postId": created[i]} for i in sorted(created)],
+            "failed": len(payload.items) - len(created),
+        }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _field_deltas(previous: dict, current: dict):
+    """
+    Per-field changes between two partial drafts, e.g.
+    {"path": "blog.content", "append": "..."} for growing strings or
+    {"path": "blog.tags", "value": [...]} otherwise.
+    """
+    deltas = []
+    for platform, fields in current.items():
+        if not isinstance(fields, dict):
+            continue
+        before = previous.get(platform) or {}
+        for field, value in fields.items():
+            old = before.get(field)
+            if value == old:
+                continue
+            path = f"{platform}.{field}"
+            if isinstance(value, str) and isinstance(old, str) and value.startswith(old):
+                deltas.append({"path": path, "append": value[len(old):]})
+            else:
+                deltas.append({"path": path, "value": value})
+    return deltas
+
+
+@router.post("/generate/stream")
+async def generate_stream(payload: TopicInput):
+    """
+    Server-Sent Events variant of /generate. Emits `start` immediately,
+    `delta` events with per-field text as the model streams, then persists
+    the post and emits `done` with the stored post (or `error`).
+    """
+    if not payload.topics or not payload.topics.strip():
+        raise HTTPException(status_code=400, detail="At least one topic is required")
+
+    async def events():
+        yield _sse("start", {"topic": payload.topics})
+        try:
+            drafts = {}
+            with track_usage() as usage:
+                async for partial in content_service.astream_content(payload.topics, payload.cache, payload.platforms):
+                    deltas = _field_deltas(drafts, partial)
+                    drafts = partial
+                    if deltas:
+                        yield _sse("delta", deltas)
+
+            image_meta = []
+            if payload.image_generated:
+                yield _sse("status", {"stage": "images"})
+                image_meta = await image_service.agenerate_images(topic=payload.topics, count=1)
+
+            requested = payload.platforms or PLATFORMS
+            statuses = platform_status(drafts, {p: None for p in requested if p not in drafts})
+            post = await run_blocking(_in_session, "create_post", {
+                "topic": payload.topics,
+                "blog": drafts.get("blog", {}),
+                "linkedin": drafts.get("linkedin", {}),
+                "whatsapp": drafts.get("whatsapp", {}),
+                "images": image_meta,
+                "platformStatus": statuses,
+                "usage": usage.report(),
+            }, overall_status(statuses))
+            logger.info(f"[GenerateStream] Post created successfully (postId={post['postId']})")
+            yield _sse("done", post)
+        except Exception as e:
+            logger.exception("[GenerateStream] Unexpected error during generation.")
+            yield _sse("error", {"detail": getattr(e, "detail", None) or str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _enqueue_generation(payload: TopicInput, db: Session, similar: list | None = None):
+    controller = PostCRUD(db)
+    post = await run_blocking(
+        controller.create_post,
+        {"topic": payload.topics, "blog": {}, "linkedin": {}, "whatsapp": {}},
+        "Queued",
+    )
+    # Workers use their own sessions, so the row must be visible first
+    await run_blocking(db.commit)
+
+    try:
+        generation_queue.enqueue(post["postId"], {
+            "topic": payload.topics,
+            "image_generated": bool(payload.image_generated),
+            "cache": payload.cache,
+            "platforms": payload.platforms,
+        })
+    except QueueFullError:
+        # Own unit of work: the request session is rolled back by the 503 below,
+        # and the Queued row is already committed
+        await run_blocking(_in_session, "update_status", post["postId"], "Failed")
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail="Generation queue is full, retry later.")
+
+    logger.info(f"[Generate] Job queued (postId={post['postId']})")
+    return JSONResponse(
+        status_code=HTTPStatus.ACCEPTED,
+        content={
+            "message": "Content generation queued.",
+            "data": {"postId": post["postId"], "status": post["status"], "similarPosts": similar or []},
+        },
+    )
+
+
+@router.get("/jobs/{post_id}")
+async def get_job_status(post_id: str, db: Session = Depends(get_db)):
+    try:
+        post = await run_blocking(PostCRUD(db).get_post_by_id, post_id)
+
+        if not post:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Job not found")
+
+        data = {"postId": post_id, "status": post["status"]}
+        job = generation_queue.status(post_id)
+        if job:
+            data["job"] = job
+        if post["status"] in ("Generated", "Partial"):
+            data["post"] = post
+
+        return JSONResponse(
+            status_code=HTTPStatus.OK,
+            content={"message": "Job status retrieved successfully.", "data": data},
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("[JobStatus] Unexpected error fetching job status.")
+        raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+def _store_regenerated(post_id: str, drafts: dict, statuses: dict, usage: dict, version: int) -> dict:
+    with session_scope() as db:
+        stored = PostCRUD(db).store_regenerated(post_id, drafts, statuses, usage, version)
+    if stored is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Post not found")
+    return stored
+
+
+@router.post("/posts/{post_id}/regenerate")
+async def regenerate_platforms(post_id: str, payload: RegenerateIn):
+    """
+    Regenerate individual platform drafts of an existing post: the ones
+    listed in `platforms`, or by default every platform that failed.
+    Pieces that succeed replace the stored drafts; the rest are untouched.
+    Approved and Published posts cannot be regenerated, and the result is
+    only stored if the post did not change while the model ran (409 otherwise).
+    """
+    try:
+        # No session is held open while the model runs
+        post = await run_blocking(_in_session, "get_post_by_id", post_id)
+        if not post:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Post not found")
+        if post["status"] in ("Queued", "Generating"):
+            raise HTTPException(status_code=HTTPStatus.CONFLICT, detail=f"Post is still {post['status'].lower()}")
+        if post["status"] not in REGENERABLE_STATUSES:
+            raise StatusConflict(
+                post_id, "Generated", post["status"], post["version"],
+                message=f"{post['status']} posts cannot be regenerated; reject the post first.",
+            )
+
+        current = post.get("platformStatus") or {}
+        platforms = payload.platforms or [p for p in PLATFORMS if current.get(p) == "Failed"]
+        if not platforms:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail="No failed platforms to regenerate; pass `platforms` to regenerate specific ones.",
+            )
+
+        with track_usage() as usage:
+            drafts, errors = await content_service.agenerate_platforms(post["topic"], platforms, payload.cache)
+        if not drafts:
+            error = next(iter(errors.values()))
+            if isinstance(error, HTTPException):
+                raise error
+            raise HTTPException(status_code=HTTPStatus.BAD_GATEWAY, detail=f"Regeneration failed: {error}")
+
+        stored = await run_blocking(
+            _store_regenerated, post_id, drafts, {platform: "Generated" for platform in drafts}, usage.report(),
+            post["version"],
+        )
+        logger.info(f"[Regenerate] postId={post_id} regenerated {', '.join(drafts)}")
+
+        return JSONResponse(
+            status_code=HTTPStatus.OK,
+            content={
+                "message": "Drafts regenerated." if not errors else "Some drafts could not be regenerated.",
+                "data": {
+                    "postId": post_id,
+                    **drafts,
+                    "regenerated": list(drafts),
+                    "failed": {platform: getattr(e, "detail", None) or str(e) for platform, e in errors.items()},
+                    **stored,
+                },
+            },
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("[Regenerate] Unexpected error during regeneration.")
+        raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+def _not_modified(etag: str, post: dict) -> Response:
+    metrics.incr("post_not_modified_bytes_saved", estimate_size(post))
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
 @router.put("/approve")
-async def approve_post(payload: ApproveIn):
+async def approve_post(
+    payload: ApproveIn,
+    db: Session = Depends(get_db),
+    if_match: Optional[str] = Header(None),
+):
+    """
+    Move a post along the review workflow in one conditional UPDATE. Send
+    `version` (or `expectedStatus`) from when the post was loaded so a
+    concurrent change gives 409 instead of being overwritten; the ETag from
+    GET /post/id works too as If-Match (412 if the post changed since).
+    """
     try:
-        controller = PostCRUD()
+        controller = PostCRUD(db)
+        status = canonical_status(payload.status)
+        if status is None:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"Unknown status '{payload.status}'.",
+            )
 
-        existing_post = controller.get_post_by_id(payload.postId)
-        if not existing_post:
+        version = payload.version
+        if if_match:
+            existing_post, etag = await run_blocking(controller.get_post_with_etag, payload.postId)
+            if existing_post and not etag_matches(if_match, etag):
+                return JSONResponse(
+                    content={"message": "Post has changed since it was loaded.", "data": {"status": existing_post["status"]}},
+                    status_code=HTTPStatus.PRECONDITION_FAILED,
+                    headers={"ETag": etag},
+                )
+            if existing_post and version is None:
+                # Pins the UPDATE to the version the ETag was computed from
+                version = existing_post["version"]
+
+        updated = await run_blocking(
+            controller.transition_status, payload.postId, status, payload.expectedStatus, version
+        )
+        if not updated:
             return JSONResponse(
                 content={"message": f"Post with ID '{payload.postId}' not found."},
                 status_code=HTTPStatus.NOT_FOUND,
             )
-
-        controller.update_status(payload.postId, payload.status)
-        logger.info(f"[Approve] Post {payload.postId} updated to '{payload.status}'.")
+        logger.info(f"[Approve] Post {payload.postId} updated to '{status}'.")
 
         message = (
             "Post approved successfully."
-            if payload.status.lower() == "approved"
-            else f"Post status updated to '{payload.status}'."
+            if status == "Approved"
+            else f"Post status updated to '{status}'."
         )
 
-        return JSONResponse(content={"message": message}, status_code=HTTPStatus.OK)
+        return JSONResponse(content={"message": message, "data": updated}, status_code=HTTPStatus.OK)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("[Approve] Unexpected error during approval.")
         raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.put("/approve/bulk")
+async def approve_posts_bulk(payload: BulkStatusIn, db: Session = Depends(get_db)):
+    """
+    Move many posts to one status in a single UPDATE. Posts whose status does
+    not allow it (or whose version moved on) are listed under `conflicts`
+    and left unchanged; the rest are updated.
+    """
+    try:
+        status = canonical_status(payload.status)
+        if status is None:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f"Unknown status '{payload.status}'.",
+            )
+
+        result = await run_blocking(
+            PostCRUD(db).transition_status_bulk, payload.postIds, status, payload.expectedStatus, payload.versions
+        )
+
+        return JSONResponse(
+            status_code=HTTPStatus.OK,
+            content={
+                "message": f"{len(result['updated'])} of {len(set(payload.postIds))} posts updated to '{status}'.",
+                "data": result,
+            },
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("[ApproveBulk] Unexpected error during bulk status change.")
+        raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
+
+
 @router.post("/publish")
-async def publish_post(payload: PublishIn):
+async def publish_post(
+    payload: PublishIn,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
     try:
-        controller = PostCRUD()
-        post_item = controller.get_post_by_id(payload.postId)
+        post_item, post_etag = await run_blocking(PostCRUD(db).get_post_with_etag, payload.postId)
 
         if not post_item:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Post not found")
 
-        result = {"postId": payload.postId, "platforms": {}}
+        # The response depends on the requested platforms as well as the post
+        etag = make_etag(post_etag, *payload.platforms)
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag, post_item)
+
+        result = {"postId": payload.postId, "platforms": {}, "missing": []}
+        statuses = post_item.get("platformStatus") or {}
 
         for platform in payload.platforms:
             platform_name = platform.lower().strip()
-            if platform_name in {"blog", "linkedin", "whatsapp"}:
-                result["platforms"][platform_name] = post_item.get(platform_name)
-            else:
+            if platform_name not in PLATFORMS:
                 logger.warning(f"[Publish] Platform '{platform_name}' not found for postId={payload.postId}")
+            elif statuses.get(platform_name, "Generated") != "Generated":
+                # Not generated for this post (not requested, or failed and not regenerated yet)
+                result["missing"].append(platform_name)
+            else:
+                result["platforms"][platform_name] = post_item.get(platform_name)
 
         # Always include images + status
         result["images"] = post_item.get("images", [])
@@ -115,8 +728,11 @@ async def publish_post(payload: PublishIn):
         return JSONResponse(
             status_code=HTTPStatus.OK,
             content={"message": "Published successfully", "data": result},
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("[Publish] Unexpected error during publishing.")
         raise HTTPException(status_code=500, detail=str(e))
@@ -124,14 +740,21 @@ async def publish_post(payload: PublishIn):
 
 
 @router.get("/posts")
-async def get_all_posts(status: str):
+async def get_all_posts(
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated projection, e.g. postId,topic,status,createdAt"),
+    db: Session = Depends(get_db),
+):
     try:
-        controller = PostCRUD()
-        posts = controller.get_all_posts(status)
+        posts, next_cursor = await run_blocking(
+            PostCRUD(db).get_all_posts, status, limit, cursor, parse_fields(fields)
+        )
 
         if not posts:
             return JSONResponse(
-                content={"message": "No posts found."},
+                content={"message": "No posts found.", "data": [], "nextCursor": None},
                 status_code=HTTPStatus.OK,
             )
 
@@ -139,29 +762,97 @@ async def get_all_posts(status: str):
             content={
                 "message": "Posts fetched successfully.",
                 "data": posts,
+                "nextCursor": next_cursor,
             },
             status_code=HTTPStatus.OK,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("[GetAllPosts] Unexpected error while retrieving posts.")
         raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.get("/posts/search")
+async def search_posts(
+    q: str = Query(..., min_length=1, description="Search text; supports \"quoted phrases\", OR and -exclusions"),
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from", description="createdAt >= from (ISO 8601)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="createdAt < to (ISO 8601)"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: Session = Depends(get_db),
+):
+    try:
+        results, has_more, truncated = await run_blocking(
+            PostCRUD(db).search_posts, q, status, date_from, date_to, limit, offset
+        )
+        content = {
+            "message": "Posts found." if results else "No posts found.",
+            "data": results,
+            "nextOffset": offset + limit if has_more else None,
+            "truncated": truncated,
+        }
+        if truncated:
+            content["note"] = (
+                f"More than {SEARCH_MAX_CANDIDATES} posts matched; ranking covers the newest "
+                f"{SEARCH_MAX_CANDIDATES}. Narrow the query or filter by date to reach older posts."
+            )
+        return JSONResponse(status_code=HTTPStatus.OK, content=content)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("[SearchPosts] Unexpected error during search.")
+        raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/posts/similar")
+async def get_similar_posts(
+    topic: str = Query(..., min_length=1),
+    limit: int = Query(5, ge=1, le=50),
+    threshold: float = Query(TOPIC_SIMILARITY_THRESHOLD, ge=0, le=1),
+):
+    """Posts whose topic is a near-duplicate of `topic`, most similar first."""
+    try:
+        similar = await run_blocking(_similar_posts, topic, limit, threshold)
+        return JSONResponse(
+            status_code=HTTPStatus.OK,
+            content={
+                "message": "Similar posts fetched successfully." if similar else "No similar posts found.",
+                "data": similar,
+            },
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("[SimilarPosts] Unexpected error during lookup.")
+        raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
+
+
 @router.get("/post/id")
-async def get_post_by_id(post_id: str):
+async def get_post_by_id(
+    post_id: str,
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+):
     try:
-        controller = PostCRUD()
-        post = controller.get_post_by_id(post_id)
+        post, etag = await run_blocking(PostCRUD(db).get_post_with_etag, post_id)
 
         if not post:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Post not found")
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag, post)
 
         return JSONResponse(
             status_code=HTTPStatus.OK,
             content={"message": "Post retrieved successfully.", "data": post},
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("[GetByID] Unexpected error fetching post.")
         raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
@@ -1,10 +1,26 @@
+import io
+import os
+import shutil
+import hashlib
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import os, shutil
+import tempfile
+from uuid import uuid4
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 
-from app.utils.pdf_reader import parse_pdf
-from app.utils.sheet_reader import parse_sheet
-from app.utils.calendar_service import create_event
+from app.utils.pdf_reader import count_pdf_pages, extract_pdf_tables
+from app.utils.sheet_reader import iter_csv_chunks, iter_spooled_chunks, spool_xlsx_rows
+from app.utils.row_parser import parse_rows
+from app.utils.calendar_service import (
+    create_events_batched,
+    update_events_batched,
+    CALENDAR_BATCH_SIZE,
+    CALENDAR_BATCH_CONCURRENCY,
+)
+from app.api.controllers.calendar_events import CalendarEventCRUD
+from app.db.postgres import session_scope
+from app.core.executor import run_blocking
+from app.core.metrics import metrics
+from app.core.process_pool import run_in_processes, ClientDisconnected, PARSE_WORKERS
 
 
 router = APIRouter()
@@ -14,39 +30,235 @@ logging.basicConfig(level=logging.INFO)
 SUPPORTED_SHEETS = ["xlsx", "xls", "csv"]
 SUPPORTED_PDF = ["pdf"]
 
-@router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    # Save temporary file
-    os.makedirs("temp", exist_ok=True)
-    file_path = f"temp/{file.filename}"
+# Rows pulled from the parser per step; enough to keep every batch worker busy
+INGEST_CHUNK_ROWS = CALENDAR_BATCH_SIZE * CALENDAR_BATCH_CONCURRENCY
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", 200))
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
-    # Detect file extension
-    ext = file.filename.split(".")[-1].lower()
+class UploadTooLarge(Exception):
+    pass
+
+
+class HashingReader(io.BufferedIOBase):
+    """Binary stream wrapper that hashes everything read through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.sha256.update(data)
+        return data
+
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def hexdigest(self) -> str:
+        return self.sha256.hexdigest()
+
+
+def _next_chunk(chunks):
+    return next(chunks, None)
+
+
+def _spool_to_disk(stream: HashingReader, directory: str, ext: str) -> str:
+    """Copy the upload into a per-request directory, enforcing MAX_UPLOAD_BYTES."""
+    path = os.path.join(directory, f"upload.{ext}")
+    written = 0
+    with open(path, "wb") as out:
+        while chunk := stream.read(1024 * 1024):
+            written += len(chunk)
+            if written > MAX_UPLOAD_BYTES:
+                raise UploadTooLarge()
+            out.write(chunk)
+    return path
+
+
+def _plan_events(valid: list, upload_id: str):
+    with session_scope() as db:
+        return CalendarEventCRUD(db).plan(valid, upload_id)
+
+
+def _record_events(rows: dict, created: list, updated: list):
+    with session_scope() as db:
+        CalendarEventCRUD(db).record(rows, created, updated)
 
+
+def _record_upload(upload_id: str, file_hash: str, filename: str, file_type: str,
+                   rows_received: int, summary: dict):
+    """Store the upload; returns the id of an earlier upload with the same contents, if any."""
+    with session_scope() as db:
+        crud = CalendarEventCRUD(db)
+        previous = crud.find_upload(file_hash)
+        crud.create_upload(upload_id, file_hash, filename, file_type, rows_received, summary)
+        return previous.uploadId if previous else None
+
+
+async def _sync_events(valid: list, upload_id: str) -> list:
+    """
+    Create events for new rows, patch events whose row changed and skip the
+    rest, using the calendar event index. Returns report entries with an
+    "action" of created/updated/skipped.
+    """
+    creates, updates, skipped = await run_blocking(_plan_events, valid, upload_id)
+    created = await create_events_batched(creates) if creates else []
+    updated = await update_events_batched(updates) if updates else []
+    if created or updated:
+        await run_blocking(_record_events, dict(valid), created, updated)
+
+    reports = [{**r, "action": "created"} for r in created]
+    reports += [{**r, "action": "updated"} for r in updated]
+    reports += [
+        {
+            "row": index,
+            "slno": row.slno,
+            "topic": row.topic,
+            "eventId": event_id,
+            "error": None,
+            "action": "skipped",
+            "reason": reason,
+        }
+        for index, row, event_id, reason in skipped
+    ]
+    for report in reports:
+        report.pop("gone", None)
+    return sorted(reports, key=lambda r: r["row"])
+
+
+async def _read_in_processes(request: Request, ext: str, path: str):
+    """
+    CPU-heavy PDF/XLSX reading on the process pool; PDFs are split by page
+    range. Returns an iterator of raw (header, rows) chunks for the columnar
+    row parser. XLSX rows are spooled next to `path` and read back
+    INGEST_CHUNK_ROWS at a time, like CSV.
+    """
     if ext in SUPPORTED_PDF:
-        rows = parse_pdf(file_path)
+        pages = (await run_in_processes([(count_pdf_pages, path)], request))[0]
+        if pages > MAX_PDF_PAGES:
+            raise HTTPException(status_code=413, detail=f"PDF has {pages} pages (limit {MAX_PDF_PAGES})")
+
+        step = max(1, -(-pages // PARSE_WORKERS))
+        calls = [(extract_pdf_tables, path, first, min(first + step, pages)) for first in range(0, pages, step)]
+        tables = []
+        for part_tables, page_seconds in await run_in_processes(calls, request):
+            tables.extend((table[0], table[1:]) for table in part_tables)
+            for seconds in page_seconds:
+                metrics.observe("upload_parse_seconds", seconds, unit="pdf_page")
+        return iter(tables)
 
-    elif ext in SUPPORTED_SHEETS:
-        rows = parse_sheet(file_path)
+    spool_path = f"{path}.rows"
+    header, count, seconds = (await run_in_processes([(spool_xlsx_rows, path, spool_path)], request))[0]
+    if count:
+        metrics.observe("upload_parse_seconds", seconds / count, unit="xlsx_row")
+    return iter_spooled_chunks(spool_path, header, INGEST_CHUNK_ROWS)
 
-    else:
+
+@router.post("/upload")
+async def upload_file(request: Request, file: UploadFile = File(...)):
+    # Detect file extension
+    ext = file.filename.split(".")[-1].lower()
+
+    if ext not in SUPPORTED_PDF and ext not in SUPPORTED_SHEETS:
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported file type: .{ext} (only PDF, XLSX, XLS, CSV allowed)"
         )
 
-    # Create calendar events
-    created_event_ids = []
-    for row in rows:
-        event = create_event(row)
-        created_event_ids.append(event["id"])
+    upload_id = str(uuid4())
+    stream = HashingReader(file.file)
+    # Holds the spooled upload (and XLSX rows) until the rows are consumed
+    tmp_dir = None
+    try:
+        if ext == "csv":
+            # CSV is read incrementally from Starlette's per-request spooled upload
+            chunks = iter_csv_chunks(stream, INGEST_CHUNK_ROWS)
+        else:
+            tmp_dir = tempfile.mkdtemp(prefix="upload-")
+            try:
+                path = await run_blocking(_spool_to_disk, stream, tmp_dir, ext)
+                chunks = await _read_in_processes(request, ext, path)
+            except BaseException:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes")
+    except ClientDisconnected:
+        logger.info(f"[Upload] Client disconnected while parsing {file.filename}; parsing cancelled")
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid file: {e}")
+
+    # Parse and sync calendar events chunk by chunk so memory stays bounded.
+    # Invalid rows are collected and reported together; valid rows proceed.
+    # Rows already in the event index are skipped (or patched if changed), so
+    # re-uploading a schedule makes no Calendar calls for unchanged rows.
+    results = []
+    invalid_rows = []
+    rows_received = 0
+    try:
+        while True:
+            # CSV and spooled XLSX rows are read lazily here; keep it off the event loop
+            chunk = await run_blocking(_next_chunk, chunks)
+            if chunk is None:
+                break
+            header, raw_rows = chunk
+            valid, invalid = await run_blocking(parse_rows, header, raw_rows, rows_received)
+            rows_received += len(raw_rows)
+            invalid_rows.extend(invalid)
+            if valid:
+                results.extend(await _sync_events(valid, upload_id))
+    except ValueError as e:
+        # Unreadable file (missing columns, bad encoding): report what was done so far
+        if not rows_received:
+            raise HTTPException(status_code=400, detail=f"Invalid file: {e}")
+        invalid_rows.append({"row": rows_received, "errors": [{"field": None, "error": str(e)}]})
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        await file.close()
+
+    counts = {action: 0 for action in ("created", "updated", "skipped")}
+    for r in results:
+        if not r["error"]:
+            counts[r["action"]] += 1
+    for action, count in counts.items():
+        metrics.incr("upload_rows", count, action=action)
+
+    created_event_ids = [r["eventId"] for r in results if r["action"] == "created" and r["eventId"]]
+    failed = [r for r in results if r["error"]]
+    if failed:
+        logger.warning(f"[Upload] {len(failed)}/{rows_received} events failed for {file.filename}")
+
+    if invalid_rows:
+        logger.warning(f"[Upload] {len(invalid_rows)} invalid row(s) skipped in {file.filename}")
+
+    file_hash = stream.hexdigest()
+    duplicate_of = await run_blocking(
+        _record_upload, upload_id, file_hash, file.filename, ext, rows_received,
+        {**counts, "failed": len(failed), "invalid": len(invalid_rows)},
+    )
+    if duplicate_of:
+        logger.info(f"[Upload] {file.filename} has the same contents as upload {duplicate_of}")
 
     return {
-        "status": "success",
+        "status": "success" if not (failed or invalid_rows) else "partial",
+        "uploadId": upload_id,
+        "fileHash": file_hash,
+        "duplicateOf": duplicate_of,
         "fileType": ext,
-        "rowsReceived": len(rows),
-        "eventsCreated": created_event_ids
-    }
\ No newline at end of file
+        "rowsReceived": rows_received,
+        "rowsCreated": counts["created"],
+        "rowsUpdated": counts["updated"],
+        "rowsSkipped": counts["skipped"],
+        "eventsCreated": created_event_ids,
+        "eventsFailed": len(failed),
+        "results": results,
+        "invalidRows": invalid_rows,
+    }
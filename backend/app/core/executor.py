@@ -0,0 +1,19 @@
+# executor.py
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", 16))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call (DB, Drive, Calendar) on the bounded worker pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,120 @@
+# google_clients.py
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from google.auth.transport.requests import Request
+from google.oauth2 import credentials as user_credentials
+from google.oauth2 import service_account
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+load_dotenv()
+
+logger = logging.getLogger("google_clients")
+
+# Refresh access tokens this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(seconds=int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", 300)))
+
+
+def _calendar_credentials():
+    service_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
+    if not service_json:
+        raise ValueError("GOOGLE_CREDENTIALS_JSON is not set in environment")
+    info = json.loads(service_json)
+    return service_account.Credentials.from_service_account_info(
+        info, scopes=["https://www.googleapis.com/auth/calendar"]
+    )
+
+
+def _drive_credentials():
+    return user_credentials.Credentials(
+        token=os.getenv("GOOGLE_DRIVE_ACCESS_TOKEN"),
+        refresh_token=os.getenv("GOOGLE_DRIVE_REFRESH_TOKEN"),
+        client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+        token_uri="https://oauth2.googleapis.com/token",
+    )
+
+
+SERVICES = {
+    "calendar": ("calendar", "v3", _calendar_credentials),
+    "drive": ("drive", "v3", _drive_credentials),
+}
+
+
+class GoogleClientFactory:
+    """
+    Process-wide source of Google API clients.
+
+    Discovery documents come from the copies bundled with
+    google-api-python-client and are parsed once. Credentials are created
+    once per service and refreshed ahead of expiry under a lock. Service
+    objects sit on httplib2, which is not thread-safe, so every thread gets
+    its own service built from the shared document and credentials.
+    """
+
+    def __init__(self, services: dict = SERVICES):
+        self.services = services
+        self._lock = threading.Lock()
+        self._docs: dict[str, dict] = {}
+        self._creds: dict = {}
+        self._overrides: dict = {}
+        self._local = threading.local()
+
+    def get(self, name: str):
+        if name in self._overrides:
+            return self._overrides[name]
+
+        creds = self._credentials(name)
+        cache = self._local.__dict__.setdefault("services", {})
+        service = cache.get(name)
+        if service is None:
+            service = build_from_document(self._document(name), credentials=creds)
+            cache[name] = service
+        return service
+
+    def override(self, name: str, service):
+        """Swap in a fake client (tests, local development)."""
+        self._overrides[name] = service
+
+    def reset(self):
+        with self._lock:
+            self._overrides.clear()
+            self._creds.clear()
+            self._local = threading.local()
+
+    def _document(self, name: str) -> dict:
+        doc = self._docs.get(name)
+        if doc is None:
+            api, version, _ = self.services[name]
+            raw = get_static_doc(api, version)
+            if raw is None:
+                raise RuntimeError(f"No bundled discovery document for {api} {version}")
+            doc = json.loads(raw)
+            self._docs[name] = doc
+        return doc
+
+    def _credentials(self, name: str):
+        with self._lock:
+            creds = self._creds.get(name)
+            if creds is None:
+                _, _, loader = self.services[name]
+                creds = loader()
+                self._creds[name] = creds
+            if self._needs_refresh(creds):
+                creds.refresh(Request())
+                logger.info(f"[GoogleClients] Refreshed {name} access token (expires {creds.expiry})")
+            return creds
+
+    @staticmethod
+    def _needs_refresh(creds) -> bool:
+        if not creds.token:
+            return True
+        # google-auth keeps expiry as a naive UTC datetime
+        return creds.expiry is not None and creds.expiry - TOKEN_REFRESH_MARGIN <= datetime.utcnow()
+
+
+google_clients = GoogleClientFactory()
@@ -0,0 +1,97 @@
+# job_queue.py
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger("job_queue")
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class JobQueue:
+    """
+    In-process job queue served by a fixed pool of asyncio workers.
+    `handler(job_id, payload)` is awaited for every job; the pool size caps
+    how many jobs run concurrently.
+    """
+
+    def __init__(self, name: str, handler, concurrency: int = 4, maxsize: int = 0, history: int = 1000):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.history = history
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._workers: list[asyncio.Task] = []
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+
+    async def start(self):
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"{self.name}-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"[{self.name}] Started {self.concurrency} workers")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info(f"[{self.name}] Workers stopped")
+
+    def enqueue(self, job_id: str, payload: dict):
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"{self.name} queue is full")
+
+        self._jobs[job_id] = {
+            "state": "queued",
+            "error": None,
+            "enqueuedAt": datetime.now(timezone.utc).isoformat(),
+        }
+        self._trim()
+
+    def status(self, job_id: str):
+        job = self._jobs.get(job_id)
+        if not job:
+            return None
+        return {**job, "queueDepth": self._queue.qsize()}
+
+    def stats(self):
+        running = sum(1 for j in self._jobs.values() if j["state"] == "running")
+        return {
+            "queueDepth": self._queue.qsize(),
+            "running": running,
+            "workers": len(self._workers),
+        }
+
+    def _trim(self):
+        while len(self._jobs) > self.history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest["state"] in ("queued", "running"):
+                break
+            self._jobs.pop(oldest_id)
+
+    async def _worker(self, index: int):
+        while True:
+            job_id, payload = await self._queue.get()
+            job = self._jobs.setdefault(job_id, {"state": "queued", "error": None})
+            job["state"] = "running"
+            try:
+                await self.handler(job_id, payload)
+                job["state"] = "done"
+            except asyncio.CancelledError:
+                job["state"] = "cancelled"
+                raise
+            except Exception as e:
+                job["state"] = "failed"
+                job["error"] = str(e)
+                logger.exception(f"[{self.name}] Job {job_id} failed")
+            finally:
+                job["finishedAt"] = datetime.now(timezone.utc).isoformat()
+                self._queue.task_done()
@@ -0,0 +1,107 @@
+# llm_cache.py
+import os
+import re
+import copy
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.cache import LRUCache
+from app.core.metrics import metrics
+from app.db.postgres import LLMCacheEntry, session_scope
+
+logger = logging.getLogger("llm_cache")
+
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+# "none" keeps the cache in memory only; "postgres" adds a tier that survives restarts
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "none").lower()
+
+CACHE_MODES = ("use", "bypass", "refresh")
+
+
+def normalise_topic(topic: str) -> str:
+    topic = re.sub(r"\s+", " ", topic.strip().lower())
+    return topic.strip(" .,!?;:\"'")
+
+
+def cache_key(topic: str, prompt_hash: str, model: str, temperature: float, **extra) -> str:
+    raw = json.dumps(
+        {
+            "topic": normalise_topic(topic),
+            "prompt": prompt_hash,
+            "model": model,
+            "temperature": temperature,
+            **extra,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LLMCache:
+    """Two-tier LLM response cache: in-process LRU, optionally backed by Postgres."""
+
+    def __init__(self, persist: str = LLM_CACHE_PERSIST, ttl: int = LLM_CACHE_TTL):
+        self.ttl = ttl
+        self.persist = persist == "postgres"
+        self.memory = LRUCache(max_entries=LLM_CACHE_MAX_ENTRIES, max_bytes=LLM_CACHE_MAX_BYTES, ttl=ttl)
+        self._writes = 0
+        metrics.gauge("llm_cache", self.memory.stats)
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            metrics.incr("llm_cache_hits", tier="memory")
+            return copy.deepcopy(value)
+
+        if self.persist:
+            value = self._db_get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                metrics.incr("llm_cache_hits", tier="postgres")
+                return copy.deepcopy(value)
+
+        metrics.incr("llm_cache_misses")
+        return None
+
+    def set(self, key: str, value: dict, model: str):
+        value = copy.deepcopy(value)
+        self.memory.set(key, value)
+        if self.persist:
+            self._db_set(key, value, model)
+
+    def _db_get(self, key: str):
+        try:
+            with session_scope() as db:
+                entry = db.get(LLMCacheEntry, key)
+                if entry is None or entry.expiresAt < datetime.now(timezone.utc):
+                    return None
+                return entry.value
+        except SQLAlchemyError as e:
+            logger.warning(f"[LLMCache] Postgres tier read failed: {e}")
+            return None
+
+    def _db_set(self, key: str, value: dict, model: str):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        stmt = insert(LLMCacheEntry).values(key=key, model=model, value=value, expiresAt=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LLMCacheEntry.key],
+            set_={"value": stmt.excluded.value, "expiresAt": stmt.excluded.expiresAt, "model": stmt.excluded.model},
+        )
+        try:
+            with session_scope() as db:
+                db.execute(stmt)
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    db.query(LLMCacheEntry).filter(
+                        LLMCacheEntry.expiresAt < datetime.now(timezone.utc)
+                    ).delete(synchronize_session=False)
+        except SQLAlchemyError as e:
+            logger.warning(f"[LLMCache] Postgres tier write failed: {e}")
+
+
+llm_cache = LLMCache()
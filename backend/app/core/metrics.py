@@ -0,0 +1,92 @@
+# metrics.py
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _key(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    parts = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{parts}}}"
+
+
+class Metrics:
+    """Process-local counters, gauges and histograms exposed on GET /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._histograms: dict[str, dict] = {}
+        self._gauges: dict[str, callable] = {}
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": {b: 0 for b in buckets}}
+                self._histograms[key] = hist
+            hist["count"] += 1
+            hist["sum"] += value
+            hist["max"] = max(hist["max"], value)
+            for bound in hist["buckets"]:
+                if value <= bound:
+                    hist["buckets"][bound] += 1
+
+    def gauge(self, name: str, fn):
+        """Register a callable evaluated on every snapshot."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def histogram(self, name: str, **labels):
+        with self._lock:
+            hist = self._histograms.get(_key(name, labels))
+            return None if hist is None else {**hist, "buckets": dict(hist["buckets"])}
+
+    def quantile(self, name: str, q: float, **labels):
+        """Approximate quantile from histogram buckets (upper bound of the bucket)."""
+        hist = self.histogram(name, **labels)
+        if not hist or not hist["count"]:
+            return None
+        target = q * hist["count"]
+        for bound, count in sorted(hist["buckets"].items()):
+            if count >= target:
+                return bound
+        return hist["max"]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {
+                key: {
+                    "count": h["count"],
+                    "sum": round(h["sum"], 6),
+                    "avg": round(h["sum"] / h["count"], 6) if h["count"] else 0,
+                    "max": round(h["max"], 6),
+                    "buckets": {str(b): c for b, c in h["buckets"].items()},
+                }
+                for key, h in self._histograms.items()
+            }
+
+        gauge_values = {}
+        for name, fn in gauges.items():
+            try:
+                gauge_values[name] = fn()
+            except Exception as e:
+                gauge_values[name] = f"error: {e}"
+
+        return {"counters": counters, "gauges": gauge_values, "histograms": histograms}
+
+
+metrics = Metrics()
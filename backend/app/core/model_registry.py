@@ -2,15 +2,32 @@
 import os
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
-from openai import OpenAI
+from langchain_openai import ChatOpenAI
+from openai import OpenAI, AsyncOpenAI
+from app.core.metrics import metrics
+from app.core.model_router import ModelRouter, parse_models
+from app.core.provider_guard import CircuitBreaker, ProviderGuard
 
 load_dotenv()
 
+CHAT_TEMPERATURE = 0.7
+
 class ModelRegistry:
+    """
+    Shared model clients. Clients are created with SDK retries disabled;
+    async callers go through `guard(provider, model)`, which applies rate
+    limits, retries and a per-provider circuit breaker.
+    """
 
     def __init__(self):
         self._groq_cache = {}
+        self._openai_chat_cache = {}
+        self._routers: dict[str, ModelRouter] = {}
         self._openai_client = None
+        self._openai_async_client = None
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._guards: dict[tuple, ProviderGuard] = {}
+        metrics.gauge("circuit_breakers", lambda: {p: b.state for p, b in self._breakers.items()})
 
         self.groq_api_key = os.getenv("GROQ_API_KEY")
         self.openai_key = os.getenv("OPENAI_API_KEY")
@@ -29,15 +46,65 @@ class ModelRegistry:
             self._groq_cache[model_name] = ChatGroq(
                 model=model_name,
                 api_key=self.groq_api_key,
-                temperature=0.7
+                temperature=CHAT_TEMPERATURE,
+                max_retries=0,
             )
         return self._groq_cache[model_name]
 
+    # -----------------------------------------------------------
+    # OPENAI CHAT MODEL
+    # -----------------------------------------------------------
+    def openai_chat(self, model_name: str):
+        """Return cached OpenAI chat model instance (LangChain)."""
+        if model_name not in self._openai_chat_cache:
+            self._openai_chat_cache[model_name] = ChatOpenAI(
+                model=model_name,
+                api_key=self.openai_key,
+                temperature=CHAT_TEMPERATURE,
+                max_retries=0,
+            )
+        return self._openai_chat_cache[model_name]
+
+    def chat(self, provider: str, model_name: str):
+        """Chat model for a `provider:model` pair."""
+        if provider == "groq":
+            return self.groq(model_name)
+        if provider == "openai":
+            return self.openai_chat(model_name)
+        raise ValueError(f"Unknown chat provider '{provider}'")
+
     # -----------------------------------------------------------
     # OPENAI CLIENT
     # -----------------------------------------------------------
     def openai(self):
         """Return single OpenAI client instance."""
         if not self._openai_client:
-            self._openai_client = OpenAI(api_key=self.openai_key)
+            self._openai_client = OpenAI(api_key=self.openai_key, max_retries=0)
         return self._openai_client
+
+    def openai_async(self):
+        """Return single AsyncOpenAI client instance."""
+        if not self._openai_async_client:
+            self._openai_async_client = AsyncOpenAI(api_key=self.openai_key, max_retries=0)
+        return self._openai_async_client
+
+    # -----------------------------------------------------------
+    # RATE LIMITS / RETRIES / CIRCUIT BREAKING
+    # -----------------------------------------------------------
+    def guard(self, provider: str, model: str | None = None) -> ProviderGuard:
+        """Guard for calls to `model` on `provider`; the breaker is shared per provider."""
+        key = (provider, model)
+        if key not in self._guards:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker()
+            self._guards[key] = ProviderGuard(provider, model, self._breakers[provider])
+        return self._guards[key]
+
+    # -----------------------------------------------------------
+    # ROUTING
+    # -----------------------------------------------------------
+    def router(self, name: str, models: str) -> ModelRouter:
+        """Router over `models` ('provider:model,...'), cached by name."""
+        if name not in self._routers:
+            self._routers[name] = ModelRouter(self, name, parse_models(models))
+        return self._routers[name]
@@ -0,0 +1,204 @@
+# model_router.py
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from app.core.metrics import metrics
+
+logger = logging.getLogger("model_router")
+
+ROUTER_LATENCY_SLO = float(os.getenv("ROUTER_LATENCY_SLO", 10))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", 0.5))
+ROUTER_HEDGE = os.getenv("ROUTER_HEDGE", "true").lower() in ("1", "true", "yes")
+ROUTER_WINDOW = 100
+ERROR_DECAY = 0.1
+
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60, 90)
+
+# USD per 1K tokens (blended input/output), used to prefer cheaper models
+# when several meet the latency SLO. Unknown models count as 0.
+MODEL_COSTS = {
+    "groq:llama-3.1-8b-instant": 0.00007,
+    "groq:llama-3.3-70b-versatile": 0.0007,
+    "groq:gemma2-9b-it": 0.0002,
+    "openai:gpt-4o-mini": 0.0004,
+    "openai:gpt-4o": 0.006,
+}
+
+
+class ModelStats:
+    """Rolling latency window and decayed error rate for one model."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.latencies = deque(maxlen=ROUTER_WINDOW)
+        self.error_rate = 0.0
+
+    def record(self, seconds: float | None, ok: bool):
+        self.error_rate = (1 - ERROR_DECAY) * self.error_rate + ERROR_DECAY * (0.0 if ok else 1.0)
+        if ok and seconds is not None:
+            self.latencies.append(seconds)
+            metrics.observe("llm_latency_seconds", seconds, buckets=LATENCY_BUCKETS, model=self.label)
+        metrics.incr("llm_routed_calls", model=self.label, outcome="ok" if ok else "error")
+
+    def p95(self):
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        p95 = self.p95()
+        return {
+            "p95": round(p95, 3) if p95 is not None else None,
+            "samples": len(self.latencies),
+            "errorRate": round(self.error_rate, 3),
+        }
+
+
+class ModelRouter:
+    """
+    Routes one kind of call across several `provider:model` candidates.
+
+    Candidates are ranked by: circuit breaker closed and error rate under
+    ROUTER_MAX_ERROR_RATE, then rolling p95 within ROUTER_LATENCY_SLO, then
+    cost, then error rate. The best one is called first; if it has not
+    answered by its own p95 (or the SLO, without data yet) a hedge request
+    goes to the runner-up and the first success wins. Failures fall through
+    to the next candidate.
+    """
+
+    def __init__(self, registry, name: str, candidates: list[tuple[str, str]]):
+        if not candidates:
+            raise ValueError(f"Router {name} has no models configured")
+        self.registry = registry
+        self.name = name
+        self.candidates = candidates
+        self.stats = {self._label(c): ModelStats(self._label(c)) for c in candidates}
+        metrics.gauge(f"router_{name}", self.snapshot)
+
+    @staticmethod
+    def _label(candidate) -> str:
+        return f"{candidate[0]}:{candidate[1]}"
+
+    def ranked(self) -> list:
+        def rank(candidate):
+            label = self._label(candidate)
+            stats = self.stats[label]
+            breaker = self.registry.guard(*candidate).breaker
+            unhealthy = breaker.rejecting() or stats.error_rate > ROUTER_MAX_ERROR_RATE
+            p95 = stats.p95()
+            slow = p95 is not None and p95 > ROUTER_LATENCY_SLO
+            return (unhealthy, slow, MODEL_COSTS.get(label, 0.0), stats.error_rate)
+
+        return sorted(self.candidates, key=rank)
+
+    def snapshot(self) -> dict:
+        return {
+            "order": [self._label(c) for c in self.ranked()],
+            "models": {label: stats.snapshot() for label, stats in self.stats.items()},
+        }
+
+    async def _attempt(self, candidate, make_call, tokens: float, last: bool):
+        label = self._label(candidate)
+        guard = self.registry.guard(*candidate)
+        start = time.perf_counter()
+        try:
+            # Retry in place only when there is nothing left to fall back to
+            result = await guard.call(lambda: make_call(*candidate), tokens=tokens, retries=None if last else 0)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats[label].record(None, ok=False)
+            raise
+        self.stats[label].record(time.perf_counter() - start, ok=True)
+        return result, label
+
+    async def call(self, make_call, tokens: float = 0):
+        """
+        `make_call(provider, model)` returns a fresh coroutine for that model.
+        Returns (result, "provider:model" that produced it).
+        """
+        order = self.ranked()
+        errors = []
+        position = 0
+        running: dict[asyncio.Task, int] = {}
+
+        def launch():
+            nonlocal position
+            candidate = order[position]
+            task = asyncio.create_task(self._attempt(candidate, make_call, tokens, position == len(order) - 1))
+            running[task] = position
+            position += 1
+
+        launch()
+        try:
+            while running:
+                hedge_after = None
+                if ROUTER_HEDGE and position < len(order) and len(running) == 1:
+                    hedge_after = self.stats[self._label(order[position - 1])].p95() or ROUTER_LATENCY_SLO
+                done, _ = await asyncio.wait(running, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    logger.info(f"[Router:{self.name}] Hedging to {self._label(order[position])} after {hedge_after:.2f}s")
+                    metrics.incr("llm_hedges", router=self.name)
+                    launch()
+                    continue
+
+                for task in done:
+                    running.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                    if position < len(order) or running:
+                        logger.warning(f"[Router:{self.name}] {task.exception()!r}; falling back")
+
+                if not running and position < len(order):
+                    metrics.incr("llm_fallbacks", router=self.name)
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise errors[-1]
+
+    async def stream(self, make_stream, tokens: float = 0):
+        """
+        Stream from the best candidate, falling back to the next one if a
+        model fails before producing output. Streams are not hedged.
+        """
+        order = self.ranked()
+        for position, candidate in enumerate(order):
+            label = self._label(candidate)
+            guard = self.registry.guard(*candidate)
+            last = position == len(order) - 1
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in guard.stream(lambda: make_stream(*candidate), tokens=tokens, retries=None if last else 0):
+                    started = True
+                    yield chunk, label
+            except Exception as e:
+                self.stats[label].record(None, ok=False)
+                if started or last:
+                    raise
+                logger.warning(f"[Router:{self.name}] {e!r}; falling back")
+                metrics.incr("llm_fallbacks", router=self.name)
+                continue
+            self.stats[label].record(time.perf_counter() - start, ok=True)
+            return
+
+
+def parse_models(spec: str) -> list[tuple[str, str]]:
+    """'groq:llama-3.1-8b-instant,openai:gpt-4o-mini' -> [(provider, model), ...]"""
+    candidates = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        provider, _, model = item.partition(":")
+        if not model:
+            provider, model = "groq", provider
+        candidates.append((provider.strip().lower(), model.strip()))
+    return candidates
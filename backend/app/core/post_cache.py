@@ -0,0 +1,157 @@
+# post_cache.py
+import os
+import copy
+import json
+import select
+import hashlib
+import logging
+import threading
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.core.cache import LRUCache
+from app.core.metrics import metrics
+from app.db.postgres import engine
+
+logger = logging.getLogger("post_cache")
+
+POST_CACHE_MAX_ENTRIES = int(os.getenv("POST_CACHE_MAX_ENTRIES", 2000))
+POST_CACHE_MAX_BYTES = int(os.getenv("POST_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+# Upper bound on staleness for writes that bypass PostCRUD
+POST_CACHE_TTL = float(os.getenv("POST_CACHE_TTL", 300))
+# "none" keeps invalidation in-process; "postgres" also evicts in every other
+# worker through LISTEN/NOTIFY (needed when running several workers)
+POST_CACHE_INVALIDATION = os.getenv("POST_CACHE_INVALIDATION", "none").lower()
+NOTIFY_CHANNEL = "post_cache"
+_PENDING = "post_cache_pending"
+
+
+def make_etag(*parts: str) -> str:
+    """Strong ETag from a representation (or the values it is derived from)."""
+    digest = hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match / If-Match comparison; "*" matches any existing post."""
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class PostCache:
+    """
+    Read-through cache of full posts keyed by postId, in front of
+    PostCRUD.get_post_by_id. Writers call `invalidate`, which evicts at once
+    and again after the session commits. Readers take a `token` before
+    querying and `set` drops the fill if any eviction happened meanwhile, so
+    a read racing a write cannot leave the old row cached.
+    """
+
+    def __init__(self, invalidation: str = POST_CACHE_INVALIDATION):
+        self.memory = LRUCache(max_entries=POST_CACHE_MAX_ENTRIES, max_bytes=POST_CACHE_MAX_BYTES, ttl=POST_CACHE_TTL)
+        self.notify = invalidation == "postgres"
+        self._listener: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._evictions = 0
+        metrics.gauge("post_cache", self.stats)
+
+    def get(self, post_id: str):
+        """(post, etag) or None; the post is a copy the caller may modify."""
+        item = self.memory.get(post_id)
+        if item is None:
+            metrics.incr("post_cache_requests", outcome="miss")
+            return None
+        post, etag, size = item
+        metrics.incr("post_cache_requests", outcome="hit")
+        metrics.incr("post_cache_bytes_saved", size)
+        return copy.deepcopy(post), etag
+
+    def token(self) -> int:
+        return self._evictions
+
+    def set(self, db: Session, post_id: str, post: dict, token: int) -> str:
+        """
+        Cache a post `db` read after `token()` returned `token`; returns its
+        ETag. Posts the session itself has written are not cached before commit.
+        """
+        raw = json.dumps(post, sort_keys=True, separators=(",", ":"), default=str)
+        etag = make_etag(raw)
+        if token == self._evictions and post_id not in db.info.get(_PENDING, ()):
+            self.memory.set(post_id, (copy.deepcopy(post), etag, len(raw)), size=len(raw))
+        return etag
+
+    def evict(self, post_id: str):
+        self._evictions += 1
+        self.memory.delete(post_id)
+
+    def invalidate(self, db: Session, post_id: str):
+        self.evict(post_id)
+        db.info.setdefault(_PENDING, set()).add(post_id)
+        if self.notify:
+            # Delivered only if the transaction commits
+            db.execute(text("SELECT pg_notify(:channel, :post_id)"), {"channel": NOTIFY_CHANNEL, "post_id": post_id})
+
+    def start_listener(self):
+        if not self.notify or self._listener:
+            return
+        self._stopping.clear()
+        self._listener = threading.Thread(target=self._listen, name="post-cache-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        if self._listener:
+            self._stopping.set()
+            self._listener.join(timeout=5)
+            self._listener = None
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            try:
+                conn = engine.raw_connection()
+                try:
+                    dbapi = conn.dbapi_connection
+                    dbapi.autocommit = True
+                    dbapi.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    # Anything written while we were not listening may be cached
+                    self.clear()
+                    logger.info("[PostCache] Listening for invalidations")
+                    while not self._stopping.is_set():
+                        if select.select([dbapi], [], [], 1.0)[0]:
+                            dbapi.poll()
+                            while dbapi.notifies:
+                                self.evict(dbapi.notifies.pop(0).payload)
+                finally:
+                    conn.invalidate()
+            except Exception as e:
+                logger.warning(f"[PostCache] Invalidation listener failed: {e!r}; retrying")
+                self.clear()
+                self._stopping.wait(5)
+
+    def clear(self):
+        self._evictions += 1
+        self.memory.clear()
+
+    def stats(self) -> dict:
+        hits = metrics.counter("post_cache_requests", outcome="hit")
+        misses = metrics.counter("post_cache_requests", outcome="miss")
+        return {
+            **self.memory.stats(),
+            "hitRatio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "bytesSaved": metrics.counter("post_cache_bytes_saved"),
+            "notModifiedBytesSaved": metrics.counter("post_not_modified_bytes_saved"),
+        }
+
+
+post_cache = PostCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_after_commit(session: Session):
+    for post_id in session.info.pop(_PENDING, ()):
+        post_cache.evict(post_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,57 @@
+# process_pool.py
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import Request
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+DISCONNECT_POLL_SECONDS = 0.5
+
+_pool = None
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs threads and an event loop is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_processes(calls: list, request: Request | None = None) -> list:
+    """
+    Run `(func, *args)` calls on the parse process pool and return their
+    results in order. If `request`'s client disconnects first, calls that
+    have not started are cancelled and ClientDisconnected is raised.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    futures = [loop.run_in_executor(pool, functools.partial(func, *args)) for func, *args in calls]
+
+    try:
+        pending = set(futures)
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=DISCONNECT_POLL_SECONDS)
+            if pending and request is not None and await request.is_disconnected():
+                raise ClientDisconnected()
+        return [f.result() for f in futures]
+    except BaseException:
+        for f in futures:
+            f.cancel()
+        raise
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
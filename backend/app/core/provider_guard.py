@@ -0,0 +1,215 @@
+# provider_guard.py
+import os
+import time
+import random
+import asyncio
+import logging
+from http import HTTPStatus
+import groq
+import httpx
+import openai
+from fastapi import HTTPException
+from app.core.metrics import metrics
+from app.core.rate_limit import get_limiter
+
+logger = logging.getLogger("provider_guard")
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_RETRY_BASE_DELAY = 1.0
+LLM_RETRY_MAX_DELAY = 30.0
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+
+CONNECTION_ERRORS = (
+    groq.APIConnectionError,
+    openai.APIConnectionError,
+    httpx.TransportError,
+    asyncio.TimeoutError,
+)
+
+
+class ProviderUnavailable(HTTPException):
+    """The provider is rate limiting or failing; surfaced to clients as 503."""
+
+    def __init__(self, detail: str, retry_after: float | None = None):
+        headers = {"Retry-After": str(max(1, int(retry_after)))} if retry_after else None
+        super().__init__(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=detail, headers=headers)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive provider failures and rejects calls
+    for `reset_seconds`; then lets one probe through (half-open) and closes
+    again if it succeeds.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> float:
+        """0 if the call may proceed, else seconds until the breaker retries."""
+        if self.state == "open":
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                return remaining
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                return self.reset_seconds
+            self._probing = True
+        return 0.0
+
+    def record_success(self):
+        self.state = "closed"
+        self._consecutive = 0
+        self._probing = False
+
+    def release_probe(self):
+        """The half-open probe ended without an outcome (cancelled, abandoned, ...)."""
+        self._probing = False
+
+    def rejecting(self) -> bool:
+        """True while calls are refused: open, or half-open with its probe in flight."""
+        return self.state == "open" or (self.state == "half_open" and self._probing)
+
+    def record_failure(self):
+        self._consecutive += 1
+        if self.state == "half_open" or self._consecutive >= self.failures:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def _status_code(error: Exception):
+    return getattr(error, "status_code", None)
+
+
+def _retry_after(error: Exception):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _backoff(attempt: int) -> float:
+    return min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)) * (0.5 + random.random())
+
+
+class ProviderGuard:
+    """
+    Wraps calls to one provider/model with its rate limiter, retries
+    (jittered backoff honouring Retry-After) and a per-provider circuit
+    breaker. Rate-limit and outage errors that outlast the retries raise
+    ProviderUnavailable instead of an opaque 500.
+    """
+
+    def __init__(self, provider: str, model: str | None, breaker: CircuitBreaker):
+        self.provider = provider
+        self.model = model
+        self.limiter = get_limiter(provider, model)
+        self.breaker = breaker
+        self.label = f"{provider}:{model}" if model else provider
+
+    def _check_breaker(self) -> bool:
+        """Raise if the breaker refuses the call; True if this call is the half-open probe."""
+        wait = self.breaker.before_call()
+        if wait:
+            metrics.incr("llm_calls", provider=self.label, outcome="circuit_open")
+            raise ProviderUnavailable(f"{self.provider} is temporarily unavailable", retry_after=wait)
+        return self.breaker.state == "half_open"
+
+    def _should_retry(self, error: Exception, attempt: int, retries: int):
+        """Seconds to wait before retrying `error`, or None to give up."""
+        status = _status_code(error)
+        if status == 429:
+            reason = "rate_limited"
+        elif (status is not None and status >= 500) or isinstance(error, CONNECTION_ERRORS):
+            reason = "unavailable"
+            self.breaker.record_failure()
+        else:
+            if status is not None and 400 <= status < 500:
+                # The provider answered; only this request was refused
+                self.breaker.record_success()
+            return None, None
+
+        if attempt >= retries or self.breaker.state == "open":
+            return None, reason
+        metrics.incr("llm_retries", provider=self.label, reason=reason)
+        return _retry_after(error) or _backoff(attempt), reason
+
+    def _give_up(self, error: Exception, reason: str | None):
+        metrics.incr("llm_calls", provider=self.label, outcome=reason or "error")
+        if reason == "rate_limited":
+            raise ProviderUnavailable(f"{self.provider} rate limit exceeded", retry_after=_retry_after(error)) from error
+        if reason == "unavailable":
+            raise ProviderUnavailable(f"{self.provider} is unavailable: {error}", retry_after=BREAKER_RESET_SECONDS) from error
+        raise error
+
+    async def call(self, make_call, tokens: float = 0, retries: int | None = None):
+        """Await `make_call()` (a fresh coroutine per attempt) under the limits."""
+        retries = LLM_MAX_RETRIES if retries is None else retries
+        for attempt in range(retries + 1):
+            probe = self._check_breaker()
+            try:
+                await self.limiter.acquire(tokens)
+                result = await make_call()
+            except Exception as error:
+                delay, reason = self._should_retry(error, attempt, retries)
+                if delay is None:
+                    self._give_up(error, reason)
+                message = str(error)
+            else:
+                self.breaker.record_success()
+                metrics.incr("llm_calls", provider=self.label, outcome="ok")
+                return result
+            finally:
+                # Whatever ended the attempt, a probe must not keep the breaker half-open
+                if probe:
+                    self.breaker.release_probe()
+            logger.warning(f"[{self.label}] {reason} ({message}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def stream(self, make_stream, tokens: float = 0, retries: int | None = None):
+        """
+        Iterate `make_stream()` under the limits. Failures before the first
+        chunk are retried; once output has been yielded, errors propagate.
+        """
+        retries = LLM_MAX_RETRIES if retries is None else retries
+        for attempt in range(retries + 1):
+            probe = self._check_breaker()
+            started = False
+            try:
+                await self.limiter.acquire(tokens)
+                async for chunk in make_stream():
+                    started = True
+                    yield chunk
+            except Exception as error:
+                if started:
+                    self.breaker.record_failure()
+                    raise
+                delay, reason = self._should_retry(error, attempt, retries)
+                if delay is None:
+                    self._give_up(error, reason)
+                message = str(error)
+            else:
+                self.breaker.record_success()
+                metrics.incr("llm_calls", provider=self.label, outcome="ok")
+                return
+            finally:
+                # Also runs when the consumer stops early or is cancelled
+                if probe:
+                    self.breaker.release_probe()
+            logger.warning(f"[{self.label}] {reason} ({message}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
@@ -0,0 +1,148 @@
+# rate_limit.py
+import os
+import re
+import json
+import time
+import fcntl
+import asyncio
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from app.core.executor import run_blocking
+from app.core.metrics import metrics
+
+# "file" shares buckets between worker processes on the host through a
+# locked state file; "memory" keeps them per process
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "file").lower()
+RATE_LIMIT_STATE_DIR = os.getenv(
+    "RATE_LIMIT_STATE_DIR", os.path.join(tempfile.gettempdir(), "agent8-rate-limits")
+)
+MAX_WAIT_STEP = 5.0
+
+
+def _env_limit(provider: str, model: str | None, kind: str, default):
+    """<PROVIDER>_<MODEL>_<KIND>, then <PROVIDER>_<KIND>, e.g. GROQ_LLAMA_3_1_8B_INSTANT_TPM."""
+    names = [f"{provider}_{kind}"]
+    if model:
+        names.insert(0, f"{provider}_{model}_{kind}")
+    for name in names:
+        value = os.getenv(re.sub(r"[^A-Z0-9]+", "_", name.upper()))
+        if value:
+            return float(value)
+    return default
+
+
+class RateLimiter:
+    """
+    Token buckets for one provider/model: requests per minute and, when
+    configured, model tokens per minute. A call waits until both buckets
+    can cover it. Token use is estimated up front and corrected with
+    `settle` once the provider reports actual usage.
+    """
+
+    def __init__(self, key: str, rpm: float, tpm: float | None = None, shared: bool = False):
+        self.key = key
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_capacity = max(1, int(rpm // 10))
+        # A single call may need many tokens, so the token bucket holds a full minute
+        self.token_capacity = tpm
+        self.waiting = 0
+        self._lock = threading.Lock()
+        self._path = Path(RATE_LIMIT_STATE_DIR) / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', key)}.json" if shared else None
+        self._state = self._initial_state()
+
+    def _initial_state(self) -> dict:
+        return {"requests": float(self.request_capacity), "tokens": float(self.token_capacity or 0), "updated": time.time()}
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock:
+            if self._path is None:
+                yield self._state
+                return
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    raw = f.read()
+                    state = json.loads(raw) if raw else self._initial_state()
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, state: dict):
+        now = time.time()
+        elapsed = max(0.0, now - state["updated"])
+        state["requests"] = min(self.request_capacity, state["requests"] + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            state["tokens"] = min(self.token_capacity, state["tokens"] + elapsed * self.tpm / 60.0)
+        state["updated"] = now
+
+    def try_acquire(self, tokens: float = 0) -> float:
+        """Take capacity for one call; returns 0 on success, else seconds to wait."""
+        tokens = min(tokens, self.token_capacity) if self.tpm else 0
+        with self._locked_state() as state:
+            self._refill(state)
+            wait = 0.0
+            if state["requests"] < 1:
+                wait = (1 - state["requests"]) * 60.0 / self.rpm
+            if tokens and state["tokens"] < tokens:
+                wait = max(wait, (tokens - state["tokens"]) * 60.0 / self.tpm)
+            if wait == 0.0:
+                state["requests"] -= 1
+                state["tokens"] -= tokens
+            return wait
+
+    def settle(self, estimated: float, actual: float):
+        """Charge (or refund) the difference between estimated and reported tokens."""
+        if not self.tpm or not actual:
+            return
+        with self._locked_state() as state:
+            self._refill(state)
+            state["tokens"] = min(self.token_capacity, state["tokens"] - (actual - min(estimated, self.token_capacity)))
+
+    async def acquire(self, tokens: float = 0):
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            while (wait := await run_blocking(self.try_acquire, tokens)) > 0:
+                await asyncio.sleep(min(wait, MAX_WAIT_STEP))
+        finally:
+            self.waiting -= 1
+            metrics.observe("rate_limit_wait_seconds", time.perf_counter() - start, limiter=self.key)
+
+    def stats(self) -> dict:
+        return {"waiting": self.waiting, "rpm": self.rpm, "tpm": self.tpm}
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_limiter(provider: str, model: str | None = None) -> RateLimiter:
+    """
+    Limiter for a provider (or one of its models). Rates come from
+    <PROVIDER>[_<MODEL>]_RPM (default 30) and <PROVIDER>[_<MODEL>]_TPM (unset: no token limit).
+    """
+    key = f"{provider}:{model}" if model else provider
+    if key not in _limiters:
+        _limiters[key] = RateLimiter(
+            key,
+            rpm=_env_limit(provider, model, "RPM", 30.0),
+            tpm=_env_limit(provider, model, "TPM", None),
+            shared=RATE_LIMIT_SHARED == "file",
+        )
+    return _limiters[key]
+
+
+def limiter_stats() -> dict:
+    return {key: limiter.stats() for key, limiter in _limiters.items()}
+
+
+metrics.gauge("rate_limiters", limiter_stats)
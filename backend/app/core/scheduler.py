@@ -0,0 +1,63 @@
+# scheduler.py
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone
+from app.core.metrics import metrics
+
+logger = logging.getLogger("scheduler")
+
+
+class PeriodicTask:
+    """
+    Runs `tick()` every `interval` seconds (±10% jitter so replicas drift
+    apart) on the event loop. A failing tick is logged and counted; the loop
+    keeps going.
+    """
+
+    def __init__(self, name: str, tick, interval: float):
+        self.name = name
+        self.tick = tick
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self._last_run = None
+        self._runs = 0
+        self._errors = 0
+
+    async def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._loop(), name=f"{self.name}-scheduler")
+        logger.info(f"[{self.name}] Scheduler started (every {self.interval}s)")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info(f"[{self.name}] Scheduler stopped")
+
+    def stats(self):
+        return {
+            "running": self._task is not None,
+            "runs": self._runs,
+            "errors": self._errors,
+            "lastRunAt": self._last_run,
+        }
+
+    async def _loop(self):
+        while True:
+            start = time.perf_counter()
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._errors += 1
+                logger.exception(f"[{self.name}] Tick failed")
+            self._runs += 1
+            self._last_run = datetime.now(timezone.utc).isoformat()
+            metrics.observe("scheduler_tick_seconds", time.perf_counter() - start, task=self.name)
+            await asyncio.sleep(self.interval * (0.9 + 0.2 * random.random()))
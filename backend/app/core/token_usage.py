@@ -0,0 +1,125 @@
+# token_usage.py
+import os
+import logging
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.core.metrics import metrics
+from app.core.model_router import MODEL_COSTS
+
+logger = logging.getLogger("token_usage")
+
+# Tokenizer used to count tokens before a call; only an approximation for
+# non-OpenAI models, and provider-reported usage replaces it afterwards
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+OUTPUT_TOKEN_BUCKETS = (50, 100, 200, 400, 600, 800, 1000, 1500, 2000, 3000, 4000)
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        # tiktoken downloads the encoding on first use; offline hosts estimate
+        logger.warning(f"Tokenizer unavailable ({e!r}); estimating 4 characters per token")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def cost_usd(model: str, tokens: int) -> float:
+    return tokens / 1000 * MODEL_COSTS.get(model, 0.0)
+
+
+class TokenUsage:
+    """Input/output tokens and cost of the model calls made for one post."""
+
+    def __init__(self):
+        self.calls = []
+
+    def add(self, prompt: str, model: str, input_tokens: int, output_tokens: int,
+            cached_tokens: int = 0, estimated: bool = False):
+        self.calls.append({
+            "prompt": prompt,
+            "model": model,
+            "inputTokens": input_tokens,
+            "outputTokens": output_tokens,
+            "cachedTokens": cached_tokens,
+            "estimated": estimated,
+        })
+
+    def report(self) -> dict:
+        by_prompt = {}
+        for call in self.calls:
+            item = by_prompt.setdefault(call["prompt"], {"inputTokens": 0, "outputTokens": 0, "costUsd": 0.0})
+            item["inputTokens"] += call["inputTokens"]
+            item["outputTokens"] += call["outputTokens"]
+            item["costUsd"] += cost_usd(call["model"], call["inputTokens"] + call["outputTokens"])
+        for item in by_prompt.values():
+            item["costUsd"] = round(item["costUsd"], 6)
+        return {
+            "inputTokens": sum(c["inputTokens"] for c in self.calls),
+            "outputTokens": sum(c["outputTokens"] for c in self.calls),
+            "cachedTokens": sum(c["cachedTokens"] for c in self.calls),
+            "costUsd": round(sum(item["costUsd"] for item in by_prompt.values()), 6),
+            "calls": len(self.calls),
+            "estimated": any(c["estimated"] for c in self.calls),
+            "models": sorted({c["model"] for c in self.calls}),
+            "byPrompt": by_prompt,
+        }
+
+
+_current: ContextVar[TokenUsage | None] = ContextVar("token_usage", default=None)
+
+
+@contextmanager
+def track_usage():
+    """
+    Collect the usage of every model call made inside the block (including
+    tasks it spawns), e.g. `with track_usage() as usage: ...; usage.report()`.
+    """
+    usage = TokenUsage()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def record_usage(prompt: str, model: str, input_tokens: int, output_tokens: int,
+                 cached_tokens: int = 0, estimated: bool = False):
+    metrics.incr("llm_tokens", input_tokens, model=model, kind="input")
+    metrics.incr("llm_tokens", output_tokens, model=model, kind="output")
+    if cached_tokens:
+        metrics.incr("llm_tokens", cached_tokens, model=model, kind="cached")
+    metrics.incr("llm_cost_usd", cost_usd(model, input_tokens + output_tokens), model=model)
+    metrics.observe("llm_output_tokens", output_tokens, buckets=OUTPUT_TOKEN_BUCKETS, prompt=prompt)
+    usage = _current.get()
+    if usage is not None:
+        usage.add(prompt, model, input_tokens, output_tokens, cached_tokens, estimated)
+
+
+def merge_usage(stored: dict | None, report: dict) -> dict:
+    """Add a new report (e.g. from a regeneration) to the one stored on a post."""
+    if not stored:
+        return report
+    merged = dict(report)
+    for field in ("inputTokens", "outputTokens", "cachedTokens", "calls"):
+        merged[field] = stored.get(field, 0) + report.get(field, 0)
+    merged["costUsd"] = round(stored.get("costUsd", 0.0) + report.get("costUsd", 0.0), 6)
+    merged["estimated"] = bool(stored.get("estimated")) or report.get("estimated", False)
+    merged["models"] = sorted(set(stored.get("models", [])) | set(report.get("models", [])))
+    by_prompt = {name: dict(item) for name, item in (stored.get("byPrompt") or {}).items()}
+    for name, item in report.get("byPrompt", {}).items():
+        current = by_prompt.setdefault(name, {"inputTokens": 0, "outputTokens": 0, "costUsd": 0.0})
+        current["inputTokens"] += item["inputTokens"]
+        current["outputTokens"] += item["outputTokens"]
+        current["costUsd"] = round(current["costUsd"] + item["costUsd"], 6)
+    merged["byPrompt"] = by_prompt
+    return merged
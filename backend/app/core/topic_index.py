@@ -0,0 +1,275 @@
+# topic_index.py
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+import functools
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import select
+from app.core.llm_cache import normalise_topic
+from app.core.metrics import metrics
+from app.db.postgres import Post, session_scope
+
+logger = logging.getLogger("topic_index")
+
+TOPIC_INDEX_PATH = os.getenv("TOPIC_INDEX_PATH", "data/topic_index.npz")
+TOPIC_INDEX_DIM = int(os.getenv("TOPIC_INDEX_DIM", 256))
+TOPIC_INDEX_TABLES = int(os.getenv("TOPIC_INDEX_TABLES", 24))
+TOPIC_INDEX_BITS = int(os.getenv("TOPIC_INDEX_BITS", 16))
+TOPIC_INDEX_SYNC_SECONDS = float(os.getenv("TOPIC_INDEX_SYNC_SECONDS", 60))
+TOPIC_SIMILARITY_THRESHOLD = float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", 0.8))
+LSH_SEED = 724022
+# Bump when the features change so stale index files are rebuilt
+FEATURES_VERSION = 1
+CHAR_NGRAM_WEIGHT = 0.3
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "into", "is", "it",
+    "its", "of", "on", "or", "the", "to", "vs", "what", "why", "with", "your",
+}
+
+
+def _stem(word: str) -> str:
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _slot(feature: str):
+    # Stable across processes (unlike hash()), so persisted vectors stay valid
+    digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+    return digest % TOPIC_INDEX_DIM, 1.0 if digest >> 63 else -1.0
+
+
+@functools.lru_cache(maxsize=100_000)
+def _word_features(word: str) -> dict:
+    """Hashed contribution of one word: the word itself plus its character trigrams."""
+    features = {}
+    slot, sign = _slot("w:" + word)
+    features[slot] = sign
+    padded = f"#{word}#"
+    for i in range(len(padded) - 2):
+        slot, sign = _slot("c:" + padded[i:i + 3])
+        features[slot] = features.get(slot, 0.0) + sign * CHAR_NGRAM_WEIGHT
+    return features
+
+
+def embed(topic: str) -> np.ndarray:
+    """
+    Hashed bag-of-words vector (unit length): word unigrams, ignoring order
+    and stopwords, plus down-weighted character trigrams for inflections
+    and typos. Paraphrases that share most content words score high.
+    """
+    totals = {}
+    for word in re.findall(r"[a-z0-9]+", normalise_topic(topic)):
+        if word in STOPWORDS:
+            continue
+        for slot, value in _word_features(_stem(word)).items():
+            totals[slot] = totals.get(slot, 0.0) + value
+    vector = np.zeros(TOPIC_INDEX_DIM, dtype=np.float32)
+    if totals:
+        vector[list(totals)] = list(totals.values())
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class TopicIndex:
+    """
+    In-memory approximate nearest-neighbour index over post topics.
+
+    Vectors from `embed` are bucketed by random-hyperplane LSH
+    (TOPIC_INDEX_TABLES tables of TOPIC_INDEX_BITS bits); a query probes its
+    own bucket and every bucket one bit away in each table, then ranks the
+    candidates by exact cosine similarity. Vectors and post ids are
+    persisted to TOPIC_INDEX_PATH; buckets are rebuilt on load. `sync` picks
+    up posts created since the last sync, including other workers' posts.
+    """
+
+    def __init__(self, path: str = TOPIC_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        rng = np.random.default_rng(LSH_SEED)
+        self.planes = rng.standard_normal((TOPIC_INDEX_TABLES * TOPIC_INDEX_BITS, TOPIC_INDEX_DIM)).astype(np.float32)
+        self._powers = 1 << np.arange(TOPIC_INDEX_BITS, dtype=np.int64)
+        self._reset()
+
+    def _reset(self):
+        self.vectors = np.zeros((1024, TOPIC_INDEX_DIM), dtype=np.float32)
+        self.created = np.zeros(1024, dtype=np.float64)
+        self.ids: list[str] = []
+        self.topics: list[str] = []
+        self.positions: dict[str, int] = {}
+        self.tables = [dict() for _ in range(TOPIC_INDEX_TABLES)]
+        self.synced_until = 0.0
+        self.loaded = False
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _keys(self, vectors: np.ndarray) -> np.ndarray:
+        """LSH bucket per table, shape (n, tables)."""
+        bits = (vectors.astype(np.float32) @ self.planes.T) > 0
+        return bits.reshape(len(vectors), TOPIC_INDEX_TABLES, TOPIC_INDEX_BITS) @ self._powers
+
+    def _append(self, post_id: str, topic: str, vector: np.ndarray, created_at: float):
+        position = len(self.ids)
+        if position == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            self.created = np.concatenate([self.created, np.zeros_like(self.created)])
+        self.vectors[position] = vector
+        self.created[position] = created_at
+        self.ids.append(post_id)
+        self.topics.append(topic)
+        self.positions[post_id] = position
+        return position
+
+    def _bucket(self, positions, keys: np.ndarray):
+        for position, row in zip(positions, keys):
+            for table, key in zip(self.tables, row.tolist()):
+                table.setdefault(key, []).append(position)
+
+    def add(self, post_id: str, topic: str, created_at: float | None = None):
+        vector = embed(topic or "")
+        if not vector.any():
+            return
+        with self._lock:
+            if post_id in self.positions:
+                return
+            position = self._append(post_id, topic, vector, created_at or time.time())
+            self._bucket([position], self._keys(vector[None, :]))
+            self._dirty = True
+
+    def add_many(self, rows):
+        """rows: iterable of (post_id, topic, created_at)."""
+        with self._lock:
+            added = []
+            for post_id, topic, created_at in rows:
+                if post_id in self.positions:
+                    continue
+                vector = embed(topic or "")
+                if vector.any():
+                    added.append(self._append(post_id, topic, vector, created_at))
+            if added:
+                self._bucket(added, self._keys(self.vectors[added]))
+                self._dirty = True
+            return len(added)
+
+    def search(self, topic: str, limit: int = 5, threshold: float = TOPIC_SIMILARITY_THRESHOLD,
+               max_age: float | None = None) -> list[dict]:
+        """Indexed posts whose topic has cosine similarity >= `threshold`, best first."""
+        start = time.perf_counter()
+        query = embed(topic or "")
+        if not query.any():
+            return []
+        keys = self._keys(query[None, :])[0].tolist()
+        flips = [0, *self._powers.tolist()]
+        with self._lock:
+            candidates = set()
+            for table, key in zip(self.tables, keys):
+                for flip in flips:
+                    candidates.update(table.get(key ^ flip, ()))
+            if not candidates:
+                return []
+            positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            if max_age:
+                positions = positions[self.created[positions] >= time.time() - max_age]
+            scores = self.vectors[positions] @ query
+            keep = scores >= threshold
+            positions, scores = positions[keep], scores[keep]
+            best = np.argsort(-scores)[:limit]
+            matches = [
+                {
+                    "postId": self.ids[positions[i]],
+                    "topic": self.topics[positions[i]],
+                    "similarity": round(float(scores[i]), 4),
+                }
+                for i in best
+            ]
+        metrics.observe("topic_index_search_seconds", time.perf_counter() - start)
+        metrics.incr("topic_index_searches", outcome="match" if matches else "miss")
+        return matches
+
+    def load(self):
+        """Load the persisted index; a missing or incompatible file leaves it empty."""
+        try:
+            with np.load(self.path) as data:
+                if int(data["version"]) != FEATURES_VERSION or data["vectors"].shape[1:] != (TOPIC_INDEX_DIM,):
+                    logger.info(f"Topic index at {self.path} is outdated; rebuilding")
+                    return
+                ids, topics = data["ids"].tolist(), data["topics"].tolist()
+                vectors = data["vectors"].astype(np.float32)
+                created = data["created"]
+                synced_until = float(data["synced_until"])
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not load topic index from {self.path}: {e!r}; rebuilding")
+            return
+        with self._lock:
+            self._reset()
+            self.vectors = np.concatenate([vectors, np.zeros((1024, TOPIC_INDEX_DIM), dtype=np.float32)])
+            self.created = np.concatenate([created, np.zeros(1024, dtype=np.float64)])
+            self.ids, self.topics = ids, topics
+            self.positions = {post_id: position for position, post_id in enumerate(ids)}
+            self._bucket(range(len(ids)), self._keys(vectors))
+            self.synced_until = synced_until
+        logger.info(f"Loaded {len(self)} topics from {self.path}")
+
+    def save(self):
+        """Atomically write the index to disk if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            count = len(self.ids)
+            snapshot = {
+                "version": np.int64(FEATURES_VERSION),
+                # float16 halves the file; vectors are unit length so precision is ample
+                "vectors": self.vectors[:count].astype(np.float16),
+                "created": self.created[:count].copy(),
+                "ids": np.array(self.ids, dtype=str),
+                "topics": np.array(self.topics, dtype=str),
+                "synced_until": np.float64(self.synced_until),
+            }
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **snapshot)
+        os.replace(tmp, self.path)
+
+    def sync(self, batch: int = 5000):
+        """Index posts created since the last sync (everything on first run), then persist."""
+        if not self.loaded:
+            self.load()
+            self.loaded = True
+        since = self.synced_until
+        added = 0
+        with session_scope() as db:
+            query = select(Post.postId, Post.topic, Post.createdAt).order_by(Post.createdAt)
+            if since:
+                # Same-timestamp rows are re-read and skipped by id
+                query = query.where(Post.createdAt >= datetime.fromtimestamp(since, timezone.utc))
+            rows = db.execute(query.execution_options(yield_per=batch))
+            for chunk in rows.partitions():
+                added += self.add_many((r.postId, r.topic, r.createdAt.timestamp()) for r in chunk)
+                since = max(since, chunk[-1].createdAt.timestamp())
+        with self._lock:
+            if since != self.synced_until:
+                self.synced_until = since
+                self._dirty = True
+        if added:
+            logger.info(f"Indexed {added} new topics ({len(self)} total)")
+        self.save()
+
+    def stats(self) -> dict:
+        return {"topics": len(self), "loaded": self.loaded, "syncedUntil": self.synced_until}
+
+
+topic_index = TopicIndex()
+metrics.gauge("topic_index", topic_index.stats)
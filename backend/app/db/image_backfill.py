@@ -0,0 +1,85 @@
+"""
+One-off migration: move base64 image payloads embedded in posts.images
+into the image store and keep only references in the row.
+
+    python -m app.db.image_backfill [--batch-size 50] [--dry-run]
+"""
+import argparse
+import base64
+import logging
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import flag_modified
+from app.db.postgres import Post, session_scope
+from app.core.post_cache import post_cache
+from app.utils.image_store import IMAGE_STORE_DIR, LocalImageStore
+
+logger = logging.getLogger("image_backfill")
+logging.basicConfig(level=logging.INFO)
+
+
+def _externalise(store: LocalImageStore | None, image: dict, dry_run: bool = False):
+    b64 = image.get("base64Image")
+    if not b64:
+        return image, False
+    if dry_run:
+        # Only count: a dry run must not decode or write anything
+        return image, True
+    ref = store.put(base64.b64decode(b64), image.get("filename") or "image.png", image.get("mimeType") or "image/png")
+    # Keep existing Drive references; the bytes are already published there
+    for key in ("googleDriveFileId", "googleDriveImageUrl"):
+        if image.get(key):
+            ref[key] = image[key]
+    return ref, True
+
+
+def backfill(batch_size: int = 50, dry_run: bool = False):
+    # Local store only: images that were on Drive must not be re-uploaded.
+    # Not opened for a dry run, which leaves the filesystem alone
+    store = None if dry_run else LocalImageStore(IMAGE_STORE_DIR)
+    last_id = ""
+    scanned = migrated = 0
+
+    while True:
+        with session_scope() as db:
+            posts = (
+                db.query(Post)
+                .options(load_only(Post.postId, Post.images))
+                .filter(Post.postId > last_id, Post.images.isnot(None))
+                .order_by(Post.postId)
+                .limit(batch_size)
+                .all()
+            )
+            if not posts:
+                break
+
+            for post in posts:
+                scanned += 1
+                changed = False
+                new_images = []
+                for image in post.images or []:
+                    ref, moved = _externalise(store, image, dry_run) if isinstance(image, dict) else (image, False)
+                    new_images.append(ref)
+                    changed = changed or moved
+                if changed:
+                    migrated += 1
+                    if not dry_run:
+                        post.images = new_images
+                        flag_modified(post, "images")
+                        post_cache.invalidate(db, post.postId)
+
+            last_id = posts[-1].postId
+            if dry_run:
+                db.rollback()
+
+        logger.info(f"Scanned {scanned} posts, migrated {migrated}")
+
+    logger.info(f"Done: scanned={scanned} migrated={migrated} dry_run={dry_run}")
+    return scanned, migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    backfill(args.batch_size, args.dry_run)
@@ -0,0 +1,94 @@
+import logging
+from sqlalchemy import text
+
+logger = logging.getLogger("db_migrations")
+
+# Ordered, append-only. Each statement must be safe to re-run on a database
+# that was created by `Base.metadata.create_all` from the current models.
+MIGRATIONS = [
+    (
+        "0001_posts_status_created_idx",
+        'CREATE INDEX IF NOT EXISTS ix_posts_status_created '
+        'ON posts (status, "createdAt" DESC, "postId" DESC)',
+    ),
+    (
+        "0002_posts_created_idx",
+        'CREATE INDEX IF NOT EXISTS ix_posts_created '
+        'ON posts ("createdAt" DESC, "postId" DESC)',
+    ),
+    (
+        "0003_calendar_events_schedule",
+        [
+            'ALTER TABLE calendar_events '
+            'ADD COLUMN IF NOT EXISTS "postId" VARCHAR, '
+            'ADD COLUMN IF NOT EXISTS "startAt" TIMESTAMPTZ, '
+            'ADD COLUMN IF NOT EXISTS "runAt" TIMESTAMPTZ, '
+            'ADD COLUMN IF NOT EXISTS "leaseOwner" VARCHAR, '
+            'ADD COLUMN IF NOT EXISTS "leaseUntil" TIMESTAMPTZ, '
+            'ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0, '
+            'ADD COLUMN IF NOT EXISTS "generationError" VARCHAR',
+            'CREATE INDEX IF NOT EXISTS ix_calendar_events_due '
+            'ON calendar_events ("runAt") WHERE "postId" IS NULL',
+        ],
+    ),
+    (
+        "0004_posts_platform_status",
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS "platformStatus" JSON',
+    ),
+    (
+        "0005_posts_usage",
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS usage JSON',
+    ),
+    (
+        "0006_posts_search_vector",
+        [
+            # Rewrites the table once to fill the column for existing posts
+            'ALTER TABLE posts ADD COLUMN IF NOT EXISTS "searchVector" tsvector GENERATED ALWAYS AS ('
+            "setweight(to_tsvector('english', coalesce(topic, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(blog ->> 'title', '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(blog ->> 'content', '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(linkedin ->> 'content', '')), 'C')"
+            ') STORED',
+            'CREATE INDEX IF NOT EXISTS ix_posts_search ON posts USING GIN ("searchVector")',
+        ],
+    ),
+    (
+        "0007_posts_version",
+        [
+            'ALTER TABLE posts ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1',
+            # Statuses were stored as sent by clients ("approved"); transitions use canonical names
+            "UPDATE posts SET status = initcap(status) "
+            "WHERE status IN ('generated', 'approved', 'rejected', 'published')",
+        ],
+    ),
+]
+
+
+MIGRATION_LOCK_ID = 724001
+
+
+def run_migrations(engine):
+    # Advisory lock so replicas starting together apply migrations once
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        conn.commit()
+        try:
+            with conn.begin():
+                conn.execute(text(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "id VARCHAR PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+                ))
+                applied = {row[0] for row in conn.execute(text("SELECT id FROM schema_migrations"))}
+
+            for migration_id, statement in MIGRATIONS:
+                if migration_id in applied:
+                    continue
+                statements = statement if isinstance(statement, (list, tuple)) else [statement]
+                with conn.begin():
+                    for sql in statements:
+                        conn.execute(text(sql))
+                    conn.execute(text("INSERT INTO schema_migrations (id) VALUES (:id)"), {"id": migration_id})
+                logger.info(f"Applied migration {migration_id}")
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            conn.commit()
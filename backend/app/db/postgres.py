@@ -1,12 +1,28 @@
 from dotenv import load_dotenv
 import os
-from sqlalchemy import create_engine, Column, String, JSON, DateTime, func
-from sqlalchemy.orm import declarative_base, sessionmaker
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, Column, Computed, String, JSON, DateTime, Boolean, Integer, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred, sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from app.core.metrics import metrics
+from app.db.migrations import run_migrations
 
 load_dotenv()
 
 Base = declarative_base()
 
+SEARCH_CONFIG = "english"
+# Weighted document for full-text search: topic and blog title rank above
+# blog content, which ranks above LinkedIn content
+POST_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(topic, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(blog ->> 'title', '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(blog ->> 'content', '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(linkedin ->> 'content', '')), 'C')"
+)
+
 class Post(Base):
     __tablename__ = "posts"
     postId = Column(String, primary_key=True)
@@ -15,10 +31,60 @@ class Post(Base):
     linkedin = Column(JSON, nullable=False)
     whatsapp = Column(JSON, nullable=False)
     images = Column(JSON, nullable=True)
-    status = Column(String, default="generated")
+    # {"blog": "Generated" | "Failed" | "NotRequested", ...}
+    platformStatus = Column(JSON, nullable=True)
+    # Tokens and cost of the model calls that produced the drafts
+    usage = Column(JSON, nullable=True)
+    # Maintained by Postgres; deferred so ordinary loads don't fetch it
+    searchVector = deferred(Column(TSVECTOR, Computed(POST_SEARCH_VECTOR, persisted=True)))
+    status = Column(String, default="Generated")
+    # Bumped on every write; clients send it back for optimistic locking
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     createdAt = Column(DateTime(timezone=True), server_default=func.now())
     updatedAt = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    value = Column(JSON, nullable=False)
+    createdAt = Column(DateTime(timezone=True), server_default=func.now())
+    expiresAt = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class CalendarEvent(Base):
+    """Index of calendar events created from uploads, keyed on the normalised row."""
+    __tablename__ = "calendar_events"
+    rowKey = Column(String, primary_key=True)  # hash of normalised topic + start
+    rowHash = Column(String, nullable=False)  # rowKey inputs + imageGenerated
+    eventId = Column(String, nullable=True)  # NULL while the insert is in flight
+    topic = Column(String, nullable=False)
+    startDateTime = Column(String, nullable=False)
+    imageGenerated = Column(Boolean, nullable=False, default=False)
+    uploadId = Column(String, nullable=True, index=True)
+    # Scheduled pre-generation (see CalendarEventCRUD.claim_due)
+    postId = Column(String, nullable=True)
+    startAt = Column(DateTime(timezone=True), nullable=True)
+    runAt = Column(DateTime(timezone=True), nullable=True)
+    leaseOwner = Column(String, nullable=True)
+    leaseUntil = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    generationError = Column(String, nullable=True)
+    createdAt = Column(DateTime(timezone=True), server_default=func.now())
+    updatedAt = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+
+class Upload(Base):
+    __tablename__ = "uploads"
+    uploadId = Column(String, primary_key=True)
+    fileHash = Column(String, nullable=False, index=True)
+    filename = Column(String, nullable=True)
+    fileType = Column(String, nullable=False)
+    rowsReceived = Column(Integer, nullable=False, default=0)
+    summary = Column(JSON, nullable=True)
+    createdAt = Column(DateTime(timezone=True), server_default=func.now())
+
 DB_USER = os.getenv("PG_USER")
 DB_PASSWORD = os.getenv("PG_PASSWORD")
 DB_HOST = os.getenv("PG_HOST")
@@ -27,7 +93,67 @@ DB_NAME = os.getenv("PG_DB")
 
 DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db_pool_wait_seconds", time.perf_counter() - start)
+
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checkedOut": pool.checkedout(),
+        "checkedIn": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "maxOverflow": DB_MAX_OVERFLOW,
+    }
+
+
+metrics.gauge("db_pool", pool_stats)
+
+
+@contextmanager
+def session_scope():
+    """One unit of work: commit on success, roll back on error, always close."""
+    db: Session = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_db():
+    """FastAPI dependency yielding one session per request."""
+    with session_scope() as db:
+        yield db
@@ -1,6 +1,7 @@
 import os
 import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from http import HTTPStatus
@@ -8,16 +9,43 @@ from dotenv import load_dotenv
 from app.api.endpoints import agent
 from app.api.endpoints import auth
 from app.api.endpoints import upload
+from app.api.endpoints import images
+from app.core.executor import run_blocking, shutdown_executor
+from app.core.process_pool import shutdown_process_pool
+from app.core.metrics import metrics
+from app.core.topic_index import topic_index
+from app.core.post_cache import post_cache
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("writer-agent")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    post_cache.start_listener()
+    await agent.generation_queue.start()
+    if agent.SCHEDULER_ENABLED:
+        await agent.generation_scheduler.start()
+    if agent.TOPIC_INDEX_ENABLED:
+        await agent.topic_index_sync.start()
+    yield
+    if agent.TOPIC_INDEX_ENABLED:
+        await agent.topic_index_sync.stop()
+        await run_blocking(topic_index.save)
+    await agent.generation_scheduler.stop()
+    await agent.generation_queue.stop()
+    await run_blocking(post_cache.stop_listener)
+    shutdown_process_pool()
+    shutdown_executor()
+
+
 app = FastAPI(
     title="Agentic Writer API",
     version="1.0.0",
     description="An AI-powered Writer Agent that generates, reviews, and publishes content across platforms using LangChain and LangGraph.",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -32,6 +60,7 @@ API_PREFIX = "/api/v1"
 app.include_router(auth.router, prefix=API_PREFIX, tags=["Auth"])
 app.include_router(agent.router, prefix=API_PREFIX, tags=["Writer Agent"])
 app.include_router(upload.router, prefix=API_PREFIX, tags=["File Upload"])
+app.include_router(images.router, prefix=API_PREFIX, tags=["Images"])
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -41,6 +70,10 @@ async def root():
 async def health():
     return {"status": HTTPStatus.OK, "message": "Service is healthy"}
 
+@app.get("/metrics", tags=["Root"])
+async def get_metrics():
+    return {"status": HTTPStatus.OK, "data": metrics.snapshot()}
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True)
\ No newline at end of file
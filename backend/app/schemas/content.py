@@ -1,10 +1,29 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+
+PLATFORMS = ("blog", "linkedin", "whatsapp")
+Platform = Literal["blog", "linkedin", "whatsapp"]
 
 
 class TopicInput(BaseModel):
     topics: str
     image_generated: Optional[bool] = False
+    # use: read/write the LLM cache, bypass: skip it, refresh: regenerate and overwrite
+    cache: Literal["use", "bypass", "refresh"] = "use"
+    # Only generate these platforms (default: all)
+    platforms: Optional[List[Platform]] = Field(None, min_length=1)
+    # Recent posts with a near-identical topic: offer lists them next to the new
+    # post, reuse returns the best one instead of generating, ignore skips the lookup
+    similar: Literal["offer", "reuse", "ignore"] = "offer"
+
+class RegenerateIn(BaseModel):
+    # Default: every platform whose generation failed
+    platforms: Optional[List[Platform]] = Field(None, min_length=1)
+    cache: Literal["use", "bypass", "refresh"] = "refresh"
+
+class BatchTopicInput(BaseModel):
+    items: List[TopicInput] = Field(..., min_length=1, max_length=500)
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
 
 class DraftsOut(BaseModel):
     postId: str
@@ -15,6 +34,16 @@ class DraftsOut(BaseModel):
 class ApproveIn(BaseModel):
     postId: str
     status: str
+    # Only apply the change if the post is still in this status / at this version
+    expectedStatus: Optional[str] = None
+    version: Optional[int] = None
+
+class BulkStatusIn(BaseModel):
+    postIds: List[str] = Field(..., min_length=1, max_length=500)
+    status: str
+    expectedStatus: Optional[str] = None
+    # postId -> version the client last saw; listed posts only change at that version
+    versions: Optional[Dict[str, int]] = None
 
 class ApproveOut(BaseModel):
     postId: str
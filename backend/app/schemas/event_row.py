@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class EventRow(BaseModel):
@@ -6,3 +7,5 @@ class EventRow(BaseModel):
     imageGenerated: bool
     selectDate: str
     time: str
+    # ISO local start time, filled in by the columnar row parser
+    startDateTime: Optional[str] = None
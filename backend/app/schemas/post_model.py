@@ -1,23 +1,36 @@
 import uuid
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+
+
+def _split_tags(value):
+    # Models sometimes return "a, b, #c" instead of a list
+    if isinstance(value, str):
+        return [t.strip() for t in value.replace("\n", ",").split(",") if t.strip()]
+    return value
 
 
 class BlogContent(BaseModel):
-    title: str
-    content: str
+    title: str = Field(min_length=1)
+    content: str = Field(min_length=1)
+    tags: List[str] = []
     keywords: Optional[str] = None
 
+    _tags = field_validator("tags", mode="before")(_split_tags)
+
 
 class LinkedInContent(BaseModel):
-    title: str
-    content: str
+    title: str = Field(min_length=1)
+    content: str = Field(min_length=1)
+    tags: List[str] = []
     hashtags: Optional[str] = None
 
+    _tags = field_validator("tags", mode="before")(_split_tags)
+
 
 class WhatsAppContent(BaseModel):
-    message: str
+    message: str = Field(min_length=1)
 
 
 class PostModel(BaseModel):
@@ -1,16 +1,40 @@
 from datetime import datetime
-import json
 import os
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
+import base64
+import json
+import time
+import random
+import asyncio
+import logging
+from googleapiclient.errors import HttpError
+from app.core.google_clients import google_clients
+from app.core.executor import run_blocking
+from app.utils.row_parser import make_date_parser, make_time_parser
+
+logger = logging.getLogger("calendar_service")
+
+CALENDAR_ID = os.getenv(
+    "GOOGLE_CALENDAR_ID",
+    "d18d761e4749765908414d4d8e410e24e0c3cc94ab31d230a5a1c67051fcb8a7@group.calendar.google.com",
+)
+EVENT_TIMEZONE = "Asia/Kolkata"
 
-SCOPES = ["https://www.googleapis.com/auth/calendar"]
+# Google caps Calendar batch requests at 50 calls
+CALENDAR_BATCH_SIZE = min(int(os.getenv("CALENDAR_BATCH_SIZE", 50)), 50)
+CALENDAR_BATCH_CONCURRENCY = int(os.getenv("CALENDAR_BATCH_CONCURRENCY", 4))
+MAX_RETRIES = int(os.getenv("CALENDAR_MAX_RETRIES", 5))
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 32.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+GONE_STATUS = {404, 410}
+CONFLICT_STATUS = 409
 
 def get_calendar_service():
-    service_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-    info = json.loads(service_json)
-    creds = Credentials.from_service_account_info(info, scopes=SCOPES)
-    return build("calendar", "v3", credentials=creds)
+    return google_clients.get("calendar")
+
+_parse_date = make_date_parser()
+_parse_time = make_time_parser()
+
 
 def convert_to_google_datetime(date_str, time_str):
     """
@@ -22,38 +46,17 @@ def convert_to_google_datetime(date_str, time_str):
         09:00
         09:00:00
     """
-
-    date_str = date_str.strip()
-    time_str = time_str.strip()
-
-    # Try 24-hour formats
-    formats_24 = ["%H:%M", "%H:%M:%S"]
-    for fmt in formats_24:
-        try:
-            dt = datetime.strptime(f"{date_str} {time_str}", f"%m/%d/%Y {fmt}")
-            return dt.strftime("%Y-%m-%dT%H:%M:%S")
-        except:
-            pass
-
-    # Try 12-hour (AM/PM) formats
-    formats_12 = ["%I:%M %p", "%I:%M:%S %p"]
-    for fmt in formats_12:
-        try:
-            dt = datetime.strptime(f"{date_str} {time_str}", f"%m/%d/%Y {fmt}")
-            return dt.strftime("%Y-%m-%dT%H:%M:%S")
-        except:
-            pass
-
-    raise ValueError(f"Unsupported date/time format: '{date_str} {time_str}'")
-
+    try:
+        dt = datetime.combine(_parse_date(date_str), _parse_time(time_str))
+    except ValueError:
+        raise ValueError(f"Unsupported date/time format: '{date_str} {time_str}'")
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
 
 
-def create_event(row):
-    service = get_calendar_service()
+def build_event_body(row):
+    start_dt = row.startDateTime or convert_to_google_datetime(row.selectDate, row.time)
 
-    start_dt = convert_to_google_datetime(row.selectDate, row.time)
-
-    event_body = {
+    return {
         "summary": row.topic,
         "description": json.dumps({
             "topic": row.topic,
@@ -61,15 +64,203 @@ def create_event(row):
         }),
         "start": {
             "dateTime": start_dt,
-            "timeZone": "Asia/Kolkata"
+            "timeZone": EVENT_TIMEZONE
         },
         "end": {
             "dateTime": start_dt,  # same time (0 min event)
-            "timeZone": "Asia/Kolkata"
+            "timeZone": EVENT_TIMEZONE
         }
     }
 
+
+def event_id(row_key: str) -> str:
+    """
+    Client-supplied event id for a row key (hex digest), in the base32hex
+    alphabet Calendar requires. Re-sending an insert then fails with 409
+    instead of creating a second event.
+    """
+    return base64.b32hexencode(bytes.fromhex(row_key)).decode().rstrip("=").lower()
+
+
+def create_event(row):
+    service = get_calendar_service()
+
     return service.events().insert(
-        calendarId="d18d761e4749765908414d4d8e410e24e0c3cc94ab31d230a5a1c67051fcb8a7@group.calendar.google.com",
-        body=event_body
+        calendarId=CALENDAR_ID,
+        body=build_event_body(row)
     ).execute()
+
+
+def _retry_after(error: HttpError, attempt: int) -> float:
+    header = error.resp.get("retry-after") if error.resp else None
+    if header and str(header).isdigit():
+        return float(header)
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)) * (0.5 + random.random())
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, HttpError):
+        if error.resp.status == 403:
+            # Calendar reports quota exhaustion as 403 rateLimitExceeded
+            return b"ateLimitExceeded" in (error.content or b"")
+        return error.resp.status in RETRYABLE_STATUS
+    # Transport-level failures (timeouts, dropped connections)
+    return isinstance(error, (OSError, TimeoutError))
+
+
+def _execute_batch(pending: dict, make_request) -> dict:
+    """
+    Send `{index: payload}` as Calendar batch requests built by
+    `make_request(service, payload)`. Calls that fail with 429/5xx are retried
+    with jittered backoff (honouring Retry-After).
+    Returns {index: {"eventId"|"error"}}; events that no longer exist are
+    flagged with "gone", and ids that already exist with "exists".
+    """
+    service = get_calendar_service()
+    results = {}
+
+    for attempt in range(MAX_RETRIES + 1):
+        if not pending:
+            break
+
+        retry = {}
+        delay = 0.0
+
+        def callback(request_id, response, exception):
+            nonlocal delay
+            index = int(request_id)
+            if exception is None:
+                results[index] = {"eventId": response.get("id"), "error": None}
+            elif _is_retryable(exception) and attempt < MAX_RETRIES:
+                retry[index] = pending[index]
+                delay = max(delay, _retry_after(exception, attempt))
+            else:
+                results[index] = {"eventId": None, "error": str(exception)}
+                if isinstance(exception, HttpError) and exception.resp.status in GONE_STATUS:
+                    results[index]["gone"] = True
+                if isinstance(exception, HttpError) and exception.resp.status == CONFLICT_STATUS:
+                    results[index]["exists"] = True
+
+        batch = service.new_batch_http_request(callback=callback)
+        for index, payload in pending.items():
+            batch.add(make_request(service, payload), request_id=str(index))
+
+        try:
+            batch.execute()
+        except Exception as e:
+            # The batch request itself failed, though Google may have applied
+            # some calls before the connection dropped; calls must be safe to
+            # re-send (inserts carry their own event id)
+            if not _is_retryable(e) or attempt == MAX_RETRIES:
+                for index in pending:
+                    results.setdefault(index, {"eventId": None, "error": str(e)})
+                break
+            retry = {index: payload for index, payload in pending.items() if index not in results}
+            delay = _retry_after(e, attempt) if isinstance(e, HttpError) else RETRY_BASE_DELAY * (2 ** attempt)
+
+        pending = retry
+        if pending:
+            logger.warning(f"[Calendar] Retrying {len(pending)} event(s) in {delay:.1f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+
+    return results
+
+
+def _bodies(indexed_rows, results: dict) -> dict:
+    bodies = {}
+    for index, row in indexed_rows:
+        try:
+            bodies[index] = build_event_body(row)
+        except ValueError as e:
+            results[index] = {"eventId": None, "error": str(e)}
+    return bodies
+
+
+def create_events_chunk(indexed_rows: list) -> dict:
+    """
+    Insert up to CALENDAR_BATCH_SIZE events for `(row_index, row, row_key)`
+    triples with one batch HTTP request. Each event's id comes from its row
+    key, so a retried insert cannot duplicate it; an id that already exists
+    (an earlier attempt got through, or the event was deleted) is patched
+    with the row's content and confirmed instead.
+    """
+    results = {}
+    ids = {index: event_id(key) for index, _, key in indexed_rows}
+    bodies = _bodies([(index, row) for index, row, _ in indexed_rows], results)
+    pending = {index: {**body, "id": ids[index]} for index, body in bodies.items()}
+    results.update(_execute_batch(
+        pending,
+        lambda service, body: service.events().insert(calendarId=CALENDAR_ID, body=body),
+    ))
+
+    existing = {index: (ids[index], {**bodies[index], "status": "confirmed"})
+                for index, result in results.items() if result.get("exists")}
+    if existing:
+        results.update(_execute_batch(
+            existing,
+            lambda service, payload: service.events().patch(
+                calendarId=CALENDAR_ID, eventId=payload[0], body=payload[1]
+            ),
+        ))
+    return results
+
+
+def update_events_chunk(indexed_rows: list) -> dict:
+    """Patch existing events for `(row_index, row, event_id)` triples in one batch request."""
+    results = {}
+    event_ids = {index: event_id for index, _, event_id in indexed_rows}
+    bodies = _bodies([(index, row) for index, row, _ in indexed_rows], results)
+    pending = {index: (event_ids[index], body) for index, body in bodies.items()}
+    results.update(_execute_batch(
+        pending,
+        lambda service, payload: service.events().patch(
+            calendarId=CALENDAR_ID, eventId=payload[0], body=payload[1]
+        ),
+    ))
+    return results
+
+
+async def _run_batched(items: list, chunk_fn) -> dict:
+    chunks = [items[i:i + CALENDAR_BATCH_SIZE] for i in range(0, len(items), CALENDAR_BATCH_SIZE)]
+    semaphore = asyncio.Semaphore(CALENDAR_BATCH_CONCURRENCY)
+
+    async def run_chunk(chunk):
+        async with semaphore:
+            try:
+                return await run_blocking(chunk_fn, chunk)
+            except Exception as e:
+                logger.exception("[Calendar] Batch failed")
+                return {item[0]: {"eventId": None, "error": str(e)} for item in chunk}
+
+    merged = {}
+    for chunk_result in await asyncio.gather(*(run_chunk(c) for c in chunks)):
+        merged.update(chunk_result)
+    return merged
+
+
+def _report(items: list, merged: dict) -> list:
+    return [
+        {
+            "row": item[0],
+            "slno": getattr(item[1], "slno", None),
+            "topic": getattr(item[1], "topic", None),
+            **merged.get(item[0], {"eventId": None, "error": "not processed"}),
+        }
+        for item in items
+    ]
+
+
+async def create_events_batched(indexed_rows) -> list:
+    """
+    Create calendar events for `(row_index, row, row_key)` triples in batch requests of
+    CALENDAR_BATCH_SIZE, running up to CALENDAR_BATCH_CONCURRENCY batches at
+    once. Returns one report entry per row, in input order.
+    """
+    indexed = list(indexed_rows)
+    return _report(indexed, await _run_batched(indexed, create_events_chunk))
+
+
+async def update_events_batched(indexed_rows) -> list:
+    """Same as create_events_batched for `(row_index, row, event_id)` triples, patching each event."""
+    indexed = list(indexed_rows)
+    return _report(indexed, await _run_batched(indexed, update_events_chunk))
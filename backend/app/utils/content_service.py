@@ -1,30 +1,92 @@
 # services/content_service.py
+import os
+import json
+import asyncio
+import hashlib
 import logging
 from app.core.model_registry import ModelRegistry
+from app.core.llm_cache import llm_cache, cache_key
+from app.core.executor import run_blocking
+from app.schemas.content import PLATFORMS
+from app.core.metrics import metrics
+from app.core.token_usage import count_tokens, record_usage
+from app.utils.structured_output import (
+    OutputParseError, repair_json, validate_draft, record_outcome, parse_rates,
+)
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 
 logger = logging.getLogger("content-service")
 
+CONTENT_MODEL = "llama-3.1-8b-instant"
+# Candidates for the content router, best-effort ordered by preference;
+# e.g. "groq:llama-3.1-8b-instant,groq:llama-3.3-70b-versatile,openai:gpt-4o-mini"
+CONTENT_MODELS = os.getenv("CONTENT_MODELS", f"groq:{CONTENT_MODEL}")
+# max_tokens per platform prompt. The same amount is reserved against the
+# TPM budget before the call and settled from the reported usage afterwards.
+OUTPUT_TOKEN_BUDGETS = {
+    "blog": int(os.getenv("CONTENT_MAX_TOKENS_BLOG", 1200)),
+    "linkedin": int(os.getenv("CONTENT_MAX_TOKENS_LINKEDIN", 500)),
+    "whatsapp": int(os.getenv("CONTENT_MAX_TOKENS_WHATSAPP", 200)),
+}
+OUTPUT_TOKEN_BUDGETS["combined"] = sum(OUTPUT_TOKEN_BUDGETS.values())
+# per_platform: one small prompt per platform, run concurrently.
+# combined: the single all-platform prompt when every platform is requested.
+CONTENT_GENERATION_MODE = os.getenv("CONTENT_GENERATION_MODE", "per_platform").lower()
+# Ask providers that support it for a JSON object response (non-streaming calls)
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "true").lower() in ("1", "true", "yes")
+JSON_MODE_PROVIDERS = ("groq", "openai")
+
+SYSTEM_PROMPT = (
+    "You are a professional AI marketing content creator. "
+    "Your goal is to generate *high-quality, original, and engaging content* for different platforms. "
+    "Each output must follow a strict JSON schema and maintain factual, concise, and audience-appropriate tone. "
+    "Avoid repetition and unnecessary verbosity."
+)
+
+POST_SCHEMA = (
+    "{{\n"
+    "  \"title\": string,\n"
+    "  \"content\": string,\n"
+    "  \"tags\": [string, string, ...]\n"
+    "}}"
+)
+
+# platform -> (what to write, JSON schema)
+PLATFORM_SPECS = {
+    "blog": ("a blog article (educational & SEO-optimized)", POST_SCHEMA),
+    "linkedin": ("a LinkedIn post (professional tone)", POST_SCHEMA),
+    "whatsapp": ("a WhatsApp message (short, conversational tone)", "{{\n  \"message\": string\n}}"),
+}
+
+
+def _word_limit(platform: str) -> int:
+    # Leaves room for the JSON wrapper and tags within the token budget
+    return OUTPUT_TOKEN_BUDGETS[platform] * 3 // 5
+
+# Prompts put everything static in the system message and the topic last, so
+# providers with prompt caching can reuse the prefix across calls.
+
+_DONE = object()
+
 class ContentService:
     def __init__(self, registry: ModelRegistry):
         self.registry = registry
-        self.llm = self.registry.groq("llama-3.1-8b-instant")
+        # Cache entries are shared by every model the router may pick
+        self.model_name = CONTENT_MODELS
+        self.router = self.registry.router("content", CONTENT_MODELS)
+        self.llm = self.registry.chat(*self.router.candidates[0])
         self.parser = JsonOutputParser()
+        self._chains = {}
 
         self.prompt = ChatPromptTemplate.from_messages([
             ("system",
-            "You are a professional AI marketing content creator. "
-            "Your goal is to generate *high-quality, original, and engaging content* for different platforms. "
-            "Each output must follow a strict JSON schema and maintain factual, concise, and audience-appropriate tone. "
-            "Avoid repetition and unnecessary verbosity."
-            ),
-            ("user",
-            "Generate marketing drafts for these topics: {topics}\n\n"
+            f"{SYSTEM_PROMPT}\n\n"
+            "Generate marketing drafts for the topic the user gives you.\n\n"
             "Create three distinct pieces of content for:\n"
-            "1. Blog (educational & SEO-optimized)\n"
-            "2. LinkedIn post (professional tone)\n"
-            "3. WhatsApp message (short, conversational tone)\n\n"
+            f"1. Blog (educational & SEO-optimized), under {_word_limit('blog')} words\n"
+            f"2. LinkedIn post (professional tone), under {_word_limit('linkedin')} words\n"
+            f"3. WhatsApp message (short, conversational tone), under {_word_limit('whatsapp')} words\n\n"
             "Follow this STRICT JSON schema:\n"
             "{{\n"
             "  \"blog\": {{\n"
@@ -43,18 +105,327 @@ class ContentService:
             "}}\n\n"
             "Ensure both blog and LinkedIn outputs always have **title**, **content**, and **tags** keys. "
             "Do not use 'description' or other keys. Return ONLY valid JSON, no markdown or commentary."
-            )
+            ),
+            ("user", "Topic: {topics}"),
         ])
 
-        self.chain = self.prompt | self.llm | self.parser
+        self.platform_prompts = {
+            platform: ChatPromptTemplate.from_messages([
+                ("system",
+                f"{SYSTEM_PROMPT}\n\n"
+                f"Write {description} about the topic the user gives you, under {_word_limit(platform)} words.\n\n"
+                f"Follow this STRICT JSON schema:\n{schema}\n\n"
+                "Do not use 'description' or other keys. Return ONLY valid JSON, no markdown or commentary."
+                ),
+                ("user", "Topic: {topics}"),
+            ])
+            for platform, (description, schema) in PLATFORM_SPECS.items()
+        }
+        # Follow-up asking only for the fields a draft is missing
+        self.reask_prompt = ChatPromptTemplate.from_messages([
+            ("system",
+            f"{SYSTEM_PROMPT}\n\n"
+            "The user sends an incomplete JSON draft and the fields it is missing or has invalid values for. "
+            "Return ONLY a JSON object with exactly those keys, no markdown or commentary."
+            ),
+            ("user",
+            "Draft of {description} about: {topics}\n\n"
+            "{draft}\n\n"
+            "Missing or invalid fields: {fields}"
+            ),
+        ])
+        self.prompts = {"combined": self.prompt, **self.platform_prompts, "reask": self.reask_prompt}
+
+        self.prompt_hashes = {
+            name: hashlib.sha256(json.dumps([m.prompt.template for m in prompt.messages]).encode()).hexdigest()
+            for name, prompt in self.prompts.items()
+        }
+        self.prompt_hash = self.prompt_hashes["combined"]
+        metrics.gauge("llm_output_parse_rates", lambda: parse_rates(["combined", *PLATFORM_SPECS]))
+
+    def cache_key(self, topics: str, platform: str | None = None) -> str:
+        if platform is None:
+            return cache_key(topics, self.prompt_hash, self.model_name, self.llm.temperature)
+        return cache_key(topics, self.prompt_hashes[platform], self.model_name, self.llm.temperature, platform=platform)
+
+    def _chain(self, prompt: str, provider: str, model: str, parsed: bool, max_tokens: int):
+        key = (prompt, provider, model, parsed, max_tokens)
+        if key not in self._chains:
+            llm = self.registry.chat(provider, model).bind(max_tokens=max_tokens)
+            if not parsed and LLM_JSON_MODE and provider in JSON_MODE_PROVIDERS:
+                llm = llm.bind(response_format={"type": "json_object"})
+            chain = self.prompts[prompt] | llm
+            self._chains[key] = chain | self.parser if parsed else chain
+        return self._chains[key]
+
+    def input_tokens(self, prompt: str, variables: dict) -> int:
+        return count_tokens(self.prompts[prompt].format(**variables))
+
+    async def _cached(self, key: str, cache: str):
+        if cache != "use":
+            return None
+        return await run_blocking(llm_cache.get, key)
+
+    async def _complete(self, prompt: str, variables: dict, max_tokens: int | None = None):
+        """One routed, non-streaming completion; returns the raw message and the model used."""
+        max_tokens = max_tokens or OUTPUT_TOKEN_BUDGETS[prompt]
+        input_tokens = self.input_tokens(prompt, variables)
+        estimate = input_tokens + max_tokens
+        message, served_by = await self.router.call(
+            lambda provider, model: self._chain(prompt, provider, model, False, max_tokens).ainvoke(variables),
+            tokens=estimate,
+        )
+        metadata = message.response_metadata or {}
+        if self._truncated(message):
+            metrics.incr("llm_truncated", prompt=prompt)
+            logger.warning(f"[ContentService] {prompt} output hit max_tokens={max_tokens}")
+        await self._record_usage(prompt, served_by, estimate, input_tokens, message.content, metadata.get("token_usage"))
+        return message, served_by
+
+    async def _record_usage(self, prompt: str, served_by: str, estimate: int, input_tokens: int, output: str, reported):
+        """Settle the rate-limit reservation and record usage, counting locally if the provider didn't report it."""
+        reported = reported or {}
+        used_in = reported.get("prompt_tokens") or input_tokens
+        used_out = reported.get("completion_tokens") or count_tokens(output or "")
+        cached = (reported.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        limiter = self.registry.guard(*served_by.split(":", 1)).limiter
+        await run_blocking(limiter.settle, estimate, used_in + used_out)
+        record_usage(prompt, served_by, used_in, used_out, cached, estimated=not reported)
+
+    @staticmethod
+    def _truncated(message) -> bool:
+        return (message.response_metadata or {}).get("finish_reason") == "length"
+
+    async def _invoke(self, prompt: str, topics: str):
+        """Completion for `prompt`, repaired and validated; returns the drafts and the model used."""
+        message, served_by = await self._complete(prompt, {"topics": topics})
+        parsed, repaired = self._parse(message.content, self._truncated(message))
+        checked = self._check(prompt, parsed)
+        missing = {platform: fields for platform, (_, fields) in checked.items() if fields}
+        if missing:
+            answers = await asyncio.gather(
+                *(self._reask(topics, platform, checked[platform][0], fields) for platform, fields in missing.items()),
+                return_exceptions=True,
+            )
+            for platform, answer in zip(missing, answers):
+                checked[platform] = self._merge(platform, checked[platform][0], answer)
+        return self._finish(prompt, checked, missing, repaired), served_by
+
+    @staticmethod
+    def _parse(text, truncated: bool = False):
+        try:
+            # A field cut off at max_tokens comes back missing, so it is
+            # re-asked (or its platform fails) instead of stored half-written
+            return repair_json(text, truncated)
+        except OutputParseError:
+            # Nothing salvageable; every field will be re-asked
+            return {}, True
+
+    @staticmethod
+    def _check(prompt: str, parsed: dict) -> dict:
+        """platform -> validate_draft() result for the drafts `prompt` produces."""
+        drafts = {platform: parsed.get(platform) for platform in PLATFORMS} if prompt == "combined" else {prompt: parsed}
+        return {platform: validate_draft(platform, draft) for platform, draft in drafts.items()}
 
-    def generate_content(self, topics: str):
+    def _reask_input(self, topics: str, platform: str, draft: dict, fields: list) -> dict:
+        return {
+            "description": PLATFORM_SPECS[platform][0],
+            "topics": topics,
+            "draft": json.dumps(draft, ensure_ascii=False),
+            "fields": ", ".join(fields),
+        }
+
+    async def _reask(self, topics: str, platform: str, draft: dict, fields: list) -> dict:
+        logger.info(f"[ContentService] Re-asking {platform} for {', '.join(fields)}: {topics}")
+        variables = self._reask_input(topics, platform, draft, fields)
+        message, _ = await self._complete("reask", variables, OUTPUT_TOKEN_BUDGETS[platform])
+        return repair_json(message.content, self._truncated(message))[0]
+
+    @staticmethod
+    def _merge(platform: str, draft: dict, answer):
+        if isinstance(answer, Exception):
+            logger.warning(f"[ContentService] Re-ask for {platform} failed: {answer!r}")
+            answer = {}
+        return validate_draft(platform, {**draft, **answer})
+
+    @staticmethod
+    def _finish(prompt: str, checked: dict, reasked, repaired: bool):
+        """Record the parse outcome; return the clean drafts or raise if fields are still missing."""
+        missing = {platform: fields for platform, (_, fields) in checked.items() if fields}
+        if missing:
+            record_outcome(prompt, "failed")
+            detail = "; ".join(f"{platform}: {', '.join(fields)}" for platform, fields in missing.items())
+            raise OutputParseError(f"Model output is missing required fields ({detail})")
+        record_outcome(prompt, "reasked" if reasked else "repaired" if repaired else "valid")
+        drafts = {platform: draft for platform, (draft, _) in checked.items()}
+        return drafts if prompt == "combined" else drafts[prompt]
+
+    async def agenerate_content(self, topics: str, cache: str = "use"):
         if not topics.strip():
             raise ValueError("Topic is required")
 
-        logger.info(f"[ContentService] Generating content for: {topics}")
-        result = self.chain.invoke({"topics": topics})
+        key = self.cache_key(topics)
+        cached = await self._cached(key, cache)
+        if cached is not None:
+            logger.info(f"[ContentService] Cache hit for: {topics}")
+            return cached
+
+        logger.info(f"[ContentService] Generating content (async) for: {topics}")
+        parsed, served_by = await self._invoke("combined", topics)
+        result = self._clean(parsed)
+
+        if cache != "bypass":
+            await run_blocking(llm_cache.set, key, result, served_by)
+        return result
+
+    async def agenerate_platform(self, topics: str, platform: str, cache: str = "use") -> dict:
+        """Draft for a single platform from its own prompt."""
+        if not topics.strip():
+            raise ValueError("Topic is required")
+
+        key = self.cache_key(topics, platform)
+        cached = await self._cached(key, cache)
+        if cached is not None:
+            logger.info(f"[ContentService] Cache hit for {platform}: {topics}")
+            return cached
+
+        logger.info(f"[ContentService] Generating {platform} for: {topics}")
+        parsed, served_by = await self._invoke(platform, topics)
+        result = self._clean_platform(platform, parsed)
+
+        if cache != "bypass":
+            await run_blocking(llm_cache.set, key, result, served_by)
+        return result
+
+    async def agenerate_platforms(self, topics: str, platforms=None, cache: str = "use"):
+        """
+        Drafts for `platforms` (default: all), each generated concurrently
+        from its own prompt so a slow or failed piece doesn't hold back or
+        discard the others. Returns (drafts, errors), both keyed by platform;
+        errors holds the exception raised for that platform.
+        """
+        platforms = list(platforms or PLATFORMS)
+        if CONTENT_GENERATION_MODE == "combined" and set(platforms) == set(PLATFORMS):
+            try:
+                return await self.agenerate_content(topics, cache), {}
+            except Exception as e:
+                return {}, {platform: e for platform in platforms}
+
+        results = await asyncio.gather(
+            *(self.agenerate_platform(topics, platform, cache) for platform in platforms),
+            return_exceptions=True,
+        )
+        drafts, errors = {}, {}
+        for platform, result in zip(platforms, results):
+            if isinstance(result, Exception):
+                logger.warning(f"[ContentService] {platform} generation failed for '{topics}': {result!r}")
+                errors[platform] = result
+            else:
+                drafts[platform] = result
+        return drafts, errors
+
+    async def _astream(self, prompt: str, topics: str, cache: str, clean):
+        key = self.cache_key(topics, None if prompt == "combined" else prompt)
+        cached = await self._cached(key, cache)
+        if cached is not None:
+            logger.info(f"[ContentService] Cache hit ({prompt}) for: {topics}")
+            yield cached
+            return
+
+        partial, served_by = {}, None
+        max_tokens = OUTPUT_TOKEN_BUDGETS[prompt]
+        input_tokens = self.input_tokens(prompt, {"topics": topics})
+        stream = self.router.stream(
+            lambda provider, model: self._chain(prompt, provider, model, True, max_tokens).astream({"topics": topics}),
+            tokens=input_tokens + max_tokens,
+        )
+        async for partial, served_by in stream:
+            yield partial
+        if served_by:
+            # Streams don't report usage; count the output locally
+            await self._record_usage(prompt, served_by, input_tokens + max_tokens, input_tokens, json.dumps(partial), None)
+
+        # Partial objects are already parsed; validate the last one and
+        # re-ask for anything the stream left out
+        checked = self._check(prompt, partial if isinstance(partial, dict) else {})
+        missing = {platform: fields for platform, (_, fields) in checked.items() if fields}
+        for platform, fields in missing.items():
+            try:
+                answer = await self._reask(topics, platform, checked[platform][0], fields)
+            except Exception as e:
+                answer = e
+            checked[platform] = self._merge(platform, checked[platform][0], answer)
+        result = clean(self._finish(prompt, checked, missing, repaired=False))
+        if cache != "bypass":
+            await run_blocking(llm_cache.set, key, result, served_by or self.model_name)
+        yield result
+
+    async def astream_content(self, topics: str, cache: str = "use", platforms=None):
+        """
+        Yield progressively more complete draft dicts as tokens arrive
+        (JsonOutputParser emits partial objects while streaming). The last
+        yielded value is the cleaned, final result. In per-platform mode the
+        platform streams run concurrently and are merged; a platform that
+        fails is left out of the result.
+        """
+        if not topics.strip():
+            raise ValueError("Topic is required")
+
+        platforms = list(platforms or PLATFORMS)
+        logger.info(f"[ContentService] Streaming {', '.join(platforms)} for: {topics}")
+        if CONTENT_GENERATION_MODE == "combined" and set(platforms) == set(PLATFORMS):
+            async for partial in self._astream("combined", topics, cache, self._clean):
+                yield partial
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump(platform: str):
+            clean = lambda result: self._clean_platform(platform, result)
+            try:
+                async for partial in self._astream(platform, topics, cache, clean):
+                    await queue.put((platform, partial))
+            except Exception as e:
+                logger.warning(f"[ContentService] {platform} stream failed for '{topics}': {e!r}")
+                await queue.put((platform, e))
+            finally:
+                await queue.put((platform, _DONE))
+
+        tasks = [asyncio.create_task(pump(platform)) for platform in platforms]
+        merged, errors = {}, []
+        remaining = len(tasks)
+        try:
+            while remaining:
+                platform, item = await queue.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    merged.pop(platform, None)
+                    errors.append(item)
+                else:
+                    merged[platform] = item
+                    yield dict(merged)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if not merged:
+            raise errors[0]
+        yield merged
+
+    @staticmethod
+    def _clean_platform(platform: str, item: dict):
+        item = item if isinstance(item, dict) else {}
+        if platform == "whatsapp":
+            item.setdefault("message", "")
+        else:
+            item.setdefault("title", "")
+            item.setdefault("content", "")
+            item.setdefault("tags", [])
+        return item
 
+    @staticmethod
+    def _clean(result: dict):
         # ensure clean output
         for key in ["blog", "linkedin"]:
             item = result.get(key, {})
@@ -63,4 +434,4 @@ class ContentService:
             item.setdefault("tags", [])
             result[key] = item
 
-        return result
\ No newline at end of file
+        return result
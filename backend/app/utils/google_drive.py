@@ -1,36 +1,33 @@
+import io
 import os
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google.oauth2.credentials import Credentials
+from googleapiclient.http import MediaIoBaseUpload
 from dotenv import load_dotenv
+from app.core.google_clients import google_clients
 
 load_dotenv()
 
-def upload_file_to_drive(local_path: str, filename: str):
+
+def get_drive_service():
+    return google_clients.get("drive")
+
+
+def upload_bytes_to_drive(data: bytes, filename: str, mime_type: str = "image/png"):
     """
-    Uploads a file to a specific Google Drive folder.
+    Uploads in-memory bytes to a specific Google Drive folder.
     Returns: (file_id, public_url)
     """
     DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
     if not DRIVE_FOLDER_ID:
         raise ValueError("GOOGLE_DRIVE_FOLDER_ID is not set in environment")
 
-    creds = Credentials(
-        token=os.getenv("GOOGLE_DRIVE_ACCESS_TOKEN"),
-        refresh_token=os.getenv("GOOGLE_DRIVE_REFRESH_TOKEN"),
-        client_id=os.getenv("GOOGLE_CLIENT_ID"),
-        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-        token_uri="https://oauth2.googleapis.com/token",
-    )
-
-    service = build("drive", "v3", credentials=creds)
+    service = get_drive_service()
 
     file_metadata = {
         "name": filename,
         "parents": [DRIVE_FOLDER_ID],
     }
 
-    media = MediaFileUpload(local_path, mimetype="image/png")
+    media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mime_type)
 
     file = (
         service.files()
@@ -55,4 +52,13 @@ def upload_file_to_drive(local_path: str, filename: str):
     # Public direct-view URL
     public_url = f"https://drive.google.com/uc?id={file_id}"
 
-    return file_id, public_url
\ No newline at end of file
+    return file_id, public_url
+
+
+def upload_file_to_drive(local_path: str, filename: str):
+    """
+    Uploads a file to a specific Google Drive folder.
+    Returns: (file_id, public_url)
+    """
+    with open(local_path, "rb") as f:
+        return upload_bytes_to_drive(f.read(), filename)
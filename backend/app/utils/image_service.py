@@ -1,53 +1,81 @@
 # image_service.py
+import os
+import time
 import uuid
 import base64
-import tempfile
+import asyncio
+import logging
 from fastapi import HTTPException
-from app.utils.google_drive import upload_file_to_drive
+from app.utils.image_store import get_image_store
 from app.core.model_registry import ModelRegistry
+from app.core.executor import run_blocking
+from app.core.metrics import metrics
+
+logger = logging.getLogger("image-service")
+
+IMAGE_MODEL = "dall-e-3"
+IMAGE_SIZE = "1024x1024"
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", 4))
+
 
 class ImageService:
 
     def __init__(self, registry: ModelRegistry):
         self.registry = registry
+        self._semaphore = asyncio.Semaphore(IMAGE_CONCURRENCY)
 
-    def generate_images(self, topic: str, count: int) -> list:
+    async def agenerate_images(self, topic: str, count: int) -> list:
+        """
+        Render `count` images concurrently (bounded by IMAGE_CONCURRENCY across
+        all callers). Each image is stored as soon as it is rendered, so
+        uploads overlap with the remaining generations. Order is preserved.
+        """
         if not topic.strip():
             raise HTTPException(status_code=400, detail="Topic is required")
 
-        client = self.registry.openai()
-        safe_topic = "".join(c if c.isalnum() else "_" for c in topic)
-
-        result = []
-
-        for i in range(count):
-            try:
-                img = client.images.generate(
-                    model="dall-e-3",
-                    prompt=f"Create modern social banner for: {topic}",
-                    size="1024x1024",
-                    response_format="b64_json",
-                )
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"DALL·E error: {e}")
-            image_bytes = base64.b64decode(img.data[0].b64_json)
+        client = self.registry.openai_async()
+        guard = self.registry.guard("openai", IMAGE_MODEL)
+        safe_topic = self._safe_topic(topic)
+
+        async def render_and_store(i: int):
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    img = await guard.call(lambda: client.images.generate(
+                        model=IMAGE_MODEL,
+                        prompt=f"Create modern social banner for: {topic}",
+                        size=IMAGE_SIZE,
+                        response_format="b64_json",
+                    ))
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    raise HTTPException(status_code=500, detail=f"DALL·E error: {e}")
+                metrics.observe("image_stage_seconds", time.perf_counter() - start, stage="generate")
+
+            # Storage/upload happens outside the semaphore so the next render can start
             filename = f"{safe_topic}_{uuid.uuid4().hex}_{i+1}.png"
-            try:
-                with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                    tmp.write(image_bytes)
-                    tmp_path = tmp.name
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Temp file error: {e}")
-            try:
-                file_id, gd_url = upload_file_to_drive(tmp_path, filename)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Drive upload error: {e}")
-            result.append({
-                "googleDriveImageUrl": gd_url,
-                "googleDriveFileId": file_id,
-                "base64Image": img.data[0].b64_json,
-                "mimeType": "image/png", 
-                "filename": filename
-            })
-
-        return result
\ No newline at end of file
+            return await run_blocking(self._store_image, img.data[0].b64_json, filename)
+
+        start = time.perf_counter()
+        result = await asyncio.gather(*(render_and_store(i) for i in range(count)))
+        logger.info(f"[ImageService] {count} image(s) ready in {time.perf_counter() - start:.2f}s")
+        return list(result)
+
+    @staticmethod
+    def _safe_topic(topic: str) -> str:
+        return "".join(c if c.isalnum() else "_" for c in topic)
+
+    @staticmethod
+    def _store_image(b64_json: str, filename: str) -> dict:
+        start = time.perf_counter()
+        image_bytes = base64.b64decode(b64_json)
+        metrics.observe("image_stage_seconds", time.perf_counter() - start, stage="decode")
+        start = time.perf_counter()
+        try:
+            # Only the reference is returned; bytes live in the image store
+            ref = get_image_store().put(image_bytes, filename, "image/png")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Image store error: {e}")
+        metrics.observe("image_stage_seconds", time.perf_counter() - start, stage="store")
+        return ref
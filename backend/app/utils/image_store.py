@@ -0,0 +1,91 @@
+# image_store.py
+import os
+import re
+import hashlib
+import logging
+import mimetypes
+import time
+import tempfile
+from pathlib import Path
+from app.core.metrics import metrics
+from app.utils.google_drive import upload_bytes_to_drive
+
+logger = logging.getLogger("image_store")
+
+IMAGE_ID_RE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{1,8}$")
+
+
+class LocalImageStore:
+    """
+    Content-addressed image store on the local filesystem.
+    Images are keyed by sha256 of their bytes, so identical renders are
+    stored once and a stored object never changes (safe to cache forever).
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def put(self, data: bytes, filename: str, mime_type: str = "image/png") -> dict:
+        digest = hashlib.sha256(data).hexdigest()
+        ext = (mimetypes.guess_extension(mime_type) or ".bin").lstrip(".")
+        image_id = f"{digest}.{ext}"
+        path = self._path(image_id)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial file
+            with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+                tmp.write(data)
+                tmp_path = tmp.name
+            os.replace(tmp_path, path)
+
+        return {
+            "imageId": image_id,
+            "url": f"/api/v1/images/{image_id}",
+            "mimeType": mime_type,
+            "filename": filename,
+            "size": len(data),
+        }
+
+    def path(self, image_id: str):
+        if not IMAGE_ID_RE.match(image_id):
+            return None
+        path = self._path(image_id)
+        return path if path.is_file() else None
+
+    def _path(self, image_id: str) -> Path:
+        return self.root / image_id[:2] / image_id
+
+
+class DriveImageStore(LocalImageStore):
+    """Local content-addressed store that also publishes each image to Google Drive."""
+
+    def put(self, data: bytes, filename: str, mime_type: str = "image/png") -> dict:
+        ref = super().put(data, filename, mime_type)
+        start = time.perf_counter()
+        file_id, gd_url = upload_bytes_to_drive(data, filename, mime_type)
+        metrics.observe("image_stage_seconds", time.perf_counter() - start, stage="drive_upload")
+        ref["googleDriveFileId"] = file_id
+        ref["googleDriveImageUrl"] = gd_url
+        return ref
+
+
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "public/image_store")
+
+_store = None
+
+
+def get_image_store() -> LocalImageStore:
+    global _store
+    if _store is None:
+        default_backend = "drive" if os.getenv("GOOGLE_DRIVE_FOLDER_ID") else "local"
+        backend = os.getenv("IMAGE_STORE_BACKEND", default_backend).lower()
+        if backend == "drive":
+            _store = DriveImageStore(IMAGE_STORE_DIR)
+        elif backend == "local":
+            _store = LocalImageStore(IMAGE_STORE_DIR)
+        else:
+            raise RuntimeError(f"Unknown IMAGE_STORE_BACKEND '{backend}' (expected local or drive)")
+        logger.info(f"Image store initialised (backend={backend}, dir={IMAGE_STORE_DIR})")
+    return _store
@@ -1,31 +1,43 @@
-from app.schemas.event_row import EventRow
+import time
 import pdfplumber
+from pdfminer.psparser import PSException
+from app.utils.row_parser import parse_rows_strict
+
 
 def parse_pdf(file_path):
     results = []
+    tables, _ = extract_pdf_tables(file_path, 0, None)
+    for table in tables:
+        results.extend(parse_rows_strict(table[0], table[1:]))
+    return results
 
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            table = page.extract_table()
-            if not table:
-                continue
-
-            # Normalize header (lowercase only)
-            header = [h.lower() for h in table[0]]
-
-            for row in table[1:]:
-                data = dict(zip(header, row))
 
-                # Convert TRUE/FALSE to boolean
-                img_gen_value = str(data["imagegenerate"]).strip().lower()
-                is_image_generated = img_gen_value in ["true", "1", "yes"]
+def count_pdf_pages(file_path) -> int:
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+    except PSException as e:
+        # pdfminer's parse errors (PDFSyntaxError, ...): a 400, not an opaque pool error
+        raise ValueError(f"not a readable PDF ({type(e).__name__})") from None
 
-                results.append(EventRow(
-                    slno=int(data["slno"]),
-                    topic=str(data["topic"]),
-                    imageGenerated=is_image_generated,
-                    selectDate=str(data["selectdate"]),
-                    time=str(data["time"])
-                ))
 
-    return results
\ No newline at end of file
+def extract_pdf_tables(file_path, first: int, last: int | None):
+    """
+    Extract the table on pages [first, last) of a PDF. Runs in a worker
+    process, so it takes a path and returns plain data:
+    (tables as lists of rows, seconds per page).
+    """
+    tables, page_seconds = [], []
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages[first:last]:
+                start = time.perf_counter()
+                table = page.extract_table()
+                # Release parsed page objects before moving on
+                page.close()
+                if table:
+                    tables.append(table)
+                page_seconds.append(time.perf_counter() - start)
+    except PSException as e:
+        raise ValueError(f"not a readable PDF ({type(e).__name__})") from None
+    return tables, page_seconds
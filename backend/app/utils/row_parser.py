@@ -0,0 +1,239 @@
+"""
+Columnar parsing for schedule rows shared by the CSV, XLSX and PDF readers.
+
+Readers only produce a header and raw row values. This module maps the
+header once, splits rows into columns, coerces each column in bulk
+(memoising distinct values, so repeated dates/times parse once), validates
+everything with a single EventRow adapter, and returns all bad rows
+together instead of stopping at the first.
+"""
+import re
+from datetime import date, datetime, time as dtime
+from pydantic import TypeAdapter, ValidationError
+from app.schemas.event_row import EventRow
+
+HEADER_ALIASES = {
+    "slno": "slno",
+    "sno": "slno",
+    "serialno": "slno",
+    "topic": "topic",
+    "imagegenerated": "imageGenerated",
+    "imagegenerate": "imageGenerated",
+    "selectdate": "selectDate",
+    "date": "selectDate",
+    "time": "time",
+}
+REQUIRED_COLUMNS = ("slno", "topic", "imageGenerated", "selectDate", "time")
+
+TRUE_VALUES = {"true", "1", "yes", "y"}
+FALSE_VALUES = {"false", "0", "no", "n", "", "none"}
+
+DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M:%S %p")
+
+_event_rows = TypeAdapter(list[EventRow])
+_HASHABLE = {str, int, float, bool, type(None)}
+
+
+class RowParseError(ValueError):
+    """Raised when a file cannot be parsed at all (e.g. missing columns)."""
+
+
+def normalise_header(header) -> list:
+    return [
+        HEADER_ALIASES.get(re.sub(r"[^a-z0-9]", "", str(h or "").lower()))
+        for h in header
+    ]
+
+
+def to_columns(header, rows) -> dict:
+    names = normalise_header(header)
+    missing = [c for c in REQUIRED_COLUMNS if c not in names]
+    if missing:
+        raise RowParseError(f"Missing column(s): {', '.join(missing)} (found: {', '.join(map(str, header))})")
+
+    positions = {name: names.index(name) for name in REQUIRED_COLUMNS}
+    return {
+        name: [row[pos] if pos < len(row) else None for row in rows]
+        for name, pos in positions.items()
+    }
+
+
+class _ColumnParser:
+    """Parses a column of date/time strings, detecting the format once per column."""
+
+    def __init__(self, formats):
+        self.formats = formats
+        self.detected = None
+        self.memo = {}
+
+    def __call__(self, value):
+        if value in self.memo:
+            return self.memo[value]
+        parsed = self._parse(value)
+        self.memo[value] = parsed
+        return parsed
+
+    def _parse(self, value):
+        text = str(value).strip()
+        if self.detected:
+            try:
+                return datetime.strptime(text, self.detected)
+            except ValueError:
+                pass
+        for fmt in self.formats:
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            self.detected = fmt
+            return parsed
+        raise ValueError(f"unsupported format '{text}'")
+
+
+def coerce_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower() if value is not None else ""
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"not a boolean: '{value}'")
+
+
+def make_date_parser():
+    parse = _ColumnParser(DATE_FORMATS)
+
+    def parse_date(value) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return parse(value).date()
+
+    return parse_date
+
+
+def make_time_parser():
+    parse = _ColumnParser(TIME_FORMATS)
+
+    def parse_time(value) -> dtime:
+        if isinstance(value, datetime):
+            return value.time()
+        if isinstance(value, dtime):
+            return value
+        return parse(value).time()
+
+    return parse_time
+
+
+def _coerce_column(values, convert, field, errors):
+    """Apply `convert` to a column, converting each distinct value once."""
+    out = []
+    memo = {}
+    for i, value in enumerate(values):
+        key = value if type(value) in _HASHABLE else repr(value)
+        try:
+            out.append(memo[key])
+            continue
+        except KeyError:
+            pass
+        try:
+            memo[key] = converted = convert(value)
+        except (TypeError, ValueError) as e:
+            errors.setdefault(i, []).append({"field": field, "error": str(e)})
+            converted = None
+        out.append(converted)
+    return out
+
+
+def _to_int(value) -> int:
+    if type(value) is str:
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+    return int(float(str(value).strip()))
+
+
+def _require_text(value) -> str:
+    text = _as_text(value)
+    if not text:
+        raise ValueError("must not be empty")
+    return text
+
+
+def _as_text(value):
+    if type(value) is str:
+        return value.strip()
+    if isinstance(value, datetime):
+        return value.strftime("%m/%d/%Y") if value.time() == dtime() else value.isoformat()
+    if isinstance(value, date):
+        return value.strftime("%m/%d/%Y")
+    if isinstance(value, dtime):
+        return value.strftime("%H:%M:%S")
+    return "" if value is None else str(value).strip()
+
+
+def parse_rows(header, rows, offset: int = 0):
+    """
+    Parse raw rows into validated EventRows.
+    Returns (valid, invalid): valid is [(row_index, EventRow)], invalid is
+    [{"row": row_index, "errors": [{"field", "error"}]}]; row_index counts
+    from `offset`.
+    """
+    # Blank rows (common at the end of sheets) are skipped, not reported
+    positions = [i for i, row in enumerate(rows) if row and any(v not in (None, "") for v in row)]
+    rows = [rows[i] for i in positions]
+    columns = to_columns(header, rows)
+    errors: dict[int, list] = {}
+
+    slno = _coerce_column(columns["slno"], _to_int, "slno", errors)
+    topics = _coerce_column(columns["topic"], _require_text, "topic", errors)
+    image_generated = _coerce_column(columns["imageGenerated"], coerce_bool, "imageGenerated", errors)
+    dates = _coerce_column(columns["selectDate"], make_date_parser(), "selectDate", errors)
+    times = _coerce_column(columns["time"], make_time_parser(), "time", errors)
+    date_text = _coerce_column(columns["selectDate"], _as_text, "selectDate", errors)
+    time_text = _coerce_column(columns["time"], _as_text, "time", errors)
+
+    starts = {}
+    candidates = []
+    for i in range(len(rows)):
+        if i in errors:
+            continue
+        when = (dates[i], times[i])
+        start = starts.get(when)
+        if start is None:
+            start = starts[when] = datetime.combine(*when).strftime("%Y-%m-%dT%H:%M:%S")
+        candidates.append((i, {
+            "slno": slno[i],
+            "topic": topics[i],
+            "imageGenerated": image_generated[i],
+            "selectDate": date_text[i],
+            "time": time_text[i],
+            "startDateTime": start,
+        }))
+
+    try:
+        validated = _event_rows.validate_python([record for _, record in candidates])
+    except ValidationError as e:
+        bad = set()
+        for err in e.errors():
+            position = err["loc"][0]
+            i = candidates[position][0]
+            bad.add(position)
+            errors.setdefault(i, []).append({"field": ".".join(map(str, err["loc"][1:])), "error": err["msg"]})
+        candidates = [c for pos, c in enumerate(candidates) if pos not in bad]
+        validated = _event_rows.validate_python([record for _, record in candidates])
+
+    valid = [(offset + positions[i], row) for (i, _), row in zip(candidates, validated)]
+    invalid = [{"row": offset + positions[i], "errors": errs} for i, errs in sorted(errors.items())]
+    return valid, invalid
+
+
+def parse_rows_strict(header, rows) -> list:
+    """List of EventRows, or RowParseError listing every bad row."""
+    valid, invalid = parse_rows(header, rows)
+    if invalid:
+        raise RowParseError(f"{len(invalid)} invalid row(s): {invalid}")
+    return [row for _, row in valid]
@@ -1,6 +1,12 @@
+import io
+import time
+import pickle
+import zipfile
 import openpyxl
 import csv
-from app.schemas.event_row import EventRow
+from openpyxl.utils.exceptions import InvalidFileException
+from app.utils.row_parser import parse_rows_strict
+
 
 def parse_sheet(file_path):
     ext = file_path.split(".")[-1].lower()
@@ -8,35 +14,104 @@ def parse_sheet(file_path):
     if ext == "csv":
         return parse_csv(file_path)
 
-    wb = openpyxl.load_workbook(file_path)
-    ws = wb.active
+    header, rows, _ = read_xlsx_file(file_path)
+    return parse_rows_strict(header, rows)
+
 
-    header = [str(cell.value).strip() for cell in ws[1]]
-    results = []
+def parse_csv(file_path):
+    rows = []
+    header = []
+    with open(file_path, "rb") as f:
+        for header, chunk in iter_csv_chunks(f, 10_000):
+            rows.extend(chunk)
+    return parse_rows_strict(header, rows)
 
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        data = dict(zip(header, row))
 
-        results.append(EventRow(
-            slno=int(data["slno"]),
-            topic=data["topic"],
-            imageGenerated=str(data["imageGenerated"]).lower() == "true",
-            selectDate=str(data["selectDate"]),
-            time=str(data["time"])
-        ))
-    return results
+# What openpyxl raises for files that are not (valid) XLSX workbooks
+XLSX_ERRORS = (zipfile.BadZipFile, InvalidFileException, KeyError)
 
 
-def parse_csv(file_path):
-    results = []
-    with open(file_path, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for data in reader:
-            results.append(EventRow(
-                slno=int(data["slno"]),
-                topic=data["topic"],
-                imageGenerated=str(data["imageGenerated"]).lower() == "true",
-                selectDate=str(data["selectDate"]),
-                time=str(data["time"])
-            ))
-    return results
\ No newline at end of file
+def read_xlsx_file(file_path):
+    """Worker-process entry point: (header, raw rows, read seconds)."""
+    start = time.perf_counter()
+    with open(file_path, "rb") as f:
+        header, rows = read_xlsx(f)
+    return header, rows, time.perf_counter() - start
+
+
+def spool_xlsx_rows(file_path, spool_path):
+    """
+    Worker-process entry point: stream the active sheet's rows into
+    `spool_path` as consecutive pickles, one row at a time, so neither
+    process holds the whole sheet. Returns (header, row count, read seconds).
+    """
+    start = time.perf_counter()
+    count = 0
+    with open(file_path, "rb") as f, open(spool_path, "wb") as out:
+        try:
+            wb = openpyxl.load_workbook(f, read_only=True, data_only=True)
+            try:
+                rows = wb.active.iter_rows(values_only=True)
+                header = [str(value).strip() for value in next(rows, [])]
+                for row in rows:
+                    pickle.dump(list(row), out, protocol=pickle.HIGHEST_PROTOCOL)
+                    count += 1
+            finally:
+                wb.close()
+        except XLSX_ERRORS as e:
+            # Reaches the request as a 400 instead of an opaque pool error
+            raise _invalid_xlsx(e)
+    return header, count, time.perf_counter() - start
+
+
+def iter_spooled_chunks(spool_path, header: list, chunk_rows: int):
+    """Yield (header, raw rows) chunks from a spool written by spool_xlsx_rows."""
+    with open(spool_path, "rb") as f:
+        chunk = []
+        while True:
+            try:
+                chunk.append(pickle.load(f))
+            except EOFError:
+                break
+            if len(chunk) >= chunk_rows:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+
+
+def read_xlsx(stream):
+    """Header and raw row values from the active sheet, read in read-only mode."""
+    try:
+        wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [str(value).strip() for value in next(rows, [])]
+            return header, [list(row) for row in rows]
+        finally:
+            wb.close()
+    except XLSX_ERRORS as e:
+        raise _invalid_xlsx(e)
+
+
+def _invalid_xlsx(error: Exception) -> ValueError:
+    return ValueError(f"not a readable XLSX workbook ({type(error).__name__})")
+
+
+def iter_csv_chunks(stream, chunk_rows: int):
+    """Yield (header, raw rows) chunks from a binary CSV stream without reading it all."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, [])
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+    finally:
+        # Don't close the caller's stream along with the wrapper
+        text.detach()
@@ -0,0 +1,192 @@
+# structured_output.py
+"""
+Parsing, local repair and validation of model JSON output.
+
+Completions are parsed strictly first; malformed text is repaired locally
+(code fences, prose around the object, trailing commas, smart quotes used
+as delimiters, truncated output) before anyone pays for another completion. Parsed drafts
+are validated against the post_model schemas, and `validate_draft` reports
+which fields are still missing so only those need to be asked for again.
+"""
+import re
+import json
+import logging
+from http import HTTPStatus
+from fastapi import HTTPException
+from pydantic import ValidationError
+from langchain_core.utils.json import parse_partial_json
+from app.core.metrics import metrics
+from app.schemas.post_model import BlogContent, LinkedInContent, WhatsAppContent
+
+logger = logging.getLogger("structured_output")
+
+PLATFORM_MODELS = {
+    "blog": BlogContent,
+    "linkedin": LinkedInContent,
+    "whatsapp": WhatsAppContent,
+}
+
+# Keys models use despite the prompt, mapped to the schema's names
+FIELD_ALIASES = {
+    "description": "content",
+    "body": "content",
+    "text": "content",
+    "headline": "title",
+    "hashtags": "tags",
+    "keywords": "tags",
+}
+WHATSAPP_ALIASES = {"content": "message", "text": "message", "body": "message"}
+
+PARSE_OUTCOMES = ("valid", "repaired", "reasked", "failed")
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+# Smart double quotes next to JSON punctuation are delimiters; ones inside
+# prose ("it’s", “quoted”) are content and must be left alone
+_SMART_DELIMITER_RE = re.compile(r'(?<=[{\[,:])(\s*)[“”]|[“”](?=\s*[:,}\]])')
+
+
+class OutputParseError(HTTPException):
+    """The model's output could not be turned into a valid draft; surfaced as 502."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=HTTPStatus.BAD_GATEWAY, detail=detail)
+
+
+def repair_json(text: str, truncated: bool = False):
+    """
+    Parse `text` as a JSON object, repairing it locally if needed.
+    `truncated` (the completion stopped at max_tokens) parses up to the cut
+    and drops the value that was cut off, so it reads as missing rather
+    than complete. Returns (obj, repaired). Raises OutputParseError if
+    nothing works.
+    """
+    try:
+        obj = json.loads(text)
+        if isinstance(obj, dict):
+            return obj, False
+    except (TypeError, ValueError):
+        pass
+
+    if truncated:
+        try:
+            obj = parse_partial_json((text or "")[(text or "").find("{"):])
+        except (TypeError, ValueError):
+            obj = None
+        if isinstance(obj, dict):
+            cut = drop_truncated_field(obj)
+            if cut:
+                logger.warning(f"Dropped field cut off at max_tokens: {'.'.join(map(str, cut))}")
+            return obj, True
+
+    candidate = text or ""
+    fenced = _FENCE_RE.search(candidate)
+    if fenced:
+        candidate = fenced.group(1)
+    start = candidate.find("{")
+    if start == -1:
+        raise OutputParseError("No JSON object in model output")
+    end = candidate.rfind("}")
+    candidate = candidate[start:end + 1] if end > start else candidate[start:]
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    candidates = [candidate]
+    # Only when the text does not parse as is: smart quotes may then be delimiters
+    delimited = _SMART_DELIMITER_RE.sub(lambda m: (m.group(1) or "") + '"', candidate)
+    if delimited != candidate:
+        candidates.append(delimited)
+
+    for attempt in (json.loads, lambda c: json.loads(c, strict=False), parse_partial_json):
+        for option in candidates:
+            try:
+                obj = attempt(option)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(obj, dict):
+                return obj, True
+    # Truncated output: close whatever is still open
+    try:
+        obj = parse_partial_json(text[text.find("{"):])
+    except (TypeError, ValueError):
+        obj = None
+    if isinstance(obj, dict):
+        return obj, True
+    raise OutputParseError("Model output is not valid JSON")
+
+
+def drop_truncated_field(obj: dict) -> list:
+    """
+    Remove the value that was still being written when the output hit
+    max_tokens: the last key, descending while its value is an object.
+    Repair closes such a value, so it would otherwise pass as complete.
+    Returns the removed key path (empty if there was nothing to remove).
+    """
+    path = []
+    while isinstance(obj, dict) and obj:
+        key = next(reversed(obj))
+        path.append(key)
+        if not isinstance(obj[key], dict) or not obj[key]:
+            del obj[key]
+            break
+        obj = obj[key]
+    return path
+
+
+def _normalise_keys(platform: str, draft: dict) -> dict:
+    """Map aliased keys onto the schema's names; canonical keys win."""
+    aliases = WHATSAPP_ALIASES if platform == "whatsapp" else FIELD_ALIASES
+    fields = PLATFORM_MODELS[platform].model_fields
+    out = {k: v for k, v in draft.items() if k in fields}
+    for key, value in draft.items():
+        name = aliases.get(str(key).lower())
+        if name in fields and out.get(name) in (None, "", []):
+            out[name] = value
+    return out
+
+
+def validate_draft(platform: str, draft):
+    """
+    Validate one platform draft. Returns (clean, missing): `clean` is the
+    validated dict when complete (else the usable fields so far), `missing`
+    lists the required fields that are absent or invalid. Invalid optional
+    fields are dropped rather than reported.
+    """
+    model = PLATFORM_MODELS[platform]
+    draft = _normalise_keys(platform, draft if isinstance(draft, dict) else {})
+    required = set(required_fields(platform))
+    while True:
+        try:
+            return model.model_validate(draft).model_dump(exclude_none=True), []
+        except ValidationError as e:
+            invalid = {str(err["loc"][0]) for err in e.errors() if err["loc"]}
+        optional = invalid - required
+        if not optional:
+            break
+        draft = {k: v for k, v in draft.items() if k not in optional}
+    missing = sorted(invalid)
+    return {k: v for k, v in draft.items() if k not in invalid}, missing
+
+
+def required_fields(platform: str) -> list:
+    return [name for name, field in PLATFORM_MODELS[platform].model_fields.items() if field.is_required()]
+
+
+def record_outcome(prompt: str, outcome: str):
+    metrics.incr("llm_output_parse", prompt=prompt, outcome=outcome)
+
+
+def parse_rates(prompts) -> dict:
+    """Share of completions per outcome, across `prompts`."""
+    counts = {
+        outcome: sum(metrics.counter("llm_output_parse", prompt=p, outcome=outcome) for p in prompts)
+        for outcome in PARSE_OUTCOMES
+    }
+    total = sum(counts.values())
+    if not total:
+        return {"total": 0}
+    return {
+        "total": total,
+        "parseFailureRate": round((total - counts["valid"]) / total, 4),
+        "repairRate": round(counts["repaired"] / total, 4),
+        "reaskRate": round(counts["reasked"] / total, 4),
+        "failedRate": round(counts["failed"] / total, 4),
+    }
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Tests import the app as `app.*`, the way uvicorn runs it from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# No background loops, shared limiters or real provider keys under test
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("TOPIC_INDEX_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_SHARED", "memory")
+os.environ.setdefault("GROQ_RPM", "100000")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("IMAGE_STORE_DIR", tempfile.mkdtemp(prefix="images-"))
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """Postgres from the PG_* environment; tests that need it are skipped without it."""
+    try:
+        from app.db.postgres import engine
+    except Exception as e:
+        pytest.skip(f"Postgres not available: {e!r}")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(db_engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class FakeCalendar:
+    """In-memory stand-in for the Calendar API's events().insert/patch and batch requests."""
+
+    def __init__(self):
+        self.events_by_id = {}
+        self.calls = []
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        return ("insert", body.get("id"), body)
+
+    def patch(self, calendarId, eventId, body):
+        return ("patch", eventId, body)
+
+    def new_batch_http_request(self, callback):
+        return _FakeBatch(self, callback)
+
+    def apply(self, kind, event_id, body):
+        from googleapiclient.errors import HttpError
+        from httplib2 import Response
+
+        self.calls.append(kind)
+        if kind == "insert":
+            event_id = event_id or f"evt{len(self.events_by_id)}"
+            if event_id in self.events_by_id:
+                raise HttpError(Response({"status": 409}), b"duplicate")
+            self.events_by_id[event_id] = dict(body, id=event_id)
+        else:
+            if event_id not in self.events_by_id:
+                raise HttpError(Response({"status": 404}), b"not found")
+            self.events_by_id[event_id].update(body)
+        return self.events_by_id[event_id]
+
+
+class _FakeBatch:
+    def __init__(self, calendar, callback):
+        self.calendar, self.callback, self.requests = calendar, callback, []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, self.calendar.apply(*request), None)
+            except Exception as e:
+                self.callback(request_id, None, e)
+
+
+@pytest.fixture
+def fake_calendar(db_engine):
+    from sqlalchemy import text
+    from app.core.google_clients import google_clients
+
+    with db_engine.begin() as conn:
+        conn.execute(text("DELETE FROM calendar_events"))
+    calendar = FakeCalendar()
+    google_clients.override("calendar", calendar)
+    yield calendar
+    google_clients.reset()
@@ -0,0 +1,142 @@
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+from app.core.google_clients import google_clients
+from app.utils import calendar_service
+
+
+class RecordingHttp(HttpMockSequence):
+    """HttpMockSequence that keeps the body of every request it answers."""
+
+    def __init__(self, responses):
+        super().__init__(responses)
+        self.bodies = []
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        self.bodies.append(body.decode() if isinstance(body, bytes) else body or "")
+        return super().request(uri, method, body, headers, **kwargs)
+
+
+def batch_response(*parts):
+    """A multipart/mixed batch reply from `(request_id, status, payload)` parts."""
+    boundary = "batch_reply"
+    body = ""
+    for request_id, status, payload in parts:
+        body += (
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-reply + {request_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} Status\r\n"
+            "Content-Type: application/json\r\n\r\n"
+            f"{json.dumps(payload)}\r\n"
+        )
+    body += f"--{boundary}--"
+    return {"status": "200", "content-type": f"multipart/mixed; boundary={boundary}"}, body
+
+
+def sent(body: str) -> list:
+    """(method, event id or None) for each call inside a recorded batch body."""
+    calls = []
+    for method, path, payload in re.findall(r"(POST|PATCH) (\S+) HTTP/1.1.*?\n\n(\{.*?\})\n--", body, re.S):
+        if method == "PATCH":
+            calls.append((method, path.rsplit("/", 1)[-1].split("?")[0]))
+        else:
+            calls.append((method, json.loads(payload).get("id")))
+    return calls
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    monkeypatch.setattr(calendar_service.time, "sleep", lambda seconds: None)
+
+    def install(*responses):
+        http = RecordingHttp(list(responses))
+        google_clients.override("calendar", build("calendar", "v3", http=http, static_discovery=True))
+        return http
+
+    yield install
+    google_clients.reset()
+
+
+def _rows(count):
+    return [
+        (i, SimpleNamespace(startDateTime="2026-11-02T09:00:00", topic=f"topic {i}", imageGenerated=False), f"{i:02x}" * 16)
+        for i in range(count)
+    ]
+
+
+def test_event_id_is_deterministic_base32hex():
+    key = "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+
+    assert calendar_service.event_id(key) == calendar_service.event_id(key)
+    assert calendar_service.event_id(key) != calendar_service.event_id("00" + key[2:])
+    assert re.fullmatch(r"[0-9a-v]{5,1024}", calendar_service.event_id(key))
+
+
+def test_existing_event_id_is_patched_and_confirmed(calendar):
+    rows = _rows(2)
+    ids = [calendar_service.event_id(key) for _, _, key in rows]
+    http = calendar(
+        batch_response((0, 409, {"error": {"code": 409}}), (1, 200, {"id": ids[1]})),
+        batch_response((0, 200, {"id": ids[0]})),
+    )
+
+    results = calendar_service.create_events_chunk(rows)
+
+    assert results == {0: {"eventId": ids[0], "error": None}, 1: {"eventId": ids[1], "error": None}}
+    assert sent(http.bodies[0]) == [("POST", ids[0]), ("POST", ids[1])]
+    assert sent(http.bodies[1]) == [("PATCH", ids[0])]
+    assert '"status": "confirmed"' in http.bodies[1]
+
+
+def test_server_errors_are_retried(calendar):
+    rows = _rows(2)
+    ids = [calendar_service.event_id(key) for _, _, key in rows]
+    http = calendar(
+        batch_response((0, 200, {"id": ids[0]}), (1, 503, {"error": {"code": 503}})),
+        batch_response((1, 200, {"id": ids[1]})),
+    )
+
+    results = calendar_service.create_events_chunk(rows)
+
+    assert {index: r["eventId"] for index, r in results.items()} == {0: ids[0], 1: ids[1]}
+    assert sent(http.bodies[1]) == [("POST", ids[1])]
+
+
+def test_partial_batch_failure_only_fails_its_rows(calendar):
+    rows = _rows(3)
+    ids = [calendar_service.event_id(key) for _, _, key in rows]
+    calendar(batch_response(
+        (0, 200, {"id": ids[0]}),
+        (1, 400, {"error": {"code": 400, "message": "Invalid start time"}}),
+        (2, 200, {"id": ids[2]}),
+    ))
+
+    results = calendar_service.create_events_chunk(rows)
+
+    assert results[0] == {"eventId": ids[0], "error": None}
+    assert results[2] == {"eventId": ids[2], "error": None}
+    assert results[1]["eventId"] is None and "Invalid start time" in results[1]["error"]
+
+
+def test_failed_batch_request_is_resent_with_the_same_ids(calendar):
+    # The batch call itself fails after Google applied the first insert: the
+    # resend carries the same ids, so the applied one conflicts and is patched
+    rows = _rows(2)
+    ids = [calendar_service.event_id(key) for _, _, key in rows]
+    http = calendar(
+        ({"status": "503"}, "backend unavailable"),
+        batch_response((0, 409, {"error": {"code": 409}}), (1, 200, {"id": ids[1]})),
+        batch_response((0, 200, {"id": ids[0]})),
+    )
+
+    results = calendar_service.create_events_chunk(rows)
+
+    assert {index: r["eventId"] for index, r in results.items()} == {0: ids[0], 1: ids[1]}
+    assert sent(http.bodies[0]) == sent(http.bodies[1]) == [("POST", ids[0]), ("POST", ids[1])]
+    assert sent(http.bodies[2]) == [("PATCH", ids[0])]
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.core import executor
+
+SLOW = 0.3
+
+
+def test_blocking_calls_run_in_parallel_on_the_worker_pool():
+    threads = set()
+
+    def work():
+        threads.add(threading.current_thread().name)
+        time.sleep(SLOW)
+
+    async def run(count):
+        started = time.perf_counter()
+        await asyncio.gather(*(executor.run_blocking(work) for _ in range(count)))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run(executor.BLOCKING_WORKERS))
+
+    assert elapsed < SLOW * 2
+    assert len(threads) == executor.BLOCKING_WORKERS
+    assert all(name.startswith("blocking") for name in threads)
+
+
+def test_slow_db_calls_do_not_block_other_requests(db_engine, monkeypatch):
+    from app.api.controllers.agent import PostCRUD
+    from app.main import app
+
+    def slow_get_all_posts(self, *args):
+        time.sleep(SLOW)
+        return [], None
+
+    monkeypatch.setattr(PostCRUD, "get_all_posts", slow_get_all_posts)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            started = time.perf_counter()
+            posts = [asyncio.create_task(http.get("/api/v1/posts")) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            health = await http.get("/health")
+            health_latency = time.perf_counter() - started
+            responses = await asyncio.gather(*posts)
+            return health, health_latency, responses, time.perf_counter() - started
+
+    health, health_latency, responses, elapsed = asyncio.run(run())
+
+    assert health.status_code == 200 and health_latency < SLOW
+    assert [r.status_code for r in responses] == [200] * 4
+    assert elapsed < SLOW * 2
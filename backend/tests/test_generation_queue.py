@@ -0,0 +1,21 @@
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.api.endpoints import agent
+from app.core.job_queue import JobQueue
+from app.db.postgres import Post, session_scope
+
+
+def test_queue_full_marks_post_failed(client, monkeypatch):
+    full = JobQueue("generation-test", agent._run_generation_job, maxsize=1)
+    full.enqueue("occupied", {})
+    monkeypatch.setattr(agent, "generation_queue", full)
+    topic = f"queue-full-{uuid4()}"
+
+    response = client.post("/api/v1/generate?mode=queue", json={"topics": topic, "similar": "ignore"})
+
+    assert response.status_code == 503
+    with session_scope() as db:
+        statuses = db.execute(select(Post.status).where(Post.topic == topic)).scalars().all()
+    assert statuses == ["Failed"]
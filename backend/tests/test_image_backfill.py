@@ -0,0 +1,25 @@
+import base64
+from uuid import uuid4
+
+from app.db import image_backfill
+from app.db.postgres import Post, session_scope
+
+
+def test_dry_run_counts_without_writing(db_engine, tmp_path, monkeypatch):
+    store_dir = tmp_path / "store"
+    monkeypatch.setattr(image_backfill, "IMAGE_STORE_DIR", str(store_dir))
+    post_id = f"backfill-{uuid4()}"
+    image = {"filename": "a.png", "mimeType": "image/png", "base64Image": base64.b64encode(b"png").decode()}
+    with session_scope() as db:
+        db.add(Post(postId=post_id, topic="backfill", blog={}, linkedin={}, whatsapp={}, images=[image]))
+
+    try:
+        scanned, migrated = image_backfill.backfill(dry_run=True)
+
+        assert migrated >= 1
+        assert not store_dir.exists()
+        with session_scope() as db:
+            assert db.get(Post, post_id).images == [image]
+    finally:
+        with session_scope() as db:
+            db.query(Post).filter(Post.postId == post_id).delete()
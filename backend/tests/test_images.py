@@ -0,0 +1,34 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.endpoints.images import _parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=95-200", (95, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["items=0-1", "bytes=-", "bytes=1-2,4-5"])
+def test_unsupported_ranges_serve_whole_file(header):
+    assert _parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=10-5", 100),
+    ("bytes=-0", 100),
+    ("bytes=-10", 0),
+    ("bytes=0-", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(HTTPException) as err:
+        _parse_range(header, size)
+    assert err.value.status_code == 416
+    assert err.value.headers == {"Content-Range": f"bytes */{size}"}
@@ -0,0 +1,58 @@
+import asyncio
+import json
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from app.api.endpoints import agent
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    """Swap the chat models for a stub that answers WhatsApp drafts and counts calls."""
+    calls = []
+
+    async def respond(prompt_value, **kwargs):
+        calls.append(prompt_value.to_string())
+        return AIMessage(
+            content=json.dumps({"message": f"draft {len(calls)}"}),
+            response_metadata={"token_usage": {"prompt_tokens": 50, "completion_tokens": 10}},
+        )
+
+    monkeypatch.setattr(agent.registry, "chat", lambda provider, model: RunnableLambda(lambda p: None, afunc=respond))
+    monkeypatch.setattr(agent.content_service, "_chains", {})
+    return calls
+
+
+def _generate(topic, cache="use"):
+    return asyncio.run(agent.content_service.agenerate_platform(topic, "whatsapp", cache))
+
+
+def test_repeat_topic_is_served_from_cache(model_calls):
+    topic = f"Cache hit {uuid4()}"
+
+    first = _generate(topic)
+    again = _generate(f"  {topic.lower()}! ")
+
+    assert len(model_calls) == 1
+    assert again == first
+
+    # Hits are copies; a caller editing one cannot poison the cache
+    again["message"] = "edited"
+    assert _generate(topic) == first
+    assert len(model_calls) == 1
+
+
+def test_refresh_and_bypass_call_the_model(model_calls):
+    topic = f"Cache refresh {uuid4()}"
+    _generate(topic)
+
+    refreshed = _generate(topic, "refresh")
+    assert len(model_calls) == 2
+    assert _generate(topic) == refreshed
+
+    _generate(topic, "bypass")
+    assert len(model_calls) == 3
+    assert _generate(topic) == refreshed
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+
+from app.api.controllers.agent import PostCRUD, decode_cursor, encode_cursor
+from app.db.postgres import Post, session_scope
+
+
+@pytest.fixture
+def paging_status(db_engine):
+    """A status no other post has, so a listing filtered by it sees only this test's posts."""
+    status = f"Paging-{uuid4()}"
+    yield status
+    with session_scope() as db:
+        db.execute(delete(Post).where(Post.status == status))
+
+
+def _insert(status: str, count: int) -> list:
+    with session_scope() as db:
+        # One bulk insert shares a createdAt, so the pages split on postId ties
+        return PostCRUD(db).create_posts_bulk([{"topic": f"paging {i}"} for i in range(count)], status)
+
+
+def _page(client, status: str, cursor=None):
+    params = {"status": status, "limit": 10, "fields": "postId,createdAt"}
+    if cursor:
+        params["cursor"] = cursor
+    response = client.get("/api/v1/posts", params=params)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return [post["postId"] for post in body["data"]], body["nextCursor"]
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2026, 10, 18, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    post_id = str(uuid4())
+
+    assert decode_cursor(encode_cursor(created_at, post_id)) == (created_at, post_id)
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/v1/posts", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def test_pages_have_no_duplicates_or_gaps_under_inserts(client, paging_status):
+    original = _insert(paging_status, 25)
+
+    seen, cursor = _page(client, paging_status)
+    while cursor:
+        # Posts created mid-listing sort ahead of the cursor and cannot shift later pages
+        added = _insert(paging_status, 3)
+        page, cursor = _page(client, paging_status, cursor)
+        seen += page
+
+    assert len(seen) == len(set(seen))
+    assert sorted(seen) == sorted(original)
+    assert seen == sorted(original, reverse=True)
+
+    fresh, cursor = _page(client, paging_status)
+    assert fresh[:3] == sorted(added, reverse=True)
@@ -0,0 +1,39 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+
+from app.api.controllers.agent import PostCRUD
+from app.db.postgres import Post, session_scope
+
+
+@pytest.fixture
+def post(db_engine):
+    with session_scope() as db:
+        created = PostCRUD(db).create_post({
+            "topic": f"etag {uuid4()}",
+            "whatsapp": {"message": "hello"},
+            "platformStatus": {"whatsapp": "Generated"},
+        })
+    yield created
+    with session_scope() as db:
+        db.execute(delete(Post).where(Post.postId == created["postId"]))
+
+
+def test_missing_post_is_404_not_500(client):
+    missing = str(uuid4())
+
+    assert client.get("/api/v1/post/id", params={"post_id": missing}).status_code == 404
+    assert client.post("/api/v1/publish", json={"postId": missing, "platforms": ["whatsapp"]}).status_code == 404
+
+
+def test_unchanged_post_answers_304(client, post):
+    first = client.get("/api/v1/post/id", params={"post_id": post["postId"]})
+    assert first.status_code == 200
+
+    again = client.get("/api/v1/post/id", params={"post_id": post["postId"]}, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+    published = client.post("/api/v1/publish", json={"postId": post["postId"], "platforms": ["whatsapp"]})
+    assert published.status_code == 200
+    assert published.json()["data"]["platforms"] == {"whatsapp": {"message": "hello"}}
@@ -0,0 +1,113 @@
+import pytest
+from app.utils.structured_output import OutputParseError, repair_json, validate_draft
+
+
+def test_valid_json_is_not_repaired():
+    assert repair_json('{"title": "T", "content": "C"}') == ({"title": "T", "content": "C"}, False)
+
+
+def test_code_fence_and_prose_are_stripped():
+    text = 'Here you go:\n```json\n{"message": "hi"}\n```\nAnything else?'
+    assert repair_json(text) == ({"message": "hi"}, True)
+
+
+def test_prose_around_object_is_stripped():
+    assert repair_json('Sure! {"message": "hi"} Hope this helps.') == ({"message": "hi"}, True)
+
+
+def test_trailing_commas_are_removed():
+    assert repair_json('{"tags": ["a", "b",], "title": "T",}') == ({"tags": ["a", "b"], "title": "T"}, True)
+
+
+def test_smart_quotes_inside_strings_are_kept():
+    obj, repaired = repair_json('{"title":"T","content":"He called it “the future”.",}')
+    assert repaired
+    assert obj == {"title": "T", "content": "He called it “the future”."}
+
+
+def test_apostrophes_are_kept():
+    obj, _ = repair_json('{"content": "It’s here",}')
+    assert obj["content"] == "It’s here"
+
+
+def test_smart_quote_delimiters_are_normalised():
+    obj, repaired = repair_json('{“title”: “T”, “tags”: [“a”, “b”], “content”: “it’s “new””}')
+    assert repaired
+    assert obj == {"title": "T", "tags": ["a", "b"], "content": "it’s “new”"}
+
+
+def test_raw_newlines_in_strings_are_accepted():
+    assert repair_json('{"content": "line one\nline two"}') == ({"content": "line one\nline two"}, True)
+
+
+def test_truncated_output_is_closed():
+    obj, repaired = repair_json('{"title": "T", "content": "half a sent')
+    assert repaired
+    assert obj == {"title": "T", "content": "half a sent"}
+
+
+def test_truncated_flag_drops_the_unfinished_field():
+    obj, repaired = repair_json('{"title": "T", "content": "half a sent', truncated=True)
+    assert repaired
+    assert obj == {"title": "T"}
+
+
+def test_truncated_flag_drops_the_nested_unfinished_field():
+    text = '{"blog": {"title": "B", "content": "c"}, "whatsapp": {"message": "cut o'
+    obj, _ = repair_json(text, truncated=True)
+    assert obj == {"blog": {"title": "B", "content": "c"}, "whatsapp": {}}
+
+
+def test_truncated_flag_ignores_complete_output():
+    assert repair_json('{"message": "hi"}', truncated=True) == ({"message": "hi"}, False)
+
+
+@pytest.mark.parametrize("text", ["", "no json here", None])
+def test_unparseable_output_raises(text):
+    with pytest.raises(OutputParseError) as err:
+        repair_json(text)
+    assert err.value.status_code == 502
+
+
+def test_validate_complete_blog():
+    clean, missing = validate_draft("blog", {"title": "T", "content": "C", "tags": ["a"]})
+    assert missing == []
+    assert clean == {"title": "T", "content": "C", "tags": ["a"]}
+
+
+def test_validate_reports_missing_required_fields():
+    clean, missing = validate_draft("linkedin", {"title": "T"})
+    assert missing == ["content"]
+    assert clean == {"title": "T"}
+
+
+def test_validate_reports_empty_required_fields():
+    _, missing = validate_draft("whatsapp", {"message": ""})
+    assert missing == ["message"]
+
+
+def test_validate_maps_aliases():
+    clean, missing = validate_draft("blog", {"headline": "T", "body": "C", "hashtags": "#a, #b"})
+    assert missing == []
+    assert clean == {"title": "T", "content": "C", "tags": ["#a", "#b"]}
+
+
+def test_validate_canonical_keys_win_over_aliases():
+    clean, _ = validate_draft("blog", {"title": "T", "content": "C", "body": "other"})
+    assert clean["content"] == "C"
+
+
+def test_validate_whatsapp_aliases():
+    assert validate_draft("whatsapp", {"text": "hi"}) == ({"message": "hi"}, [])
+
+
+def test_validate_drops_invalid_optional_fields():
+    clean, missing = validate_draft("blog", {"title": "T", "content": "C", "tags": 5})
+    assert missing == []
+    assert clean == {"title": "T", "content": "C", "tags": []}
+
+
+def test_validate_non_dict_draft():
+    clean, missing = validate_draft("whatsapp", None)
+    assert clean == {}
+    assert missing == ["message"]
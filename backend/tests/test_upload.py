@@ -0,0 +1,76 @@
+import io
+
+import openpyxl
+
+from app.api.endpoints import upload
+from app.utils.sheet_reader import iter_csv_chunks
+
+
+def _xlsx(rows: int) -> bytes:
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.append(["slno", "topic", "imageGenerated", "selectDate", "time"])
+    for i in range(rows):
+        sheet.append([i + 1, f"xlsx topic {i}", "false", "2026-11-02", f"{9 + i % 8}:00"])
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def _csv(rows: int) -> bytes:
+    lines = ["slno,topic,imageGenerated,selectDate,time"]
+    lines += [f"{i + 1},csv topic {i},false,2026-11-03,{9 + i % 8}:00" for i in range(rows)]
+    return "\n".join(lines).encode()
+
+
+def _spy_chunks(monkeypatch, chunk_rows: int) -> list:
+    monkeypatch.setattr(upload, "INGEST_CHUNK_ROWS", chunk_rows)
+    chunk_sizes = []
+    parse_rows = upload.parse_rows
+
+    def spy(header, raw_rows, offset):
+        chunk_sizes.append(len(raw_rows))
+        return parse_rows(header, raw_rows, offset)
+
+    monkeypatch.setattr(upload, "parse_rows", spy)
+    return chunk_sizes
+
+
+def test_csv_rows_are_synced_in_bounded_chunks(client, fake_calendar, monkeypatch):
+    chunk_sizes = _spy_chunks(monkeypatch, 9)
+
+    response = client.post("/api/v1/upload", files={"file": ("s.csv", _csv(40), "text/csv")})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["rowsCreated"] == 40
+    assert chunk_sizes == [9, 9, 9, 9, 4]
+
+
+def test_csv_chunks_are_read_lazily():
+    stream = io.BytesIO(_csv(20000))
+
+    header, chunk = next(iter_csv_chunks(stream, 100))
+
+    assert header[1] == "topic" and len(chunk) == 100
+    # Only a read buffer's worth of the file has been consumed
+    assert stream.tell() < len(stream.getvalue()) // 10
+
+
+def test_xlsx_rows_are_synced_in_bounded_chunks(client, fake_calendar, monkeypatch):
+    chunk_sizes = _spy_chunks(monkeypatch, 7)
+
+    response = client.post("/api/v1/upload", files={"file": ("s.xlsx", _xlsx(30), "application/octet-stream")})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["rowsReceived"] == 30
+    assert body["rowsCreated"] == 30
+    assert chunk_sizes == [7, 7, 7, 7, 2]
+
+
+def test_unreadable_files_are_rejected_as_invalid(client):
+    for name in ("bad.xlsx", "bad.xls", "bad.pdf"):
+        response = client.post("/api/v1/upload", files={"file": (name, b"not really a " + name.encode(), "application/octet-stream")})
+
+        assert response.status_code == 400, (name, response.text)
+        assert response.json()["detail"].startswith("Invalid file:")
@@ -36,7 +36,15 @@ export default function Index() {
     const [selectedFile, setSelectedFile] = useState<File | null>(null);
     const [imageGenerated, setImageGenerated] = useState(false);
 
-    const { data: posts, isLoading, isError } = usePosts("Generated");
+    const {
+        data: postPages,
+        isLoading,
+        isError,
+        hasNextPage,
+        fetchNextPage,
+        isFetchingNextPage,
+    } = usePosts("Generated");
+    const posts = postPages?.pages.flatMap((page) => page.data);
     const { data: selectedPost, isLoading: isPostLoading } = usePostById(
         selectedPostId ?? undefined,
         { enabled: !!selectedPostId }
@@ -491,9 +499,9 @@ export default function Index() {
                         }}
                     >
                         {posts.map((post) => {
-                            const availablePlatforms = Object.keys(post).filter((key) =>
-                                ["blog", "linkedin", "whatsapp"].includes(key)
-                            );
+                            const availablePlatforms = Object.entries(post.platformStatus ?? {})
+                                .filter(([, platformStatus]) => platformStatus === "Generated")
+                                .map(([platform]) => platform);
                             return (
                                 <Card
                                     key={post.postId}
@@ -598,6 +606,25 @@ export default function Index() {
                         })}
                     </Box>
                 )}
+
+                {hasNextPage && (
+                    <Box className="flex justify-center py-4">
+                        <Button
+                            variant="outlined"
+                            onClick={() => fetchNextPage()}
+                            disabled={isFetchingNextPage}
+                            sx={{
+                                borderRadius: "10px",
+                                textTransform: "none",
+                                fontWeight: 600,
+                                borderColor: "#fff",
+                                color: "#fff",
+                            }}
+                        >
+                            {isFetchingNextPage ? <CircularProgress size={20} sx={{ color: "#fff" }} /> : "Load more"}
+                        </Button>
+                    </Box>
+                )}
             </Box>
 
             <Dialog
@@ -1,20 +1,25 @@
-import { useQuery, UseQueryOptions } from "@tanstack/react-query";
+import { InfiniteData, useInfiniteQuery, useQuery, UseInfiniteQueryOptions, UseQueryOptions } from "@tanstack/react-query";
 import { queryFetch } from "~/config/query-client";
 import { ApiError } from "~/utils/interface/ClientTypeInterfaces";
 import { PostApiResponse, SinglePostApiResponse, PostData } from "~/utils/interface/AgentInterfaces";
 
+// The list only shows these; usePostById loads the drafts when a post is opened
+const POST_LIST_FIELDS = "postId,topic,status,createdAt,platformStatus";
+
 export function usePosts(
     status: string = "Generated",
-    options?: Partial<UseQueryOptions<PostData[], ApiError>>
+    pageSize: number = 30,
+    options?: Partial<UseInfiniteQueryOptions<PostApiResponse, ApiError, InfiniteData<PostApiResponse>, PostApiResponse, string[], string | undefined>>
 ) {
-    return useQuery<PostData[], ApiError>({
+    return useInfiniteQuery<PostApiResponse, ApiError, InfiniteData<PostApiResponse>, string[], string | undefined>({
         queryKey: ["posts", status],
-        queryFn: async () => {
-            const response = await queryFetch<PostApiResponse>({
-                url: `/api/v1/posts?status=${status}`,
-            });
-            return response.data;
-        },
+        queryFn: ({ pageParam }) =>
+            queryFetch<PostApiResponse>({
+                url: "/api/v1/posts",
+                inputParams: { status, limit: pageSize, fields: POST_LIST_FIELDS, cursor: pageParam },
+            }),
+        initialPageParam: undefined,
+        getNextPageParam: (response) => response.nextCursor ?? undefined,
         ...options,
     });
 }
@@ -22,6 +22,7 @@ export interface PostData {
     whatsapp?: PlatformData;
     status: string;
     images?: ImageData[];
+    platformStatus?: Record<string, string>; // e.g. { blog: "Generated", linkedin: "Failed" }
     createdAt: string;
     updatedAt: string;
 }
@@ -31,6 +32,7 @@ export interface PostApiResponse {
     message: string;
     count?: number;
     data: PostData[]; // For /posts
+    nextCursor?: string | null; // Next page of /posts; null on the last page
 }
 
 export interface SinglePostApiResponse {